@@ -5,14 +5,31 @@ Flask Application Factory
 import os
 from flask import Flask
 from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 
 from app.api.routes import api_bp
+from app.api.health_routes import health_bp
+from app.api.admin_routes import admin_bp
+from app.api.batch_routes import batch_bp
 from app.api.device.device_routes import device_bp
 from app.api.device.sensor_routes import sensor_bp
+from app.api.device.async_routes import register_async_views
 from app.utils.config import Config
+from app.utils.extension import limiter
 from app.utils.error_handlers import error_handlers
+from app.utils.json_provider import FastJSONProvider
+from app.utils.async_runtime import async_runtime
+from app.utils.compression import init_compression
+from app.storage.response_cache import response_cache
+from app.services.registry import create_registry
+from app.services.health_service import health_checker
+from app.event.update_coalescer import update_coalescer
+from app.event.send_queue import send_queues
+from app.event.admission import connect_admission
+from app.event.command_dispatcher import command_dispatcher
+from app.utils.metrics import metrics
+from app.utils.db_instrumentation import db_instrumentation
+from app.utils.profiler import profiler
+from app.cli import register_commands
 
 
 def create_app(config_class=Config):
@@ -31,30 +48,63 @@ def create_app(config_class=Config):
     # Load configuration
     app.config.from_object(config_class)
     
+    # Serialize responses with the fast JSON provider
+    if app.config.get('JSON_FAST_PROVIDER', True):
+        app.json = FastJSONProvider(app)
+    
     # Initialize CORS
     CORS(app, origins=app.config.get('CORS_ORIGINS', '*'))
     
-    # Initialize rate limiter
-    limiter = Limiter(
-        key_func=get_remote_address,
-        default_limits=[f"{app.config.get('RATE_LIMIT_PER_MINUTE', 60)} per minute"]
-    )
+    # Initialize rate limiter (per API key, shared through Redis)
     limiter.init_app(app)
     
+    # Initialize response cache
+    response_cache.init_app(app)
+    
+    # Background dependency checks behind the readiness probe
+    health_checker.init_app(app)
+    
+    # Socket.IO admission control, rate cap and backpressure for iot_update, command downlink
+    connect_admission.init_app(app)
+    update_coalescer.init_app(app)
+    send_queues.init_app(app)
+    command_dispatcher.init_app(app)
+    
+    # Shared service instances, warmed before the first request
+    services = create_registry(app)
+    if app.config.get('SERVICES_WARMUP', True):
+        services.warmup()
+    
     # Register blueprints
+    app.register_blueprint(health_bp)
+    limiter.exempt(health_bp)
     app.register_blueprint(api_bp, url_prefix=f"/api/{app.config.get('API_VERSION', 'v1')}")
     app.register_blueprint(device_bp, url_prefix=f"/api/{app.config.get('API_VERSION', 'v1')}")
     app.register_blueprint(sensor_bp, url_prefix=f"/api/{app.config.get('API_VERSION', 'v1')}")
+    app.register_blueprint(batch_bp, url_prefix=f"/api/{app.config.get('API_VERSION', 'v1')}")
+    app.register_blueprint(admin_bp, url_prefix=f"/api/{app.config.get('API_VERSION', 'v1')}/admin")
+    
+    # Serve device and sensor reads with async views on a shared event loop
+    if app.config.get('ASYNC_VIEWS', False):
+        async_runtime.init_app(app)
+        register_async_views(app)
+    
+    # Prometheus request and Socket.IO metrics (when prometheus_client is installed)
+    metrics.init_app(app)
+    
+    # MongoDB/Redis command counts per request and slow-command log
+    db_instrumentation.init_app(app)
+    
+    # On-demand sampling profiler (POST /api/v1/admin/profile)
+    profiler.init_app(app)
     
     # Register error handlers
     error_handlers(app)
     
-
-    
+    # Compress large responses for clients that accept it
+    init_compression(app)
     
-    # Health check endpoint
-    @app.route('/health')
-    def health_check():
-        return {'status': 'healthy', 'message': 'API is running'}, 200
+    # Register CLI commands
+    register_commands(app)
     
     return app
@@ -0,0 +1,363 @@
+"""
+Admin API Routes Blueprint
+"""
+
+import os
+from flask import Blueprint, current_app, request, Response
+from app.utils.auth import require_api_key, require_scope, validate_json_payload
+from app.utils.helpers import success_response, error_response
+from app.services.recalibration_service import RecalibrationService
+from app.services.registry import get_service
+from app.storage.response_cache import response_cache
+from app.event.send_queue import send_queues
+from app.event.admission import connect_admission
+from app.event.command_dispatcher import command_dispatcher
+from app.utils.profiler import FORMATS, profiler, to_collapsed, to_speedscope
+
+# Create Admin API blueprint
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/v1/admin')
+
+
+@admin_bp.route('/recalibrate', methods=['POST'])
+@require_api_key
+@require_scope('admin')
+@validate_json_payload(['device_id'])
+def create_recalibration_job():
+    """
+    Start a recalibration backfill job for a device
+
+    Expected JSON payload:
+    {
+        "device_id": "string",
+        "start": "ISO timestamp (optional)",
+        "end": "ISO timestamp (optional)",
+        "sensor_types": ["ph", "tds", "turbidity"] (optional),
+        "chunk_size": 500 (optional, positive integer),
+        "max_rate": 2000 (optional, readings per second, 0 for no limit)
+    }
+
+    Returns:
+        JSON response with the created job
+    """
+    try:
+        data = request.get_json()
+        # Per-job throttling settings, calibration shared with live ingest
+        recalibration_service = RecalibrationService(
+            calibration_service=get_service('calibration'),
+            chunk_size=data.get('chunk_size'),
+            max_docs_per_second=data.get('max_rate')
+        )
+        job = recalibration_service.create_job(
+            data['device_id'],
+            start=data.get('start'),
+            end=data.get('end'),
+            sensor_types=data.get('sensor_types')
+        )
+        recalibration_service.start_job(job['job_id'])
+        return success_response(job, "Recalibration job started", 202)
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    except Exception as e:
+        return error_response(f"Failed to start recalibration job: {str(e)}", 500)
+
+
+@admin_bp.route('/recalibrate/<job_id>', methods=['GET'])
+@require_api_key
+@require_scope('admin')
+def get_recalibration_job(job_id):
+    """
+    Get recalibration job progress
+
+    Args:
+        job_id: ID of the job
+
+    Returns:
+        JSON response with job progress and throughput
+    """
+    try:
+        job = get_service('recalibration').get_job(job_id)
+        if not job:
+            return error_response("Recalibration job not found", 404)
+        return success_response(job, "Recalibration job retrieved successfully")
+    except Exception as e:
+        return error_response(f"Failed to get recalibration job: {str(e)}", 500)
+
+
+@admin_bp.route('/recalibrate/<job_id>/resume', methods=['POST'])
+@require_api_key
+@require_scope('admin')
+def resume_recalibration_job(job_id):
+    """
+    Resume a cancelled, failed or interrupted recalibration job from its checkpoint
+
+    Query Parameters:
+        force (bool): Take over a job still marked as running (default: false)
+
+    Args:
+        job_id: ID of the job
+
+    Returns:
+        JSON response with the job
+    """
+    try:
+        recalibration_service = get_service('recalibration')
+        job = recalibration_service.get_job(job_id)
+        if not job:
+            return error_response("Recalibration job not found", 404)
+        if job['status'] == 'completed':
+            return error_response("Recalibration job already completed", 409)
+        force = request.args.get('force', 'false').lower() == 'true'
+        if job['status'] == 'running' and not force:
+            return error_response("Recalibration job is already running", 409)
+        recalibration_service.start_job(job_id, force=force)
+        return success_response(job, "Recalibration job resumed", 202)
+    except Exception as e:
+        return error_response(f"Failed to resume recalibration job: {str(e)}", 500)
+
+
+@admin_bp.route('/recalibrate/<job_id>', methods=['DELETE'])
+@require_api_key
+@require_scope('admin')
+def cancel_recalibration_job(job_id):
+    """
+    Cancel a recalibration job after its current chunk
+
+    Args:
+        job_id: ID of the job
+
+    Returns:
+        JSON response with the job
+    """
+    try:
+        job = get_service('recalibration').cancel_job(job_id)
+        if not job:
+            return error_response("Recalibration job not found", 404)
+        return success_response(job, "Recalibration job cancellation requested")
+    except Exception as e:
+        return error_response(f"Failed to cancel recalibration job: {str(e)}", 500)
+
+
+@admin_bp.route('/cache/stats', methods=['GET'])
+@require_api_key
+@require_scope('admin')
+def get_cache_stats():
+    """
+    Get response cache hit/miss counters for this worker
+
+    Returns:
+        JSON response with cache counters and hit ratio
+    """
+    return success_response(response_cache.stats(), "Cache stats retrieved successfully")
+
+
+@admin_bp.route('/realtime/lag', methods=['GET'])
+@require_api_key
+@require_scope('admin')
+def get_realtime_lag():
+    """
+    Get the Socket.IO frontends of this worker that are behind on iot_update
+
+    Returns:
+        JSON response with per-sid queued messages, transport backlog, drops and lag
+    """
+    return success_response(send_queues.lag(), "Realtime lag retrieved successfully")
+
+
+@admin_bp.route('/realtime/admission', methods=['GET'])
+@require_api_key
+@require_scope('admin')
+def get_realtime_admission():
+    """
+    Get Socket.IO connect admission counters for this worker
+
+    Returns:
+        JSON response with admitted/refused connects, tokens, waiting clients and handling times
+    """
+    return success_response(connect_admission.stats(), "Admission stats retrieved successfully")
+
+
+@admin_bp.route('/realtime/commands', methods=['GET'])
+@require_api_key
+@require_scope('admin')
+def get_realtime_commands():
+    """
+    Get command downlink counters and round-trip latency for this worker
+
+    Returns:
+        JSON response with sent/acked/retried/timed out commands and the latency histogram
+    """
+    return success_response(command_dispatcher.stats(), "Command stats retrieved successfully")
+
+
+@admin_bp.route('/api-keys', methods=['POST'])
+@require_api_key
+@require_scope('admin')
+@validate_json_payload(['name'])
+def create_api_key():
+    """
+    Create an API key for a kiosk operator or integration
+
+    Expected JSON payload:
+    {
+        "name": "string",
+        "scopes": ["read", "write"] (optional, 'admin' or '*' for admin access),
+        "quota_per_minute": 120 (optional)
+    }
+
+    Returns:
+        JSON response with the key record; the raw key is only returned here
+    """
+    try:
+        data = request.get_json()
+        result = get_service('api_keys').create_key(
+            data['name'],
+            scopes=data.get('scopes', ['read', 'write']),
+            quota_per_minute=data.get('quota_per_minute')
+        )
+        return success_response(result, "API key created", 201)
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    except Exception as e:
+        return error_response(f"Failed to create API key: {str(e)}", 500)
+
+
+@admin_bp.route('/api-keys', methods=['GET'])
+@require_api_key
+@require_scope('admin')
+def list_api_keys():
+    """
+    List API keys (without the keys themselves)
+
+    Returns:
+        JSON response with key records
+    """
+    try:
+        return success_response(get_service('api_keys').list_keys(), "API keys retrieved successfully")
+    except Exception as e:
+        return error_response(f"Failed to list API keys: {str(e)}", 500)
+
+
+@admin_bp.route('/api-keys/<key_id>', methods=['DELETE'])
+@require_api_key
+@require_scope('admin')
+def revoke_api_key(key_id):
+    """
+    Revoke an API key in every worker
+
+    Args:
+        key_id: Public ID of the key
+
+    Returns:
+        JSON response confirming revocation
+    """
+    try:
+        if not get_service('api_keys').revoke_key(key_id):
+            return error_response("API key not found", 404)
+        return success_response(True, "API key revoked")
+    except Exception as e:
+        return error_response(f"Failed to revoke API key: {str(e)}", 500)
+
+
+@admin_bp.route('/device-tokens', methods=['POST'])
+@require_api_key
+@require_scope('admin')
+@validate_json_payload(['device_id'])
+def issue_device_token():
+    """
+    Issue a Socket.IO credential for a provisioned device
+
+    Expected JSON payload:
+    {
+        "device_id": "string",
+        "client_type": "iot" | "frontend" (optional, default "iot"),
+        "ttl_seconds": 86400 (optional)
+    }
+
+    Returns:
+        JSON response with the salt and key the client sends in its connect auth
+    """
+    if not current_app.config.get('DEVICE_TOKEN_SECRET'):
+        return error_response("Device tokens are disabled: DEVICE_TOKEN_SECRET is not set", 503)
+    try:
+        data = request.get_json()
+        if not get_service('device').get_device_by_id(data['device_id']):
+            return error_response("Device not found", 404)
+        result = get_service('device_tokens').issue(
+            data['device_id'],
+            client_type=data.get('client_type', 'iot'),
+            ttl=data.get('ttl_seconds')
+        )
+        return success_response(result, "Device token issued", 201)
+    except ValueError as ve:
+        return error_response(str(ve), 400)
+    except Exception as e:
+        return error_response(f"Failed to issue device token: {str(e)}", 500)
+
+
+@admin_bp.route('/device-tokens/revoke', methods=['POST'])
+@require_api_key
+@require_scope('admin')
+def revoke_device_token():
+    """
+    Revoke one device credential, or every credential issued to a device so far
+
+    Expected JSON payload:
+    {
+        "salt": "string"        (revokes that credential)
+        or
+        "device_id": "string"   (revokes all of the device's current credentials)
+    }
+
+    Returns:
+        JSON response confirming revocation
+    """
+    if not current_app.config.get('DEVICE_TOKEN_SECRET'):
+        return error_response("Device tokens are disabled: DEVICE_TOKEN_SECRET is not set", 503)
+    try:
+        data = request.get_json(silent=True) or {}
+        service = get_service('device_tokens')
+        if isinstance(data.get('salt'), str) and data['salt']:
+            service.revoke_token(data['salt'])
+        elif isinstance(data.get('device_id'), str) and data['device_id']:
+            service.revoke_device(data['device_id'])
+        else:
+            return error_response("Either salt or device_id is required", 400)
+        return success_response(True, "Device token revoked")
+    except Exception as e:
+        return error_response(f"Failed to revoke device token: {str(e)}", 500)
+
+
+@admin_bp.route('/profile', methods=['POST'])
+@require_api_key
+@require_scope('admin')
+def profile_worker():
+    """
+    Sample the stacks of the worker handling this request
+
+    Expected JSON payload (all optional):
+    {
+        "seconds": 10,
+        "interval_ms": 5,
+        "format": "collapsed" | "speedscope"
+    }
+
+    Returns:
+        The profile as collapsed stacks (text) or a speedscope JSON document;
+        409 if a profile is already running in this worker
+    """
+    data = request.get_json(silent=True) or {}
+    output = data.get('format', 'collapsed')
+    if output not in FORMATS:
+        return error_response(f"format must be one of {', '.join(FORMATS)}", 400)
+    try:
+        result = profiler.profile(float(data.get('seconds', 10)), interval=float(data.get('interval_ms', 5)) / 1000)
+    except (TypeError, ValueError) as e:
+        return error_response(str(e), 400)
+    if result is None:
+        return error_response("A profile is already running in this worker", 409)
+
+    headers = {'X-Profile-Samples': str(sum(result['samples'].values())), 'X-Profile-Pid': str(os.getpid())}
+    if output == 'speedscope':
+        headers['Content-Disposition'] = f'attachment; filename="profile-{os.getpid()}.speedscope.json"'
+        return Response(to_speedscope(result, name=f"worker {os.getpid()}"), mimetype='application/json', headers=headers)
+    return Response(to_collapsed(result), mimetype='text/plain', headers=headers)
@@ -0,0 +1,194 @@
+"""
+Batch API Routes Blueprint
+"""
+
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, request, current_app, abort
+from werkzeug.test import EnvironBuilder
+from app.utils.auth import require_api_key, validate_json_payload, current_api_key, READ_METHODS, BATCH_API_KEY_ENVIRON
+from app.utils.helpers import success_response
+from app.utils.extension import limiter
+from app.utils.rate_limit import api_key_rate_limit, api_key_rate_limit_key
+
+logger = logging.getLogger(__name__)
+
+# Create Batch API blueprint
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/v1')
+
+BATCH_METHODS = frozenset({'GET', 'POST', 'PUT', 'DELETE'})
+
+# Request headers a sub-request may set; the API key always comes from the batch
+FORWARDED_HEADERS = ('If-None-Match',)
+
+# Response headers passed back to the client with each result
+RETURNED_HEADERS = ('ETag', 'Location', 'Retry-After')
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def batch_cost():
+    """Charge a batch one hit per sub-request against the API key's budget"""
+    payload = request.get_json(silent=True)
+    requests = payload.get('requests') if isinstance(payload, dict) else None
+    if not isinstance(requests, list) or not 0 < len(requests) <= current_app.config.get('BATCH_MAX_REQUESTS', 20):
+        return 1  # rejected by the view
+    return len(requests)
+
+
+@batch_bp.route('/batch', methods=['POST'])
+@limiter.limit(api_key_rate_limit, key_func=api_key_rate_limit_key, cost=batch_cost)
+@require_api_key(scope='read')
+@validate_json_payload(['requests'])
+def run_batch():
+    """
+    Run several API requests in one round trip
+
+    Expected JSON payload:
+    {
+        "requests": [
+            {
+                "id": "string (optional, echoed back)",
+                "method": "GET (default) | POST | PUT | DELETE",
+                "path": "/api/v1/device/<device_id>",
+                "query": {"page": 1} (optional),
+                "body": {} (optional JSON body),
+                "headers": {"If-None-Match": "..."} (optional)
+            }
+        ]
+    }
+
+    Sub-requests are dispatched in-process through the regular views, in
+    order. Consecutive reads run concurrently; a write waits for everything
+    before it and blocks everything after it. The API key is validated and
+    its rate limit charged once for the whole batch (one hit per
+    sub-request). The batch itself only needs the 'read' scope, so
+    read-only keys can batch reads; each sub-request still needs the scope
+    its method requires and is still counted against route limits such as
+    the per-device telemetry budget.
+
+    Returns:
+        JSON response with one result (id, status, headers, body) per sub-request
+    """
+    specs = _parse_requests(request.get_json()['requests'])
+    environ_base = {
+        'REMOTE_ADDR': request.remote_addr,
+        BATCH_API_KEY_ENVIRON: current_api_key()
+    }
+    api_key = request.headers.get('X-API-Key')
+    results = _run(current_app._get_current_object(), specs, api_key, environ_base)
+    return success_response({'responses': results}, "Batch processed successfully")
+
+
+def _parse_requests(requests):
+    """Validate the sub-requests, aborting with 400 on the first invalid one"""
+    max_requests = current_app.config.get('BATCH_MAX_REQUESTS', 20)
+    if not isinstance(requests, list) or not requests:
+        abort(400, description='requests must be a non-empty list')
+    if len(requests) > max_requests:
+        abort(400, description=f'A batch may contain at most {max_requests} requests')
+
+    prefix = f"/api/{current_app.config.get('API_VERSION', 'v1')}/"
+    specs = []
+    for index, item in enumerate(requests):
+        if not isinstance(item, dict):
+            abort(400, description=f'requests[{index}] must be an object')
+        method = str(item.get('method', 'GET')).upper()
+        path = item.get('path')
+        if method not in BATCH_METHODS:
+            abort(400, description=f'requests[{index}]: method {method} is not allowed')
+        if not isinstance(path, str) or not path.startswith(prefix):
+            abort(400, description=f'requests[{index}]: path must start with {prefix}')
+        if path.split('?', 1)[0].rstrip('/') == f'{prefix}batch':
+            abort(400, description=f'requests[{index}]: batches cannot be nested')
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict):
+            abort(400, description=f'requests[{index}]: headers must be an object')
+        specs.append({
+            'id': item.get('id', index),
+            'method': method,
+            'path': path,
+            'query': item.get('query'),
+            'body': item.get('body'),
+            'has_body': 'body' in item,
+            'headers': {name: headers[name] for name in FORWARDED_HEADERS if name in headers}
+        })
+    return specs
+
+
+def _run(app, specs, api_key, environ_base):
+    """Dispatch the sub-requests, running consecutive reads concurrently"""
+    results = [None] * len(specs)
+    reads = []
+
+    def flush():
+        if len(reads) == 1:
+            results[reads[0]] = _dispatch(app, specs[reads[0]], api_key, environ_base)
+        elif reads:
+            # Each read runs in a copy of this context, so per-request state such as
+            # the DB command counts reaches the batch from the pool threads
+            executor = _get_executor(app)
+            futures = {
+                i: executor.submit(contextvars.copy_context().run, _dispatch, app, specs[i], api_key, environ_base)
+                for i in reads
+            }
+            for i, future in futures.items():
+                results[i] = future.result()
+        reads.clear()
+
+    for i, spec in enumerate(specs):
+        if spec['method'] in READ_METHODS:
+            reads.append(i)
+            continue
+        flush()
+        results[i] = _dispatch(app, spec, api_key, environ_base)
+    flush()
+    return results
+
+
+def _dispatch(app, spec, api_key, environ_base):
+    """Run one sub-request through the WSGI app and collect its response"""
+    builder = EnvironBuilder(
+        path=spec['path'],
+        method=spec['method'],
+        query_string=spec['query'],
+        headers={'X-API-Key': api_key, **spec['headers']},
+        environ_base=environ_base,
+        **({'json': spec['body']} if spec['has_body'] else {})
+    )
+    try:
+        response = app.response_class.from_app(app.wsgi_app, builder.get_environ(), buffered=True)
+    except Exception as e:
+        logger.exception(f"Batch sub-request {spec['method']} {spec['path']} failed")
+        return {'id': spec['id'], 'status': 500, 'headers': {}, 'body': {'status': 'error', 'message': str(e)}}
+    finally:
+        builder.close()
+
+    if response.is_json:
+        body = response.get_json(silent=True)
+    else:
+        body = response.get_data(as_text=True) or None
+    return {
+        'id': spec['id'],
+        'status': response.status_code,
+        'headers': {name: response.headers[name] for name in RETURNED_HEADERS if name in response.headers},
+        'body': body
+    }
+
+
+def _get_executor(app):
+    """Thread pool for concurrent reads, created once per worker process"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=app.config.get('BATCH_MAX_WORKERS', 8),
+                                               thread_name_prefix='batch')
+                _executor_pid = os.getpid()
+    return _executor
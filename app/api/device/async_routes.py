@@ -0,0 +1,185 @@
+"""
+Async views for device and sensor reads
+
+Enabled with ASYNC_VIEWS: create_app swaps these in for the sync views of
+the same endpoints, so URLs, auth, rate limits, pagination and the
+response cache are unchanged. Lookups run on pymongo's AsyncMongoClient in
+the async runtime's event loop, where the queries of concurrent requests
+overlap, and a view's independent lookups run concurrently too:
+
+- a device and its version come from one query;
+- sensor reads run alongside the device lookup. Their ETag also covers the
+  body, so a write landing between the two reads can never tag an older
+  body with the newer version.
+"""
+
+import asyncio
+import hashlib
+import json
+from flask import request
+from app.utils.auth import require_api_key
+from app.utils.helpers import success_response, error_response
+from app.utils.etag import make_etag, is_not_modified, not_modified_response, with_etag
+from app.services.async_read_service import AsyncReadService
+from app.services.registry import get_service
+from app.storage.response_cache import response_cache
+
+read_service = AsyncReadService()
+
+
+def _paginated():
+    return bool(request.args.get('page') or request.args.get('per_page'))
+
+
+def _digest(data):
+    """Digest of a response body, for ETags of data read concurrently with its version"""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+async def _cached(key, load, tags):
+    """
+    response_cache.get_or_set for a coroutine loader
+
+    The cache's blocking Redis calls run in a worker thread; on a miss the
+    loader is scheduled back on this event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.to_thread(
+        response_cache.get_or_set, key,
+        lambda: asyncio.run_coroutine_threadsafe(load(), loop).result(),
+        tags=tags
+    )
+
+
+@require_api_key
+async def get_devices():
+    """
+    Get all devices
+
+    Returns:
+        JSON response with list of devices, or 304 if If-None-Match is current
+    """
+    try:
+        # The version is read first, so the data can only be newer than the ETag
+        devices_version = await read_service.get_devices_version()
+        etag = make_etag('devices', devices_version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        if _paginated():
+            device_service = get_service('device')
+            page = request.args.get('page', 1, type=int)
+            per_page = request.args.get('per_page', 10, type=int)
+            status_filter = request.args.get('status', None, type=str)
+
+            async def load():
+                return await asyncio.to_thread(device_service.list_devices, page=page, per_page=per_page,
+                                               status_filter=status_filter)
+        else:
+            load = read_service.get_all_devices
+        data = await _cached(response_cache.key('devices', request.args, version=devices_version), load, tags=["devices"])
+        return with_etag(success_response(data, "Devices retrieved successfully"), etag)
+    except Exception as e:
+        return error_response(f"Failed to get devices: {str(e)}", 500)
+
+
+@require_api_key
+async def get_device_by_id(device_id):
+    """
+    Get device by ID
+
+    Args:
+        device_id: ID of the device to retrieve
+
+    Returns:
+        JSON response with device data, or 304 if If-None-Match is current
+    """
+    try:
+        # One round trip: the document carries the version its ETag is built from
+        found = await read_service.get_device_by_id(device_id)
+        if not found:
+            return error_response("Device not found", 404)
+        version, data = found
+        etag = make_etag('device', *version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        return with_etag(success_response(data, "Device retrieved successfully"), etag)
+    except Exception as e:
+        return error_response(f"Failed to get device: {str(e)}", 500)
+
+
+@require_api_key
+async def get_sensors(device_id):
+    """
+    Get all sensors for a specific device
+
+    Args:
+        device_id: ID of the device
+
+    Returns:
+        JSON response with list of sensors, or 304 if If-None-Match is current
+    """
+    try:
+        if _paginated():
+            load = asyncio.to_thread(
+                get_service('sensor').list_sensors, device_id,
+                page=request.args.get('page', 1, type=int),
+                per_page=request.args.get('per_page', 10, type=int),
+                status_filter=request.args.get('status', None, type=str)
+            )
+        else:
+            load = read_service.get_all_sensors(device_id)
+        version, data = await asyncio.gather(read_service.get_device_version(device_id), load)
+        if not version:
+            raise ValueError("Device with this ID does not exist")
+        etag = make_etag('sensors', *version, _digest(data))
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        return with_etag(success_response(data, "Sensors retrieved successfully"), etag)
+    except ValueError as e:
+        return error_response(f"Failed to get sensors: {str(e)}", 400)
+    except Exception as e:
+        return error_response(f"Failed to get sensors: {str(e)}", 500)
+
+
+@require_api_key
+async def get_sensor_by_id(device_id, sensor_id):
+    """
+    Get sensor by ID
+
+    Args:
+        device_id: ID of the device
+        sensor_id: ID of the sensor to retrieve
+
+    Returns:
+        JSON response with sensor data, or 304 if If-None-Match is current
+    """
+    try:
+        version, data = await asyncio.gather(read_service.get_device_version(device_id),
+                                             read_service.get_sensor_by_id(device_id, sensor_id))
+        if not version:
+            raise ValueError("Device with this ID does not exist")
+        if not data:
+            return error_response("Sensor not found", 404)
+        etag = make_etag('sensor', sensor_id, *version, _digest(data))
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        return with_etag(success_response(data, "Sensor retrieved successfully"), etag)
+    except ValueError as e:
+        return error_response(f"Failed to get sensor: {str(e)}", 400)
+    except Exception as e:
+        return error_response(f"Failed to get sensor: {str(e)}", 500)
+
+
+# Endpoint name -> async view replacing the sync one
+ASYNC_VIEWS = {
+    'device.get_devices': get_devices,
+    'device.get_device_by_id': get_device_by_id,
+    'sensor.get_sensors': get_sensors,
+    'sensor.get_sensor_by_id': get_sensor_by_id,
+}
+
+
+def register_async_views(app):
+    """Serve the I/O-heavy read endpoints with the async views"""
+    for endpoint, view in ASYNC_VIEWS.items():
+        app.view_functions[endpoint] = view
@@ -5,7 +5,9 @@ Device API Routes Blueprint
 from flask import Blueprint, request, jsonify
 from app.utils.auth import require_api_key, validate_json_payload
 from app.utils.helpers import success_response, error_response
-from app.services.device_service import DeviceService
+from app.utils.etag import make_etag, is_not_modified, not_modified_response, with_etag
+from app.services.registry import get_service
+from app.storage.response_cache import response_cache
 
 # Create Device API blueprint
 device_bp = Blueprint('device', __name__, url_prefix='/api/v1')
@@ -23,7 +25,7 @@ def get_devices():
         status (str): Filter by device status (optional)
     
     Returns:
-        JSON response with list of devices
+        JSON response with list of devices, or 304 if If-None-Match is current
     """
     try:
         # Get query parameters
@@ -31,15 +33,22 @@ def get_devices():
         per_page = request.args.get('per_page', 10, type=int)
         status_filter = request.args.get('status', None, type=str)
         
-        device_service = DeviceService()
+        device_service = get_service('device')
+        
+        # Answer unchanged polls from the collection version alone
+        devices_version = device_service.get_devices_version()
+        etag = make_etag('devices', devices_version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
         
         # If no pagination parameters, return all devices
         if page == 1 and per_page == 10 and not request.args.get('page') and not request.args.get('per_page'):
-            data = device_service.get_all_devices()
+            loader = device_service.get_all_devices
         else:
-            data = device_service.list_devices(page=page, per_page=per_page, status_filter=status_filter)
+            loader = lambda: device_service.list_devices(page=page, per_page=per_page, status_filter=status_filter)
+        data = response_cache.get_or_set(response_cache.key('devices', request.args, version=devices_version), loader, tags=["devices"])
         
-        return success_response(data, "Devices retrieved successfully")
+        return with_etag(success_response(data, "Devices retrieved successfully"), etag)
     except Exception as e:
         return error_response(f"Failed to get devices: {str(e)}", 500)
 
@@ -62,7 +71,7 @@ def create_device():
     """
     try:
         data = request.get_json()
-        device_service = DeviceService()
+        device_service = get_service('device')
         result = device_service.create_device(data)
         return success_response(result, "Device created successfully", 201)
     except ValueError as ve:
@@ -81,14 +90,27 @@ def get_device_by_id(device_id):
         device_id: ID of the device to retrieve
         
     Returns:
-        JSON response with device data
+        JSON response with device data, or 304 if If-None-Match is current
     """
     try:
-        device_service = DeviceService()
-        data = device_service.get_device_by_id(device_id)
+        device_service = get_service('device')
+        
+        # Answer unchanged polls from the device version alone
+        version = device_service.get_device_version(device_id)
+        if not version:
+            return error_response("Device not found", 404)
+        etag = make_etag('device', *version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        
+        data = response_cache.get_or_set(
+            response_cache.key(f'device:{device_id}', request.args, version=version),
+            lambda: device_service.get_device_by_id(device_id),
+            tags=[f"device:{device_id}"]
+        )
         if not data:
             return error_response("Device not found", 404)
-        return success_response(data, "Device retrieved successfully")
+        return with_etag(success_response(data, "Device retrieved successfully"), etag)
     except Exception as e:
         return error_response(f"Failed to get device: {str(e)}", 500)
 
@@ -115,7 +137,7 @@ def update_device(device_id):
     """
     try:
         data = request.get_json()
-        device_service = DeviceService()
+        device_service = get_service('device')
         result = device_service.update_device(device_id, data)
         if not result:
             return error_response("Device not found", 404)
@@ -139,7 +161,7 @@ def delete_device(device_id):
         JSON response confirming deletion
     """
     try:
-        device_service = DeviceService()
+        device_service = get_service('device')
         success = device_service.delete_device(device_id)
         if not success:
             return error_response("Device not found", 404)
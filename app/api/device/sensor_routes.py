@@ -5,7 +5,10 @@ Device API Routes Blueprint
 from flask import Blueprint, request, jsonify
 from app.utils.auth import require_api_key, validate_json_payload
 from app.utils.helpers import success_response, error_response
-from app.services.sensor_service import SensorService
+from app.utils.extension import limiter
+from app.utils.rate_limit import device_rate_limit, device_rate_limit_key
+from app.utils.etag import make_etag, is_not_modified, not_modified_response, with_etag
+from app.services.registry import get_service
 
 # Create Device API blueprint
 sensor_bp = Blueprint('sensor', __name__, url_prefix='/api/v1')
@@ -22,7 +25,7 @@ def get_sensors(device_id):
         status (str): Filter by device status (optional)
     
     Returns:
-        JSON response with list of sensors
+        JSON response with list of sensors, or 304 if If-None-Match is current
     """
     try:
         # Get query parameters
@@ -30,7 +33,15 @@ def get_sensors(device_id):
         per_page = request.args.get('per_page', 10, type=int)
         status_filter = request.args.get('status', None, type=str)
 
-        sensor_service = SensorService()
+        # Sensor writes bump the device version, so it also versions the device's readings
+        version = get_service('device').get_device_version(device_id)
+        if not version:
+            raise ValueError("Device with this ID does not exist")
+        etag = make_etag('sensors', *version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        sensor_service = get_service('sensor')
 
         # If no pagination parameters, return all sensors
         if page == 1 and per_page == 10 and not request.args.get('page') and not request.args.get('per_page'):
@@ -38,7 +49,7 @@ def get_sensors(device_id):
         else:
             data = sensor_service.list_sensors(device_id, page=page, per_page=per_page, status_filter=status_filter)
 
-        return success_response(data, "Sensors retrieved successfully")
+        return with_etag(success_response(data, "Sensors retrieved successfully"), etag)
     except ValueError as e:
         return error_response(f"Failed to get sensors: {str(e)}", 400)
     except Exception as e:
@@ -46,6 +57,7 @@ def get_sensors(device_id):
 
 
 @sensor_bp.route('/device/<device_id>/sensor', methods=['POST'])
+@limiter.limit(device_rate_limit, key_func=device_rate_limit_key)
 @require_api_key
 @validate_json_payload(['value', 'unit', 'sensor_type'])
 def create_sensor(device_id):
@@ -59,12 +71,15 @@ def create_sensor(device_id):
         "sensor_type": "string"
     }
 
+    Rate limited per device (RATE_LIMIT_DEVICE_PER_MINUTE) instead of per API key,
+    so one chatty device cannot exhaust a key shared by a fleet.
+
     Returns:
         JSON response with created sensor data
     """
     try:
         data = request.get_json()
-        sensor_service = SensorService()
+        sensor_service = get_service('sensor')
         result = sensor_service.create_sensor(data, device_id)
         return success_response(result, "Sensor created successfully", 201)
     except ValueError as ve:
@@ -83,14 +98,23 @@ def get_sensor_by_id(device_id, sensor_id):
         sensor_id: ID of the sensor to retrieve
 
     Returns:
-        JSON response with sensor data
+        JSON response with sensor data, or 304 if If-None-Match is current
     """
     try:
-        sensor_service = SensorService()
+        version = get_service('device').get_device_version(device_id)
+        if not version:
+            raise ValueError("Device with this ID does not exist")
+        etag = make_etag('sensor', sensor_id, *version)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+        sensor_service = get_service('sensor')
         data = sensor_service.get_sensor_by_id(device_id, sensor_id)
         if not data:
             return error_response("Sensor not found", 404)
-        return success_response(data, "Sensor retrieved successfully")
+        return with_etag(success_response(data, "Sensor retrieved successfully"), etag)
+    except ValueError as e:
+        return error_response(f"Failed to get sensor: {str(e)}", 400)
     except Exception as e:
         return error_response(f"Failed to get sensor: {str(e)}", 500)
 
@@ -108,7 +132,7 @@ def delete_sensor(device_id, sensor_id):
         JSON response confirming deletion
     """
     try:
-        sensor_service = SensorService()
+        sensor_service = get_service('sensor')
         success = sensor_service.delete_sensor(device_id, sensor_id)
         if not success:
             return error_response("Sensor not found", 404)
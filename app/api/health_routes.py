@@ -0,0 +1,55 @@
+"""
+Health Probe Routes Blueprint
+"""
+
+from flask import Blueprint
+from app.services.health_service import health_checker
+from app.utils.helpers import error_response
+from app.utils.metrics import metrics
+
+# Create health blueprint (unversioned, used by Docker and load balancer probes)
+health_bp = Blueprint('health', __name__)
+
+
+@health_bp.route('/health')
+@health_bp.route('/health/live')
+def liveness():
+    """
+    Liveness probe: the process is up and serving requests
+
+    Returns:
+        JSON response, always 200
+    """
+    return {'status': 'healthy', 'message': 'API is running'}, 200
+
+
+@health_bp.route('/health/ready')
+def readiness():
+    """
+    Readiness probe served from the background dependency checker
+
+    Returns:
+        JSON response with per-dependency status; 200 when every dependency
+        is up, 503 otherwise
+    """
+    health_checker.ensure_started()
+    health_checker.wait_for_first_round()
+    status = health_checker.snapshot()
+    return {
+        'status': 'ready' if status['ready'] else 'unavailable',
+        'checks': status['checks']
+    }, 200 if status['ready'] else 503
+
+
+@health_bp.route('/metrics')
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint, aggregated across gunicorn workers
+
+    Returns:
+        Metrics in the Prometheus text format, or 503 when metrics are disabled
+    """
+    if not metrics.enabled:
+        return error_response("Metrics are disabled (install prometheus_client and set METRICS_ENABLED)", 503)
+    body, content_type = metrics.render()
+    return body, 200, {'Content-Type': content_type}
@@ -5,9 +5,8 @@ API Routes Blueprint
 from flask import Blueprint, request, jsonify
 from app.utils.auth import require_api_key, validate_json_payload
 from app.utils.helpers import success_response, error_response
-from app.services.example_service import ExampleService
-
-from app.utils.database import DatabaseMongo
+from app.services.registry import get_service
+from app.services.health_service import health_checker
 
 # Create API blueprint
 api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
@@ -15,18 +14,20 @@ api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
 @api_bp.route('/status', methods=['GET'])
 def api_status():
-    print("API status requested")
     """
     Get API status
     
+    Dependency status comes from the background health checker, so this
+    endpoint never waits on MongoDB or Redis.
+    
     Returns:
         JSON response with API status information
     """
-
-    DatabaseMongo.ping()  # Check MongoDB connection
+    health_checker.ensure_started()
     return success_response({
             'api_version': 'v1',
             'status': 'running',
+            'dependencies': health_checker.snapshot()['checks'],
             'endpoints': {
                 'status': 'GET /api/v1/status',
                 'example': 'GET /api/v1/example',
@@ -44,7 +45,7 @@ def get_example():
         JSON response with example data
     """
     try:
-        example_service = ExampleService()
+        example_service = get_service('example')
         data = example_service.get_example_data()
         return success_response(data, "Example data retrieved successfully")
     except Exception as e:
@@ -70,7 +71,7 @@ def create_example():
     """
     try:
         data = request.get_json()
-        example_service = ExampleService()
+        example_service = get_service('example')
         result = example_service.create_example(data)
         return success_response(result, "Example created successfully", 201)
     except Exception as e:
@@ -90,7 +91,7 @@ def get_example_by_id(example_id):
         JSON response with example data
     """
     try:
-        example_service = ExampleService()
+        example_service = get_service('example')
         data = example_service.get_example_by_id(example_id)
         if not data:
             return error_response("Example not found", 404)
@@ -121,7 +122,7 @@ def update_example(example_id):
     """
     try:
         data = request.get_json()
-        example_service = ExampleService()
+        example_service = get_service('example')
         result = example_service.update_example(example_id, data)
         if not result:
             return error_response("Example not found", 404)
@@ -143,7 +144,7 @@ def delete_example(example_id):
         JSON response confirming deletion
     """
     try:
-        example_service = ExampleService()
+        example_service = get_service('example')
         success = example_service.delete_example(example_id)
         if not success:
             return error_response("Example not found", 404)
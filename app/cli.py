@@ -0,0 +1,102 @@
+"""
+Flask CLI Commands
+"""
+
+import click
+
+
+def register_commands(app):
+    """Register CLI commands for the Flask application"""
+
+    @app.cli.command('create-indexes')
+    def create_indexes():
+        """Create the MongoDB indexes the API relies on."""
+        from app.services.api_key_service import ApiKeyService
+        from app.services.device_service import DeviceService
+
+        DeviceService.ensure_indexes()
+        ApiKeyService.ensure_indexes()
+        click.echo('Indexes created')
+
+    @app.cli.command('create-api-key')
+    @click.argument('name')
+    @click.option('--scope', 'scopes', multiple=True, help='Scope to grant (repeatable, default: read and write)')
+    @click.option('--quota', type=int, default=None, help='Requests per minute for this key')
+    def create_api_key(name, scopes, quota):
+        """Create an API key; the key is printed once and not stored."""
+        from app.services.registry import get_service
+
+        try:
+            result = get_service('api_keys').create_key(name, scopes=list(scopes) or ['read', 'write'], quota_per_minute=quota)
+        except ValueError as ve:
+            raise click.ClickException(str(ve))
+        click.echo(f"Key ID:  {result['key_id']}")
+        click.echo(f"Scopes:  {', '.join(result['scopes'])}")
+        click.echo(f"API key: {result['api_key']}")
+
+    @app.cli.command('issue-device-token')
+    @click.argument('device_id')
+    @click.option('--client-type', type=click.Choice(['iot', 'frontend']), default='iot', help='Client the token is for')
+    @click.option('--ttl', type=int, default=None, help='Lifetime in seconds (default: DEVICE_TOKEN_TTL)')
+    def issue_device_token(device_id, client_type, ttl):
+        """Issue the key and salt a device sends when it connects over Socket.IO."""
+        from app.services.registry import get_service
+
+        if not app.config.get('DEVICE_TOKEN_SECRET'):
+            raise click.ClickException("DEVICE_TOKEN_SECRET is not set")
+        if not get_service('device').get_device_by_id(device_id):
+            raise click.ClickException(f"Device {device_id} not found")
+        try:
+            result = get_service('device_tokens').issue(device_id, client_type=client_type, ttl=ttl)
+        except ValueError as ve:
+            raise click.ClickException(str(ve))
+        click.echo(f"Salt:    {result['salt']}")
+        click.echo(f"Key:     {result['key']}")
+        click.echo(f"Expires: {result['expires_at']}")
+
+    @app.cli.command('recalibrate')
+    @click.argument('device_id', required=False)
+    @click.option('--start', help='ISO timestamp, inclusive lower bound of readings to recalibrate')
+    @click.option('--end', help='ISO timestamp, exclusive upper bound of readings to recalibrate')
+    @click.option('--sensor-type', 'sensor_types', multiple=True, help='Sensor type to recalibrate (repeatable)')
+    @click.option('--chunk-size', type=int, default=None, help='Readings per chunk')
+    @click.option('--max-rate', type=int, default=None, help='Maximum readings per second (0 = unthrottled)')
+    @click.option('--resume', 'job_id', help='Resume an existing job from its checkpoint')
+    def recalibrate(device_id, start, end, sensor_types, chunk_size, max_rate, job_id):
+        """Re-apply a device's current calibration to historical raw values."""
+        from app.services.recalibration_service import RecalibrationService
+        from app.services.registry import get_service
+
+        try:
+            recalibration_service = RecalibrationService(
+                calibration_service=get_service('calibration'),
+                chunk_size=chunk_size,
+                max_docs_per_second=max_rate
+            )
+        except ValueError as ve:
+            raise click.ClickException(str(ve))
+
+        if job_id:
+            job = recalibration_service.get_job(job_id)
+            if not job:
+                raise click.ClickException(f"Recalibration job {job_id} not found")
+        elif device_id:
+            try:
+                job = recalibration_service.create_job(device_id, start=start, end=end, sensor_types=list(sensor_types))
+            except ValueError as ve:
+                raise click.ClickException(str(ve))
+        else:
+            raise click.UsageError('Either DEVICE_ID or --resume JOB_ID is required')
+
+        click.echo(f"Recalibration job {job['job_id']} for device {job['device_id']}")
+
+        def report(progress):
+            click.echo(
+                f"  processed={progress['processed']} updated={progress['updated']} "
+                f"skipped={progress['skipped']} rate={progress['docs_per_second']} docs/s"
+            )
+
+        result = recalibration_service.run_job(job['job_id'], progress_callback=report, force=bool(job_id))
+        click.echo(f"Job {result['job_id']} {result['status']}: {result['processed']} processed, {result['updated']} updated")
+        if result['status'] == 'failed':
+            raise click.ClickException(result.get('error') or 'Recalibration failed')
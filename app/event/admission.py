@@ -0,0 +1,125 @@
+"""
+Admission control for Socket.IO connects
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class ConnectAdmission:
+    """
+    Token bucket in front of handle_connect
+
+    Connects are admitted while tokens last; the bucket refills at ``rate``
+    per second up to ``burst``. A refused client gets a ``retry_after`` hint
+    based on how many clients are already waiting, randomized by +/-50% so
+    a reconnect storm spreads out instead of returning in lockstep.
+    Refused clients never reach the presence reads and writes in Redis.
+    """
+
+    def __init__(self, rate=20.0, burst=40, max_retry_after=30.0, clock=time.monotonic, rng=None):
+        """
+        Initialize the bucket
+
+        Args:
+            rate: Connects admitted per second once the burst is used up
+            burst: Connects admitted back to back
+            max_retry_after: Longest retry hint in seconds
+            clock: Monotonic clock in seconds
+            rng: random.Random used for the jitter
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_retry_after = max_retry_after
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._tokens = float(burst)
+        self._waiting = 0.0  # estimated refused clients that will come back
+        self._updated = clock()
+        self._admitted = 0
+        self._refused = 0
+        self._in_flight = 0
+        self._durations = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the bucket from the Flask application config"""
+        self.rate = app.config.get('SOCKET_CONNECT_RATE', self.rate)
+        self.burst = app.config.get('SOCKET_CONNECT_BURST', self.burst)
+        self.max_retry_after = app.config.get('SOCKET_CONNECT_MAX_RETRY_AFTER', self.max_retry_after)
+        with self._lock:
+            self._tokens = float(self.burst)
+
+    def admit(self):
+        """
+        Take a token for a connect
+
+        Returns:
+            Tuple of (admitted, retry_after seconds; 0 when admitted)
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._admitted += 1
+                return True, 0.0
+            self._refused += 1
+            self._waiting = min(self._waiting + 1, self.rate * self.max_retry_after)
+            wait = (self._waiting - self._tokens) / self.rate  # until this client's turn
+        retry_after = wait * self.rng.uniform(0.5, 1.5)
+        return False, round(min(self.max_retry_after, max(1.0, retry_after)), 1)
+
+    @contextmanager
+    def track(self):
+        """Measure an admitted connect while it is handled"""
+        with self._lock:
+            self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._in_flight -= 1
+                self._durations.append(elapsed)
+
+    def stats(self):
+        """
+        Get admission counters
+
+        Returns:
+            Dictionary with admitted and refused connects, tokens left,
+            estimated waiting clients, connects being handled and handling
+            time percentiles over the last 1000 connects
+        """
+        with self._lock:
+            self._refill()
+            durations = sorted(self._durations)
+            stats = {
+                'admitted': self._admitted,
+                'refused': self._refused,
+                'tokens': round(self._tokens, 2),
+                'waiting': round(self._waiting, 1),
+                'in_flight': self._in_flight
+            }
+        if durations:
+            stats['handle_ms'] = {
+                'p50': round(durations[len(durations) // 2], 2),
+                'p95': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 2),
+                'max': round(durations[-1], 2)
+            }
+        return stats
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._waiting = max(0.0, self._waiting - elapsed * self.rate)
+
+
+# Shared instance, configured by create_app through init_app
+connect_admission = ConnectAdmission()
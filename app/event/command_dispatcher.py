@@ -0,0 +1,296 @@
+"""
+Frontend -> IoT command downlink with acknowledgements, retries and latency tracking
+"""
+
+import bisect
+import logging
+import os
+import secrets
+import threading
+import time
+
+from app.utils.extension import socketio
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the command round-trip histogram buckets; the last one is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def parse_command(data):
+    """
+    Validate a command sent by a frontend
+
+    Args:
+        data: Dictionary with 'action' (e.g. 'dispense', 'stop'), and optionally
+            'tool' (a Tool type such as 'pump' or 'valve') and 'params'
+
+    Returns:
+        Dictionary with action, tool and params
+
+    Raises:
+        ValueError: If the command is malformed
+    """
+    if not isinstance(data, dict):
+        raise ValueError("command must be an object")
+    action = data.get('action')
+    if not isinstance(action, str) or not action:
+        raise ValueError("action is required")
+    tool = data.get('tool')
+    if tool is not None and not isinstance(tool, str):
+        raise ValueError("tool must be a string")
+    params = data.get('params', {})
+    if not isinstance(params, dict):
+        raise ValueError("params must be an object")
+    return {'action': action, 'tool': tool, 'params': params}
+
+
+class _Pending:
+    """A command sent to a device and not acknowledged yet"""
+
+    __slots__ = ('message', 'device_id', 'iot_sid', 'origin_sid', 'attempts', 'first_sent', 'last_sent')
+
+    def __init__(self, message, device_id, iot_sid, origin_sid, now):
+        self.message = message
+        self.device_id = device_id
+        self.iot_sid = iot_sid
+        self.origin_sid = origin_sid
+        self.attempts = 1
+        self.first_sent = now
+        self.last_sent = now
+
+
+class CommandDispatcher:
+    """
+    Routes frontend commands to the IoT client of their device
+
+    Each command gets a server-assigned ``id`` and is emitted straight to
+    the device's IoT sid. The device answers with a ``command_ack`` event
+    carrying the id, and the ack is forwarded to the frontend that sent
+    the command with its round-trip latency. A command that is not acked
+    within ``ack_timeout`` seconds is sent again with the same id (devices
+    must ignore ids they already executed), up to ``max_retries`` times,
+    after which the frontend is told it timed out.
+
+    IoT sids are indexed in memory when devices connect, so routing a
+    command needs no Redis read. Commands only reach devices connected to
+    this worker: there is no Socket.IO message queue to carry them, or the
+    device's ack, across workers.
+    """
+
+    def __init__(self, ack_timeout=1.0, max_retries=2, emit=None, clock=time.monotonic, tick=0.05):
+        """
+        Initialize the dispatcher
+
+        Args:
+            ack_timeout: Seconds to wait for an ack before resending
+            max_retries: Resends before a command times out
+            emit: Callable taking (event, message, to); defaults to a Socket.IO emit
+            clock: Monotonic clock in seconds
+            tick: Seconds between checks for overdue acks
+        """
+        self.ack_timeout = ack_timeout
+        self.max_retries = max_retries
+        self.emit = emit or self._emit
+        self.clock = clock
+        self.tick = tick
+        self._devices = {}  # device_id -> IoT sid
+        self._pending = {}  # command id -> _Pending
+        self._buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._latency_sum_ms = 0.0
+        self._counts = {'sent': 0, 'acked': 0, 'retried': 0, 'timed_out': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._task = None
+        self._pid = None
+
+    def init_app(self, app):
+        """Configure the dispatcher from the Flask application config"""
+        self.ack_timeout = app.config.get('COMMAND_ACK_TIMEOUT', self.ack_timeout)
+        self.max_retries = app.config.get('COMMAND_MAX_RETRIES', self.max_retries)
+
+    def register_device(self, device_id, iot_sid):
+        """Index the IoT sid of a device that connected to this worker"""
+        with self._lock:
+            self._devices[device_id] = iot_sid
+
+    def iot_sid(self, device_id):
+        """
+        Get the IoT sid of a device connected to this worker
+
+        Returns:
+            str: Session ID, or None if the device is not connected here
+        """
+        return self._devices.get(device_id)
+
+    def device_count(self):
+        """Number of IoT clients connected to this worker"""
+        return len(self._devices)
+
+    def unregister_device(self, device_id, iot_sid):
+        """
+        Forget a disconnected IoT client and fail its pending commands
+
+        Args:
+            device_id: ID of the device
+            iot_sid: Session ID of the IoT client that disconnected
+
+        Returns:
+            int: Number of commands failed
+        """
+        with self._lock:
+            if self._devices.get(device_id) == iot_sid:
+                del self._devices[device_id]
+            failed = [(command_id, pending) for command_id, pending in self._pending.items()
+                      if pending.iot_sid == iot_sid]
+            for command_id, _ in failed:
+                del self._pending[command_id]
+            self._counts['failed'] += len(failed)
+        for command_id, pending in failed:
+            self._notify(pending, 'disconnected')
+        return len(failed)
+
+    def send(self, device_id, iot_sid, origin_sid, command):
+        """
+        Send a command to a device
+
+        Args:
+            device_id: ID of the device
+            iot_sid: Session ID of the device's IoT client
+            origin_sid: Session ID of the frontend sending the command
+            command: Command as returned by parse_command
+
+        Returns:
+            str: Server-assigned command ID
+        """
+        self.ensure_started()
+        command_id = secrets.token_hex(8)
+        message = {'id': command_id, **command}
+        with self._lock:
+            self._pending[command_id] = _Pending(message, device_id, iot_sid, origin_sid, self.clock())
+            self._counts['sent'] += 1
+        self.emit('command', message, iot_sid)
+        return command_id
+
+    def ack(self, iot_sid, command_id, status='ok', result=None):
+        """
+        Handle a device's acknowledgement and forward it to the frontend
+
+        Args:
+            iot_sid: Session ID of the acknowledging IoT client
+            command_id: ID of the acknowledged command
+            status: Outcome reported by the device
+            result: Optional details reported by the device
+
+        Returns:
+            float: Round-trip latency in ms, or None if the command is not pending
+            (unknown, already acked or timed out, or sent to another device)
+        """
+        with self._lock:
+            pending = self._pending.get(command_id)
+            if pending is None or pending.iot_sid != iot_sid:
+                return None
+            del self._pending[command_id]
+            latency_ms = (self.clock() - pending.first_sent) * 1000
+            self._buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+            self._latency_sum_ms += latency_ms
+            self._counts['acked'] += 1
+        self._notify(pending, status, latency_ms=round(latency_ms, 2), result=result)
+        return latency_ms
+
+    def check_timeouts(self):
+        """
+        Resend commands whose ack is overdue and time out those out of retries
+
+        Returns:
+            int: Number of commands resent
+        """
+        now = self.clock()
+        resend = []
+        timed_out = []
+        with self._lock:
+            for command_id, pending in list(self._pending.items()):
+                if now - pending.last_sent < self.ack_timeout:
+                    continue
+                if pending.attempts > self.max_retries:
+                    del self._pending[command_id]
+                    timed_out.append(pending)
+                    continue
+                pending.attempts += 1
+                pending.last_sent = now
+                resend.append(pending)
+            self._counts['retried'] += len(resend)
+            self._counts['timed_out'] += len(timed_out)
+        for pending in resend:
+            self.emit('command', pending.message, pending.iot_sid)
+        for pending in timed_out:
+            logger.warning(f"Command {pending.message['id']} to {pending.device_id} timed out "
+                           f"after {pending.attempts} attempts")
+            self._notify(pending, 'timeout')
+        return len(resend)
+
+    def stats(self):
+        """
+        Get command counters and the round-trip latency histogram
+
+        Returns:
+            Dictionary with sent/acked/retried/timed_out/failed counts, commands
+            in flight, the histogram as cumulative counts per upper bound in ms
+            (Prometheus style, '+Inf' last), and the latency sum in ms
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            buckets = list(self._buckets)
+            latency_sum = self._latency_sum_ms
+            in_flight = len(self._pending)
+        cumulative = {}
+        total = 0
+        for bound, count in zip([*map(str, LATENCY_BUCKETS_MS), '+Inf'], buckets):
+            total += count
+            cumulative[bound] = total
+        return {
+            **counts,
+            'in_flight': in_flight,
+            'latency_ms': {'buckets': cumulative, 'sum': round(latency_sum, 2), 'count': total}
+        }
+
+    def ensure_started(self):
+        """Start the background timeout task in this process if it is not running"""
+        if self._task is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._task is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._task = socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            try:
+                self.check_timeouts()
+            except Exception as e:
+                logger.warning(f"Checking command timeouts failed: {str(e)}")
+            socketio.sleep(self.tick)
+
+    def _notify(self, pending, status, latency_ms=None, result=None):
+        ack = {
+            'id': pending.message['id'],
+            'device_id': pending.device_id,
+            'status': status,
+            'attempts': pending.attempts
+        }
+        if latency_ms is not None:
+            ack['latency_ms'] = latency_ms
+        if result is not None:
+            ack['result'] = result
+        try:
+            self.emit('command_ack', ack, pending.origin_sid)
+        except Exception as e:
+            logger.warning(f"Could not forward ack of command {ack['id']}: {str(e)}")
+
+    @staticmethod
+    def _emit(event, message, to):
+        socketio.emit(event, message, to=to)
+
+
+# Shared instance, configured by create_app through init_app
+command_dispatcher = CommandDispatcher()
@@ -0,0 +1,182 @@
+"""
+Worker-local cache of each device's latest state, replayed to frontends on join
+"""
+
+import threading
+import time
+
+
+class _DeviceState:
+    """Latest payload, anomaly scores and connection status of one device"""
+
+    __slots__ = ('payload', 'anomaly_scores', 'online', 'updated_at', 'calibrated', 'calibration_params',
+                 'calibration_params_loaded')
+
+    def __init__(self):
+        self.payload = None
+        self.anomaly_scores = {}
+        self.online = False
+        self.updated_at = None
+        self.calibrated = None  # memoized for the current payload and calibration_params
+        self.calibration_params = None  # the device's overrides, as applied by create_sensor
+        self.calibration_params_loaded = False
+
+
+class DeviceStateCache:
+    """
+    Latest state of the devices connected to this worker
+
+    handle_iot_data updates it next to save_payload, so a frontend that
+    joins gets the device's current readings, calibrated values and
+    connection status at once, from memory, without a Redis or MongoDB
+    read. A device seen only through Redis (e.g. connected to another
+    worker) is seeded from the room members the connect handler already
+    loaded. Calibrated values use the device's own calibration_params, so
+    they match what create_sensor stores; they are computed on the first
+    join after the payload or the parameters change and reused until then.
+    """
+
+    def __init__(self, clock=time.time):
+        """
+        Initialize the cache
+
+        Args:
+            clock: Wall clock in seconds, used for updated_at
+        """
+        self.clock = clock
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def update(self, device_id, payload, anomaly_scores=None):
+        """
+        Record a payload the device just sent
+
+        Args:
+            device_id: ID of the device
+            payload: Payload as saved by save_payload
+            anomaly_scores: Anomaly scores of the payload's readings
+        """
+        with self._lock:
+            state = self._devices.get(device_id)
+            if state is None:
+                state = self._devices[device_id] = _DeviceState()
+            state.payload = payload
+            state.anomaly_scores = anomaly_scores or {}
+            state.online = True
+            state.updated_at = self.clock()
+            state.calibrated = None
+
+    def seed(self, device_id, payload, online=True):
+        """
+        Fill in a device this worker has not seen a payload from yet
+
+        Args:
+            device_id: ID of the device
+            payload: Last payload stored in Redis, or None
+            online: Whether the device's IoT client is connected
+        """
+        with self._lock:
+            state = self._devices.get(device_id)
+            if state is None:
+                state = self._devices[device_id] = _DeviceState()
+            state.online = online
+            if state.payload is None and payload is not None:
+                state.payload = payload
+
+    def needs_calibration_params(self, device_id):
+        """
+        Check whether a device's calibration_params still have to be loaded
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            bool: True if the device is tracked and its overrides are unknown
+        """
+        state = self._devices.get(device_id)
+        return state is not None and not state.calibration_params_loaded
+
+    def set_calibration_params(self, device_id, calibration_params, create=True):
+        """
+        Record a device's calibration parameter overrides
+
+        Args:
+            device_id: ID of the device
+            calibration_params: The device's calibration_params, or None
+            create: Track the device if it is not tracked yet; update_device
+                passes False so devices this worker does not serve are not added
+        """
+        with self._lock:
+            state = self._devices.get(device_id)
+            if state is None:
+                if not create:
+                    return
+                state = self._devices[device_id] = _DeviceState()
+            state.calibration_params = calibration_params
+            state.calibration_params_loaded = True
+            state.calibrated = None
+
+    def remove(self, device_id):
+        """Forget a device whose IoT client disconnected"""
+        with self._lock:
+            self._devices.pop(device_id, None)
+
+    def payload(self, device_id):
+        """
+        Get a device's latest payload
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            Latest payload, or None if unknown
+        """
+        state = self._devices.get(device_id)
+        return state.payload if state is not None else None
+
+    def snapshot(self, device_id, calibration=None):
+        """
+        Build the state message sent to a joining frontend
+
+        Args:
+            device_id: ID of the device
+            calibration: CalibrationService the device's overrides are applied to,
+                or None to leave out calibrated values
+
+        Returns:
+            Dictionary with device_id, payload, anomaly_scores, calibrated,
+            online and updated_at, or None if the device is unknown
+        """
+        with self._lock:
+            state = self._devices.get(device_id)
+            if state is None:
+                return None
+            payload = state.payload
+            if calibration is not None and state.calibrated is None and isinstance(payload, dict):
+                calibrate = calibration.with_overrides(state.calibration_params).calibrate_sensor_value
+                state.calibrated = _calibrate(payload, calibrate)
+            return {
+                'device_id': device_id,
+                'payload': payload,
+                'anomaly_scores': dict(state.anomaly_scores),
+                'calibrated': dict(state.calibrated or {}),
+                'online': state.online,
+                'updated_at': state.updated_at
+            }
+
+
+def _calibrate(payload, calibrate):
+    calibrated = {}
+    for sensor_type, raw_value in payload.items():
+        if isinstance(raw_value, bool) or not isinstance(raw_value, (int, float)):
+            continue
+        try:
+            result = calibrate(sensor_type, raw_value)
+        except ValueError:
+            continue  # not a calibrated sensor type
+        calibrated[sensor_type] = {key: result.get(key) for key in ('value', 'unit', 'status')}
+    return calibrated
+
+
+# Shared instance of this worker
+device_state = DeviceStateCache()
@@ -0,0 +1,215 @@
+"""
+Bounded per-frontend send queues with backpressure
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from app.utils.extension import socketio
+
+logger = logging.getLogger(__name__)
+
+
+def transport_backlog(sid, namespace='/'):
+    """
+    Count packets Engine.IO has queued for a client but not yet written
+
+    Args:
+        sid: Socket.IO session ID
+        namespace: Socket.IO namespace
+
+    Returns:
+        int: Queued packets (0 if the client is unknown)
+    """
+    server = socketio.server
+    if server is None:
+        return 0
+    eio_sid = server.manager.eio_sid_from_sid(sid, namespace)
+    socket = server.eio.sockets.get(eio_sid) if eio_sid else None
+    return socket.queue.qsize() if socket is not None else 0
+
+
+class _Backlog:
+    """Telemetry held back for one slow frontend"""
+
+    __slots__ = ('messages', 'dropped', 'slow_since')
+
+    def __init__(self, size, since):
+        self.messages = deque(maxlen=size)
+        self.dropped = 0
+        self.slow_since = since
+
+
+class SendQueues:
+    """
+    Backpressure for iot_update fan-out
+
+    Room messages are encoded once and written to every frontend whose
+    transport keeps up. A frontend whose Engine.IO queue holds
+    ``max_backlog`` packets or more is skipped, and its messages go to a
+    small queue of its own that drops the oldest message when full, so a
+    stalled browser holds at most ``queue_size`` messages in the worker.
+    A background task hands queued messages over as the transport drains
+    and disconnects frontends that stay slow for ``slow_timeout`` seconds.
+    Dropped delta messages show up as a sequence gap and the frontend
+    resyncs.
+    """
+
+    def __init__(self, queue_size=50, max_backlog=20, slow_timeout=30.0, emit=None, backlog=None,
+                 disconnect=None, clock=time.monotonic, tick=0.1):
+        """
+        Initialize the queues
+
+        Args:
+            queue_size: Messages held per slow frontend before the oldest is dropped
+            max_backlog: Engine.IO packets queued for a frontend before it counts as slow
+            slow_timeout: Seconds a frontend may stay slow before it is disconnected
+            emit: Callable taking (to, message, skip_sid); defaults to a Socket.IO emit of iot_update
+            backlog: Callable returning a frontend's Engine.IO queue length (defaults to transport_backlog)
+            disconnect: Callable disconnecting a frontend by sid
+            clock: Monotonic clock in seconds
+            tick: Seconds between drains of the queues
+        """
+        self.queue_size = queue_size
+        self.max_backlog = max_backlog
+        self.slow_timeout = slow_timeout
+        self.emit = emit or self._emit
+        self.backlog = backlog or transport_backlog
+        self.disconnect = disconnect or self._disconnect
+        self.clock = clock
+        self.tick = tick
+        self._queues = {}  # sid -> _Backlog, only for frontends that are behind
+        self._evicted = 0
+        self._lock = threading.Lock()
+        self._task = None
+        self._pid = None
+
+    def init_app(self, app):
+        """Configure the queues from the Flask application config"""
+        self.queue_size = app.config.get('IOT_SEND_QUEUE_SIZE', self.queue_size)
+        self.max_backlog = app.config.get('IOT_SEND_MAX_BACKLOG', self.max_backlog)
+        self.slow_timeout = app.config.get('IOT_SLOW_CONSUMER_TIMEOUT', self.slow_timeout)
+
+    def send(self, room, sids, message):
+        """
+        Send a message to a room, holding it back for frontends that are behind
+
+        Args:
+            room: Socket.IO room
+            sids: Session IDs of the frontends in the room
+            message: iot_update message
+
+        Returns:
+            int: Number of frontends the message was queued for instead of sent to
+        """
+        now = self.clock()
+        held = []
+        with self._lock:
+            for sid in sids:
+                queue = self._queues.get(sid)
+                # Keep order: once a frontend is behind, everything goes through its queue
+                if queue is None and self.backlog(sid) < self.max_backlog:
+                    continue
+                if queue is None:
+                    queue = self._queues[sid] = _Backlog(self.queue_size, now)
+                if len(queue.messages) == queue.messages.maxlen:
+                    queue.dropped += 1
+                queue.messages.append(message)
+                held.append(sid)
+        if len(held) < len(sids):
+            self.emit(room, message, held)
+        return len(held)
+
+    def drain(self):
+        """
+        Hand queued messages to transports that have room and evict stalled frontends
+
+        Returns:
+            int: Number of messages sent
+        """
+        now = self.clock()
+        sent = []
+        evict = []
+        with self._lock:
+            for sid, queue in list(self._queues.items()):
+                room = self.max_backlog - self.backlog(sid)
+                while room > 0 and queue.messages:
+                    sent.append((sid, queue.messages.popleft()))
+                    room -= 1
+                if not queue.messages and room > 0:
+                    del self._queues[sid]  # caught up
+                elif now - queue.slow_since >= self.slow_timeout:
+                    del self._queues[sid]
+                    evict.append(sid)
+        for sid, message in sent:
+            self.emit(sid, message, None)
+        for sid in evict:
+            self._evicted += 1
+            logger.warning(f"Disconnecting slow frontend {sid}")
+            try:
+                self.disconnect(sid)
+            except Exception as e:
+                logger.warning(f"Could not disconnect slow frontend {sid}: {str(e)}")
+        return len(sent)
+
+    def remove(self, sid):
+        """Forget a frontend's queue"""
+        with self._lock:
+            self._queues.pop(sid, None)
+
+    def lag(self):
+        """
+        Get the frontends that are behind
+
+        Returns:
+            Dictionary with per-sid queued messages, transport backlog, drops
+            and seconds behind, plus the number of evicted frontends
+        """
+        now = self.clock()
+        with self._lock:
+            queues = list(self._queues.items())
+        return {
+            'slow_consumers': {
+                sid: {
+                    'queued': len(queue.messages),
+                    'backlog': self.backlog(sid),
+                    'dropped': queue.dropped,
+                    'lag_seconds': round(now - queue.slow_since, 3)
+                }
+                for sid, queue in queues
+            },
+            'evicted': self._evicted
+        }
+
+    def ensure_started(self):
+        """Start the background drain task in this process if it is not running"""
+        if self._task is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._task is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._task = socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            try:
+                self.drain()
+            except Exception as e:
+                logger.warning(f"Draining send queues failed: {str(e)}")
+            socketio.sleep(self.tick)
+
+    @staticmethod
+    def _emit(to, message, skip_sid):
+        socketio.emit("iot_update", message, to=to, skip_sid=skip_sid)
+
+    @staticmethod
+    def _disconnect(sid):
+        socketio.server.disconnect(sid, namespace='/')
+
+
+# Shared instance, configured by create_app through init_app
+send_queues = SendQueues()
@@ -1,37 +1,72 @@
-from flask import request
-from flask_socketio import join_room, leave_room, disconnect
+from flask import request, current_app
+from flask_socketio import join_room, leave_room, disconnect, ConnectionRefusedError
 from app.utils.extension import socketio
 from app.storage.redis_storage import (
     save_device, remove_device, get_room_members,
     find_device_by_sid, save_payload
 )
+from app.services.anomaly_service import anomaly_service
+from app.utils.telemetry_codec import decode_payload
+from app.event.update_coalescer import update_coalescer
+from app.event.send_queue import send_queues
+from app.event.admission import connect_admission
+from app.event.device_state import device_state
+from app.event.command_dispatcher import command_dispatcher, parse_command
+from app.services.registry import get_service
+from app.utils.metrics import metrics
+from app.utils.db_instrumentation import db_instrumentation
 
 from flask import request
 
 # =============== AUTH HELPER =================
 
-def login(device_id, client_type):
+def login(device_id, client_type, key=None, salt=None):
     """
-    Validasi device_id dan tipe client.
+    Validasi device_id, tipe client, dan token perangkat (key + salt).
+
+    Token diverifikasi dengan HMAC tanpa query ke MongoDB; lihat DeviceTokenService.
     """
     if not device_id or client_type not in ("iot", "frontend"):
         print(f"WARN: Unauthorized connection attempt: {request.sid}")  # type: ignore
         return False
-    
-    # TODO: validasi device_id dari MongoDB
-    
+
+    if not current_app.config.get("DEVICE_AUTH_REQUIRED", True):
+        return True
+
+    reason = get_service("device_tokens").verify(device_id, client_type, salt, key)
+    if reason:
+        print(f"WARN: Rejected token for {device_id} ({reason}): {request.sid}")  # type: ignore
+        return False
+
     return True
 
 ####################################################
 
 @socketio.on("connect")
+@metrics.timed_event("connect")
+@db_instrumentation.tracked("connect")
 def handle_connect(auth):
     device_id = auth.get("device_id") if auth else None
     client_type = auth.get("client_type") if auth else None
 
-    if not login(device_id, client_type):
+    key = auth.get("key") if auth else None
+    salt = auth.get("salt") if auth else None
+
+    # Token checks need no Redis, so they run first: unauthenticated clients
+    # cannot use up the admission budget of real devices
+    if not login(device_id, client_type, key, salt):
         return False
 
+    # Shed reconnect storms before touching Redis; clients retry after the hinted delay
+    admitted, retry_after = connect_admission.admit()
+    if not admitted:
+        raise ConnectionRefusedError({"message": "Server busy, retry later", "retry_after": retry_after})
+
+    with connect_admission.track():
+        return _connect(auth, device_id, client_type)
+
+
+def _connect(auth, device_id, client_type):
     members = get_room_members(device_id)
 
     if client_type == "iot":
@@ -50,24 +85,60 @@ def handle_connect(auth):
 
     save_device(device_id, request.sid, client_type)
     join_room(device_id)
+    # members was loaded above and holds the last payload; no extra Redis read
+    device_state.seed(device_id, members.get("last_payload"),
+                      online=client_type == "iot" or any(ctype == "iot" for ctype in members.values()))
+    if device_state.needs_calibration_params(device_id):
+        # Once per device on this worker, so replayed values match what create_sensor stores
+        device_state.set_calibration_params(device_id, get_service("device").get_calibration_params(device_id))
+
+    if client_type == "iot":
+        command_dispatcher.register_device(device_id, request.sid)
+        command_dispatcher.ensure_started()
+
+    if client_type == "frontend":
+        # iot_update goes to a room per update rate (Hz), sensor subscription and delta mode
+        delta = bool(auth.get("delta"))
+        try:
+            room = update_coalescer.add(device_id, request.sid, auth.get("update_rate"), auth.get("sensors"), delta)
+        except ValueError as e:
+            socketio.emit("message", {"status": "error", "msg": str(e)}, to=request.sid)
+            room = update_coalescer.add(device_id, request.sid, auth.get("update_rate"), delta=delta)
+        join_room(room)
+        update_coalescer.ensure_started()
+        send_queues.ensure_started()
+        if delta:
+            _send_snapshot()
 
     socketio.emit("message", {
         "msg": f"{client_type.capitalize()} for {device_id} authenticated"
     }, to=request.sid)
 
+    if client_type == "frontend":
+        _send_state(device_id)
+    _record_presence()
+
 
 @socketio.on("disconnect")
+@metrics.timed_event("disconnect")
+@db_instrumentation.tracked("disconnect")
 def handle_disconnect():
     sid = request.sid
+    # Forget worker-local state even if the presence record is already gone
+    update_coalescer.remove(sid)
+    send_queues.remove(sid)
     device_id, client_type = find_device_by_sid(sid)
 
     if not device_id:
+        _record_presence()
         return
 
     if client_type == "iot":
         members = get_room_members(device_id)
         for member_sid in list(members.keys()):
             disconnect(member_sid)
+        device_state.remove(device_id)
+        command_dispatcher.unregister_device(device_id, sid)
         from app.storage.redis_storage import _load_all, _save_all
         devices = _load_all()
         if device_id in devices:
@@ -76,12 +147,31 @@ def handle_disconnect():
     else:
         remove_device(device_id, sid)
         leave_room(device_id)
+    _record_presence()
+
+
+def _record_presence():
+    """Update the socket and room gauges from this worker's in-memory state"""
+    metrics.set_sockets({"iot": command_dispatcher.device_count(), "frontend": update_coalescer.member_count()})
+    metrics.set_rooms(update_coalescer.room_counts())
 
 
 @socketio.on("iot_data")
+@metrics.timed_event("iot_data")
+@db_instrumentation.tracked("iot_data")
 def handle_iot_data(data):
+    # Binary firmware sends the frame on its own (device taken from the sid)
+    # or as the payload of the JSON envelope; older firmware sends JSON
+    if isinstance(data, (bytes, bytearray)):
+        data = {"device_id": find_device_by_sid(request.sid)[0], "payload": data}
     device_id = data.get("device_id")
     payload = data.get("payload")
+    if isinstance(payload, (bytes, bytearray)):
+        try:
+            payload = decode_payload(payload)
+        except ValueError as e:
+            print(f"WARN: Invalid telemetry frame from {request.sid}: {e}")
+            return
     members = get_room_members(device_id)
     if not device_id or not members:
         return
@@ -91,9 +181,123 @@ def handle_iot_data(data):
         return
 
     # TODO: validasi payload sesuai dari model database
+
+    # Score readings against rolling statistics; anomalous ones may be dropped
+    anomaly_scores = {}
+    if isinstance(payload, dict):
+        payload, anomaly_scores = anomaly_service.filter_readings(device_id, payload)
+        if not payload:
+            return
     
     if save_payload(device_id, payload, request.sid):
-        socketio.emit("iot_update", {"device_id": device_id, "payload": payload}, to=device_id)
+        device_state.update(device_id, payload, anomaly_scores)
+        # Latest payload wins; each frontend room gets at most its update rate
+        update_coalescer.publish(device_id, {
+            "device_id": device_id,
+            "payload": payload,
+            "anomaly_scores": anomaly_scores
+        })
+
+
+def _send_snapshot():
+    """Send the calling frontend the full state of its delta room"""
+    member = update_coalescer.member(request.sid)
+    if member is None or not member[3]:
+        return None
+    snapshot = update_coalescer.snapshot(request.sid, seed=device_state.payload(member[0]))
+    if snapshot is not None:
+        socketio.emit("iot_update", snapshot, to=request.sid)
+    return snapshot
+
+
+def _send_state(device_id):
+    """Send the calling frontend the device's latest readings, calibrated values and status from memory"""
+    state = device_state.snapshot(device_id, calibration=get_service("calibration"))
+    if state is None:
+        return None
+    selected = update_coalescer.select(request.sid, state)
+    if selected is None:
+        selected = {**state, "payload": {}, "anomaly_scores": {}}
+    if isinstance(selected["payload"], dict):
+        selected["calibrated"] = {k: v for k, v in state["calibrated"].items() if k in selected["payload"]}
+    socketio.emit("device_state", selected, to=request.sid)
+    return selected
+
+
+def _resubscribe(**changes):
+    """Move the calling frontend to the update room matching its new settings"""
+    previous_room, room = update_coalescer.resubscribe(request.sid, **changes)
+    if room is None:
+        return {"status": "error", "msg": "Only frontends receive iot_update"}
+    if previous_room != room:
+        leave_room(previous_room)
+        join_room(room)
+        _send_snapshot()
+    return {"status": "ok", "room": room}
+
+
+@socketio.on("set_update_rate")
+def handle_set_update_rate(data):
+    rate = data.get("update_rate") if isinstance(data, dict) else data
+    return _resubscribe(rate=rate)
+
+
+@socketio.on("subscribe")
+def handle_subscribe(data):
+    """Receive only some sensor types, e.g. {"sensors": ["ph", "tds"]} or "flow_*" ('*' for all), and/or {"delta": true}"""
+    changes = {}
+    if isinstance(data, dict):
+        if "sensors" in data:
+            changes["sensors"] = data["sensors"]
+        if "delta" in data:
+            changes["delta"] = bool(data["delta"])
+    else:
+        changes["sensors"] = data
+    try:
+        return _resubscribe(**changes)
+    except ValueError as e:
+        return {"status": "error", "msg": str(e)}
+
+
+@socketio.on("resync")
+def handle_resync(data=None):
+    """Full snapshot for a delta frontend that saw a gap in the iot_update sequence"""
+    if _send_snapshot() is None:
+        return {"status": "error", "msg": "Not subscribed in delta mode"}
+    return {"status": "ok"}
+
+
+@socketio.on("command")
+@db_instrumentation.tracked("command")
+def handle_command(data):
+    """Frontend -> IoT command, e.g. {"tool": "pump", "action": "dispense", "params": {"ml": 250}}; acked with command_ack"""
+    member = update_coalescer.member(request.sid)
+    if member is None:
+        return {"status": "error", "msg": "Only frontends can send commands"}
+    device_id = member[0]
+    try:
+        command = parse_command(data)
+    except ValueError as e:
+        return {"status": "error", "msg": str(e)}
+
+    iot_sid = command_dispatcher.iot_sid(device_id)
+    if iot_sid is None:
+        # Without a Socket.IO message queue this worker can neither reach an IoT client
+        # connected to another worker nor receive its command_ack, so refuse instead
+        if any(ctype == "iot" for ctype in get_room_members(device_id).values()):
+            return {"status": "error", "msg": "Device is connected to another worker"}
+        return {"status": "error", "msg": "Device is offline"}
+
+    command_id = command_dispatcher.send(device_id, iot_sid, request.sid, command)
+    return {"status": "ok", "id": command_id}
+
+
+@socketio.on("command_ack")
+def handle_command_ack(data):
+    """IoT acknowledgement of a command: {"id": "...", "status": "ok" | "error", "result": {...}}"""
+    if not isinstance(data, dict) or not isinstance(data.get("id"), str):
+        return
+    command_dispatcher.ack(request.sid, data["id"], status=str(data.get("status", "ok")), result=data.get("result"))
 
 
 @socketio.on("message")
@@ -0,0 +1,472 @@
+"""
+Rate-capped, subscription-filtered fan-out of iot_update messages to frontends
+"""
+
+import fnmatch
+import logging
+import os
+import threading
+import time
+
+from app.utils.extension import socketio
+from app.event.send_queue import send_queues
+
+logger = logging.getLogger(__name__)
+
+# Lowest update rate a frontend can ask for (Hz)
+MIN_RATE = 0.1
+
+# Passed to resubscribe() for a setting that should stay as it is
+KEEP = object()
+
+
+def parse_subscription(sensors):
+    """
+    Normalize a sensor subscription
+
+    Args:
+        sensors: None or '*' for every sensor, a list of sensor types, or a
+            comma-separated expression such as 'ph,tds' or 'flow_*'
+            (shell-style wildcards are allowed)
+
+    Returns:
+        Sorted tuple of sensor type patterns, or None for every sensor
+
+    Raises:
+        ValueError: If the subscription is not a string or a list of strings
+    """
+    if sensors is None:
+        return None
+    if isinstance(sensors, str):
+        sensors = sensors.split(',')
+    if not isinstance(sensors, (list, tuple)) or not all(isinstance(s, str) for s in sensors):
+        raise ValueError("sensors must be a list of sensor types or a comma-separated expression")
+    patterns = {s.strip() for s in sensors if s.strip()}
+    if not patterns or '*' in patterns:
+        return None
+    return tuple(sorted(patterns))
+
+
+class _Channel:
+    """Frontends of one device that receive updates at the same rate, subscription and encoding"""
+
+    __slots__ = ('room', 'interval', 'sensors', 'delta', 'sids', 'last_sent', 'pending',
+                 'seq', 'state', 'scores', '_matches')
+
+    def __init__(self, room, interval, sensors, delta=False):
+        self.room = room
+        self.interval = interval
+        self.sensors = sensors
+        self.delta = delta
+        self.sids = set()
+        self.last_sent = float('-inf')
+        self.pending = None
+        self.seq = 0
+        self.state = {}  # readings as last sent to this room (delta rooms)
+        self.scores = {}
+        self._matches = {}
+
+    def matches(self, sensor_type):
+        """Check whether a sensor type is subscribed, caching the answer"""
+        matched = self._matches.get(sensor_type)
+        if matched is None:
+            matched = self._matches[sensor_type] = any(
+                fnmatch.fnmatchcase(sensor_type, pattern) for pattern in self.sensors
+            )
+        return matched
+
+    def select(self, message):
+        """
+        Restrict a message to the subscribed sensors
+
+        Returns:
+            The message (unchanged if every sensor is subscribed), or None if
+            none of its readings are subscribed
+        """
+        payload = message.get('payload')
+        if self.sensors is None or not isinstance(payload, dict):
+            return message
+        selected = {sensor_type: value for sensor_type, value in payload.items() if self.matches(sensor_type)}
+        if not selected:
+            return None
+        scores = message.get('anomaly_scores') or {}
+        return {
+            **message,
+            'payload': selected,
+            'anomaly_scores': {sensor_type: scores[sensor_type] for sensor_type in selected if sensor_type in scores}
+        }
+
+    def coalesce(self, pending, message):
+        """
+        Combine a pending message with a newer one
+
+        Full rooms keep only the newer message. Delta rooms merge the
+        readings, so a sensor reported only in a superseded message is
+        still sent.
+        """
+        if not self.delta or pending is None or not isinstance(pending.get('payload'), dict) \
+                or not isinstance(message.get('payload'), dict):
+            return message
+        return {
+            **message,
+            'payload': {**pending['payload'], **message['payload']},
+            'anomaly_scores': {**(pending.get('anomaly_scores') or {}), **(message.get('anomaly_scores') or {})}
+        }
+
+    def encode(self, message):
+        """
+        Turn a message into what this room is sent
+
+        Delta rooms get the readings and scores that changed since the
+        previous message, numbered with a sequence number, and the message
+        is skipped when nothing changed.
+
+        Returns:
+            Message to send, or None
+        """
+        payload = message.get('payload')
+        if not self.delta or not isinstance(payload, dict):
+            return message
+        scores = message.get('anomaly_scores') or {}
+        changed = {k: v for k, v in payload.items() if k not in self.state or self.state[k] != v}
+        changed_scores = {k: v for k, v in scores.items() if k not in self.scores or self.scores[k] != v}
+        if not changed and not changed_scores:
+            return None
+        self.state.update(changed)
+        self.scores.update(changed_scores)
+        self.seq += 1
+        return {
+            'device_id': message.get('device_id'),
+            'seq': self.seq,
+            'delta': True,
+            'payload': changed,
+            'anomaly_scores': changed_scores
+        }
+
+    def snapshot(self, device_id):
+        """Full state of a delta room, numbered with its current sequence number"""
+        return {
+            'device_id': device_id,
+            'seq': self.seq,
+            'snapshot': True,
+            'payload': dict(self.state),
+            'anomaly_scores': dict(self.scores)
+        }
+
+
+class UpdateCoalescer:
+    """
+    Coalesces iot_update messages per device and caps how often they are sent
+
+    Frontends are grouped into one Socket.IO room per device, update rate,
+    sensor subscription and encoding, and each message is filtered and
+    encoded once per room rather than once per socket. A payload is sent at once when its room
+    has not had an update for one interval; otherwise it replaces the
+    room's pending message (the latest payload wins) and a background task
+    sends it when the interval is up. Each room therefore gets at most
+    ``rate`` messages per second no matter how fast the device reports,
+    and fan-out cost is bounded by the number of rooms, not by the
+    device's send rate.
+
+    Rooms in delta mode are sent only the readings that changed since their
+    previous message, numbered with a per-room sequence number. Frontends
+    get a full snapshot when they join and ask for another one when they
+    see a gap in the sequence.
+
+    Rooms live in the worker's memory, like the Socket.IO connections they
+    group, so frontends must connect to the worker their device talks to.
+    """
+
+    def __init__(self, max_rate=5.0, emit=None, clock=time.monotonic, tick=0.05):
+        """
+        Initialize the coalescer
+
+        Args:
+            max_rate: Default and highest update rate per frontend (Hz)
+            emit: Callable taking (room, message, sids); defaults to sending through send_queues
+            clock: Monotonic clock in seconds
+            tick: Seconds between background flushes of pending messages
+        """
+        self.max_rate = max_rate
+        self.emit = emit or self._emit
+        self.clock = clock
+        self.tick = tick
+        self._channels = {}  # device_id -> {(rate, sensors, delta): _Channel}
+        self._members = {}  # sid -> (device_id, (rate, sensors, delta))
+        self._lock = threading.Lock()
+        self._task = None
+        self._pid = None
+
+    def init_app(self, app):
+        """Configure the coalescer from the Flask application config"""
+        self.max_rate = app.config.get('IOT_UPDATE_MAX_RATE', self.max_rate)
+
+    def rate_for(self, requested=None):
+        """
+        Clamp a frontend's requested update rate
+
+        Args:
+            requested: Rate in Hz sent by the frontend, or None for the default
+
+        Returns:
+            float: Rate between MIN_RATE and max_rate
+        """
+        try:
+            rate = float(requested) if requested is not None else self.max_rate
+        except (TypeError, ValueError):
+            rate = self.max_rate
+        if rate != rate:  # NaN
+            rate = self.max_rate
+        return round(min(self.max_rate, max(MIN_RATE, rate)), 1)
+
+    def add(self, device_id, sid, rate=None, sensors=None, delta=False):
+        """
+        Register a frontend for a device's updates
+
+        Args:
+            device_id: ID of the device
+            sid: Socket.IO session ID of the frontend
+            rate: Requested update rate in Hz (None for the default)
+            sensors: Sensor subscription (see parse_subscription; None for every sensor)
+            delta: Send only changed readings instead of full payloads
+
+        Returns:
+            str: Room the frontend must join
+
+        Raises:
+            ValueError: If the subscription is invalid
+        """
+        key = (self.rate_for(rate), parse_subscription(sensors), bool(delta))
+        with self._lock:
+            self._remove(sid)
+            channels = self._channels.setdefault(device_id, {})
+            channel = channels.get(key)
+            if channel is None:
+                channel = channels[key] = self._channel(device_id, *key)
+            channel.sids.add(sid)
+            self._members[sid] = (device_id, key)
+        return channel.room
+
+    def resubscribe(self, sid, rate=KEEP, sensors=KEEP, delta=KEEP):
+        """
+        Change a registered frontend's rate, subscription or encoding
+
+        Args:
+            sid: Socket.IO session ID of the frontend
+            rate: New update rate in Hz, or KEEP
+            sensors: New sensor subscription, or KEEP
+            delta: New delta mode, or KEEP
+
+        Returns:
+            Tuple of (room left, room to join), or (None, None) if the
+            frontend is not registered
+
+        Raises:
+            ValueError: If the subscription is invalid
+        """
+        member = self._members.get(sid)
+        if member is None:
+            return None, None
+        device_id, (current_rate, current_sensors, current_delta) = member
+        if sensors is not KEEP:
+            parse_subscription(sensors)  # validate before leaving the current room
+        previous_room = self.remove(sid)
+        room = self.add(device_id, sid,
+                        rate=current_rate if rate is KEEP else rate,
+                        sensors=current_sensors if sensors is KEEP else sensors,
+                        delta=current_delta if delta is KEEP else delta)
+        return previous_room, room
+
+    def member(self, sid):
+        """
+        Get a registered frontend's settings
+
+        Args:
+            sid: Socket.IO session ID of the frontend
+
+        Returns:
+            Tuple of (device_id, rate, sensors, delta), or None if not registered
+        """
+        member = self._members.get(sid)
+        if member is None:
+            return None
+        device_id, (rate, sensors, delta) = member
+        return device_id, rate, sensors, delta
+
+    def select(self, sid, message):
+        """
+        Restrict a message to a registered frontend's sensor subscription
+
+        Args:
+            sid: Socket.IO session ID of the frontend
+            message: Message with payload and anomaly_scores
+
+        Returns:
+            The filtered message, or None if the frontend is not registered or
+            none of the readings are subscribed
+        """
+        with self._lock:
+            member = self._members.get(sid)
+            if member is None:
+                return None
+            device_id, key = member
+            return self._channels[device_id][key].select(message)
+
+    def snapshot(self, sid, seed=None):
+        """
+        Full state for a frontend in delta mode, sent on join and after a sequence gap
+
+        Args:
+            sid: Socket.IO session ID of the frontend
+            seed: Last payload of the device (e.g. from Redis), used when its
+                room has not sent anything yet
+
+        Returns:
+            iot_update snapshot message, or None if the frontend is not in delta mode
+        """
+        with self._lock:
+            member = self._members.get(sid)
+            if member is None:
+                return None
+            device_id, key = member
+            channel = self._channels[device_id][key]
+            if not channel.delta:
+                return None
+            if channel.seq == 0 and not channel.state and isinstance(seed, dict):
+                selected = channel.select({'payload': seed})
+                if selected is not None:
+                    channel.state.update(selected['payload'])
+            return channel.snapshot(device_id)
+
+    def room_counts(self):
+        """
+        Count this worker's rooms with frontends
+
+        Returns:
+            Dictionary with the number of devices and of iot_update rooms
+        """
+        with self._lock:
+            return {
+                'device': len(self._channels),
+                'updates': sum(len(channels) for channels in self._channels.values())
+            }
+
+    def member_count(self):
+        """Number of registered frontends"""
+        return len(self._members)
+
+    def remove(self, sid):
+        """
+        Unregister a frontend
+
+        Args:
+            sid: Socket.IO session ID of the frontend
+
+        Returns:
+            str: Room the frontend was in, or None
+        """
+        with self._lock:
+            return self._remove(sid)
+
+    def publish(self, device_id, message):
+        """
+        Queue an update for every frontend of a device
+
+        Args:
+            device_id: ID of the device
+            message: iot_update message
+
+        Returns:
+            int: Number of rooms the message was sent to right away
+        """
+        now = self.clock()
+        due = []
+        with self._lock:
+            for channel in self._channels.get(device_id, {}).values():
+                selected = channel.select(message)
+                if selected is None:
+                    continue  # nothing this room subscribed to
+                if now - channel.last_sent >= channel.interval:
+                    channel.pending = None
+                    encoded = channel.encode(selected)
+                    if encoded is not None:
+                        channel.last_sent = now
+                        due.append((channel.room, encoded, tuple(channel.sids)))
+                else:
+                    channel.pending = channel.coalesce(channel.pending, selected)
+        for room, encoded, sids in due:
+            self.emit(room, encoded, sids)
+        return len(due)
+
+    def flush(self):
+        """
+        Send pending messages whose room's interval has elapsed
+
+        Returns:
+            int: Number of messages sent
+        """
+        now = self.clock()
+        due = []
+        with self._lock:
+            for channels in self._channels.values():
+                for channel in channels.values():
+                    if channel.pending is not None and now - channel.last_sent >= channel.interval:
+                        encoded = channel.encode(channel.pending)
+                        channel.pending = None
+                        if encoded is not None:
+                            due.append((channel.room, encoded, tuple(channel.sids)))
+                            channel.last_sent = now
+        for room, message, sids in due:
+            self.emit(room, message, sids)
+        return len(due)
+
+    def ensure_started(self):
+        """Start the background flush task in this process if it is not running"""
+        if self._task is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._task is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._task = socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Flushing iot_update messages failed: {str(e)}")
+            socketio.sleep(self.tick)
+
+    @staticmethod
+    def _channel(device_id, rate, sensors, delta):
+        room = f"{device_id}:updates:{rate:g}"
+        if sensors is not None:
+            room += ":" + ",".join(sensors)
+        if delta:
+            room += ":delta"
+        return _Channel(room, 1.0 / rate, sensors, delta)
+
+    def _remove(self, sid):
+        member = self._members.pop(sid, None)
+        if member is None:
+            return None
+        device_id, key = member
+        channels = self._channels.get(device_id, {})
+        channel = channels.get(key)
+        if channel is None:
+            return None
+        channel.sids.discard(sid)
+        if not channel.sids:
+            del channels[key]
+            if not channels:
+                del self._channels[device_id]
+        return channel.room
+
+    @staticmethod
+    def _emit(room, message, sids):
+        send_queues.send(room, sids, message)
+
+
+# Shared instance, configured by create_app through init_app
+update_coalescer = UpdateCoalescer()
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class SensorModel(BaseModel):
@@ -9,6 +10,7 @@ class SensorModel(BaseModel):
     value: float
     status: int
     raw_value: float = None
+    anomaly_score: Optional[float] = None
     @staticmethod
     def from_mongo(doc):
         return SensorModel(
@@ -19,5 +21,6 @@ class SensorModel(BaseModel):
             unit=doc.get("unit"),
             value=doc.get("value"),
             status=doc.get("status", 0),
-            raw_value=doc.get("raw_value")
+            raw_value=doc.get("raw_value"),
+            anomaly_score=doc.get("anomaly_score")
         )
@@ -0,0 +1,351 @@
+"""
+Anomaly Service for online sensor statistics and glitch detection at ingestion
+"""
+
+import json
+import logging
+import math
+import threading
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from typing import Any, Dict, Optional, Tuple
+
+import redis
+
+from app.storage.redis_storage import redis_client
+from app.utils.config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STATS_KEY_PREFIX = "sensor_stats"
+
+AnomalyResult = namedtuple('AnomalyResult', ['score', 'is_anomaly'])
+
+
+class RollingStats:
+    """
+    Rolling statistics over the last ``window`` readings of one sensor
+
+    Every update is O(1) (amortized for min/max): values live in a fixed-size
+    ring buffer with running sums, and min/max are tracked with monotonic
+    deques of buffer positions.
+    """
+
+    __slots__ = ('window', 'alpha', 'count', 'ewma', 'rejected', '_values', '_sum', '_sum_sq', '_min', '_max',
+                 '_dirty')
+
+    def __init__(self, window: int, alpha: float):
+        self.window = window
+        self.alpha = alpha
+        self.count = 0
+        self.ewma = None
+        self.rejected = []  # consecutive readings dropped as anomalies, not in the window
+        self._values = array('d', bytes(8 * window))
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._min = deque()
+        self._max = deque()
+        self._dirty = 0
+
+    @property
+    def size(self) -> int:
+        """Number of readings currently in the window"""
+        return min(self.count, self.window)
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Rolling mean over the window"""
+        return self._sum / self.size if self.count else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Rolling population variance over the window"""
+        if not self.count:
+            return None
+        mean = self._sum / self.size
+        return max(self._sum_sq / self.size - mean * mean, 0.0)
+
+    @property
+    def minimum(self) -> Optional[float]:
+        """Minimum over the window"""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        """Maximum over the window"""
+        return self._max[0][1] if self._max else None
+
+    def push(self, value: float):
+        """
+        Add a reading to the window
+
+        Args:
+            value: Reading value
+        """
+        position = self.count
+        slot = position % self.window
+        if self.count >= self.window:
+            evicted = self._values[slot]
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+        self._values[slot] = value
+        self._sum += value
+        self._sum_sq += value * value
+        if slot == self.window - 1:
+            # Recompute the running sums once per lap to cancel accumulated rounding drift
+            self._sum = math.fsum(self._values)
+            self._sum_sq = math.fsum(v * v for v in self._values)
+
+        oldest = position - self.window
+        while self._min and self._min[0][0] <= oldest:
+            self._min.popleft()
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((position, value))
+        while self._max and self._max[0][0] <= oldest:
+            self._max.popleft()
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((position, value))
+
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+        self.count += 1
+        self._dirty += 1
+
+    def reset(self, values):
+        """
+        Restart the window from the given readings, e.g. after a level shift
+
+        Args:
+            values: Readings in chronological order
+        """
+        dirty = self._dirty
+        self.__init__(self.window, self.alpha)
+        for value in values[-self.window:]:
+            self.push(value)
+        self._dirty += dirty
+
+    def score(self, value: float) -> float:
+        """
+        Score how far a reading deviates from the current window
+
+        The score is the larger of the distances to the rolling mean and to the
+        EWMA, in rolling standard deviations. The deviation is floored at 1% of
+        the mean so a perfectly flat history does not turn noise into spikes.
+
+        Args:
+            value: Reading value
+
+        Returns:
+            Anomaly score (0 means no deviation)
+        """
+        mean = self.mean
+        deviation = max(abs(value - mean), abs(value - self.ewma))
+        stddev = max(math.sqrt(self.variance), abs(mean) * 0.01, 1e-9)
+        return deviation / stddev
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the state (readings in chronological order)"""
+        size = self.size
+        start = self.count - size
+        return {
+            'n': self.count,
+            'e': self.ewma,
+            'v': [self._values[i % self.window] for i in range(start, start + size)]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], window: int, alpha: float) -> 'RollingStats':
+        """Restore state produced by to_dict, replaying readings into the window"""
+        stats = cls(window, alpha)
+        for value in data.get('v', [])[-window:]:
+            stats.push(value)
+        if data.get('e') is not None:
+            stats.ewma = data['e']
+        stats._dirty = 0
+        return stats
+
+
+class AnomalyService:
+    """Service class tracking per-device, per-sensor statistics and scoring readings"""
+
+    def __init__(self, window=None, alpha=None, threshold=None, min_samples=None,
+                 drop_anomalies=None, spill_every=None, max_tracked=None, client=None, rebaseline_after=None):
+        """
+        Initialize the service
+
+        Args:
+            window: Number of readings in the rolling window
+            alpha: EWMA smoothing factor
+            threshold: Score at or above which a reading is anomalous
+            min_samples: Readings required before scoring starts
+            drop_anomalies: Drop anomalous readings before they are persisted or broadcast
+            spill_every: Persist state to Redis after this many updates per sensor
+            max_tracked: Maximum sensors kept in memory before least recently used are spilled
+            client: Redis client (defaults to the shared storage client)
+            rebaseline_after: Consecutive dropped readings after which the window
+                restarts from them (0 never)
+        """
+        self.window = window or Config.ANOMALY_WINDOW
+        self.alpha = alpha or Config.ANOMALY_EWMA_ALPHA
+        self.threshold = threshold or Config.ANOMALY_THRESHOLD
+        self.min_samples = Config.ANOMALY_MIN_SAMPLES if min_samples is None else min_samples
+        self.drop_anomalies = Config.ANOMALY_DROP if drop_anomalies is None else drop_anomalies
+        self.spill_every = spill_every or Config.ANOMALY_SPILL_EVERY
+        self.max_tracked = max_tracked or Config.ANOMALY_MAX_TRACKED
+        self.client = client or redis_client
+        self.rebaseline_after = Config.ANOMALY_REBASELINE_AFTER if rebaseline_after is None else rebaseline_after
+        self._stats: 'OrderedDict[Tuple[str, str], RollingStats]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, device_id: str, sensor_type: str, value: float) -> AnomalyResult:
+        """
+        Score a reading against its sensor's history, then add it to the statistics
+
+        With drop_anomalies, anomalous readings are left out of the statistics
+        as they are of storage, so a repeated spike keeps being flagged
+        instead of widening the window until it looks normal. A run of
+        rebaseline_after dropped readings in a row is taken as a real level
+        shift (new probe, recalibration, another water source): the window
+        restarts from that run and the reading completing it is accepted.
+
+        Args:
+            device_id: ID of the device
+            sensor_type: Type of sensor
+            value: Reading value
+
+        Returns:
+            AnomalyResult with the score (None while warming up) and anomaly flag
+        """
+        key = (device_id, sensor_type)
+        with self._lock:
+            stats = self._stats.get(key)
+        loaded = self._load(key) if stats is None else None
+
+        with self._lock:
+            evicted = []
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = loaded
+                while len(self._stats) > self.max_tracked:
+                    evicted.append(self._stats.popitem(last=False))
+            else:
+                self._stats.move_to_end(key)
+
+            score = stats.score(value) if stats.count >= self.min_samples else None
+            is_anomaly = score is not None and score >= self.threshold
+            if not (is_anomaly and self.drop_anomalies):
+                stats.rejected.clear()
+                stats.push(value)
+            else:
+                stats.rejected.append(value)
+                if self.rebaseline_after and len(stats.rejected) >= self.rebaseline_after:
+                    stats.reset(stats.rejected)
+                    is_anomaly = False
+            if stats._dirty >= self.spill_every:
+                evicted.append((key, stats))
+
+        for spilled_key, spilled_stats in evicted:
+            if spilled_stats._dirty:
+                self._spill(spilled_key, spilled_stats)
+
+        return AnomalyResult(round(score, 3) if score is not None else None, is_anomaly)
+
+    def filter_readings(self, device_id: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Score every numeric reading of an IoT payload
+
+        Readings may be plain numbers or objects with a ``value`` field.
+
+        Args:
+            device_id: ID of the device
+            payload: Mapping of sensor type to reading
+
+        Returns:
+            Tuple of (payload with anomalous readings removed if dropping is
+            enabled, mapping of sensor type to anomaly score)
+        """
+        scores = {}
+        dropped = []
+        for sensor_type, reading in payload.items():
+            value = reading.get('value') if isinstance(reading, dict) else reading
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            result = self.observe(device_id, sensor_type, float(value))
+            if result.score is not None:
+                scores[sensor_type] = result.score
+            if result.is_anomaly and self.drop_anomalies:
+                dropped.append(sensor_type)
+
+        if dropped:
+            logger.info(f"Dropped anomalous readings for {device_id}: {dropped}")
+            payload = {k: v for k, v in payload.items() if k not in dropped}
+        return payload, scores
+
+    def get_stats(self, device_id: str, sensor_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the current statistics of a sensor held by this worker
+
+        Args:
+            device_id: ID of the device
+            sensor_type: Type of sensor
+
+        Returns:
+            Dictionary of statistics or None if the sensor is not tracked
+        """
+        with self._lock:
+            stats = self._stats.get((device_id, sensor_type))
+            if stats is None:
+                return None
+            return {
+                'count': stats.count,
+                'ewma': stats.ewma,
+                'mean': stats.mean,
+                'variance': stats.variance,
+                'min': stats.minimum,
+                'max': stats.maximum
+            }
+
+    def flush(self) -> int:
+        """
+        Persist every sensor with unspilled updates, e.g. before the worker exits
+
+        Returns:
+            Number of sensors written to Redis
+        """
+        with self._lock:
+            dirty = [(key, stats) for key, stats in self._stats.items() if stats._dirty]
+        for key, stats in dirty:
+            self._spill(key, stats)
+        return len(dirty)
+
+    def _load(self, key: Tuple[str, str]) -> RollingStats:
+        """Load spilled state from Redis, or start empty"""
+        device_id, sensor_type = key
+        try:
+            raw = self.client.hget(f"{STATS_KEY_PREFIX}:{device_id}", sensor_type)
+            if raw:
+                return RollingStats.from_dict(json.loads(raw), self.window, self.alpha)
+        except (redis.RedisError, ValueError) as e:
+            logger.warning(f"Could not load statistics for {device_id}/{sensor_type}: {str(e)}")
+        return RollingStats(self.window, self.alpha)
+
+    def _spill(self, key: Tuple[str, str], stats: RollingStats):
+        """Persist state to Redis so other workers can pick it up"""
+        device_id, sensor_type = key
+        with self._lock:
+            state = json.dumps(stats.to_dict(), separators=(',', ':'))
+            stats._dirty = 0
+        try:
+            redis_key = f"{STATS_KEY_PREFIX}:{device_id}"
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hset(redis_key, sensor_type, state)
+            pipe.expire(redis_key, Config.ANOMALY_STATE_TTL)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not spill statistics for {device_id}/{sensor_type}: {str(e)}")
+
+
+# Shared instance so statistics survive across requests and events in this worker
+anomaly_service = AnomalyService()
@@ -0,0 +1,266 @@
+"""
+API Key Service for multi-key authentication
+"""
+
+import hashlib
+import logging
+import os
+import secrets
+import threading
+import time
+
+import redis
+
+from app.utils.config import Config
+from app.utils.database import DatabaseMongo
+from app.utils.helpers import current_timestamp
+from app.storage.redis_storage import redis_client
+
+logger = logging.getLogger(__name__)
+
+dbApiKeys = DatabaseMongo.db.api_keys
+
+# Published with the hash of a changed key (or '*' for everything)
+CHANGES_CHANNEL = "api_keys:changed"
+
+# Scopes a key may be granted; '*' grants all of them
+SCOPES = frozenset({'read', 'write', 'admin', '*'})
+
+
+def hash_api_key(api_key):
+    """
+    Hash a raw API key for storage and lookup
+
+    API keys are random 256-bit tokens, so an unsalted SHA-256 is enough to
+    keep them out of the database without making lookups a scan.
+
+    Args:
+        api_key: Raw API key
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+
+class ApiKeyService:
+    """
+    Service class for API keys, served from a process-local cache
+
+    Every active key is held in a dictionary indexed by key hash, so
+    authentication is one hash and one dictionary lookup. Writes publish the
+    changed hash on Redis; a listener thread in every worker reloads just
+    that key, with a periodic full reload in case a message was missed.
+    """
+
+    def __init__(self, client=None, refresh_interval=None, legacy_key=None):
+        """
+        Initialize the service
+
+        Args:
+            client: Redis client used for change notifications
+            refresh_interval: Seconds between full reloads from MongoDB
+            legacy_key: Single configured key accepted with all scopes (Config.API_KEY)
+        """
+        self.client = client or redis_client
+        self.refresh_interval = Config.API_KEY_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self._keys = {}
+        self._static = {}
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._listener = None
+        self._pid = None
+        self._stop = threading.Event()
+        if legacy_key:
+            legacy_hash = hash_api_key(legacy_key)
+            self._static[legacy_hash] = {
+                'key_id': 'config', 'key_hash': legacy_hash, 'name': 'API_KEY',
+                'scopes': frozenset({'*'}), 'quota_per_minute': None
+            }
+
+    def authenticate(self, api_key):
+        """
+        Look up the key record for a raw API key
+
+        Args:
+            api_key: Raw API key from the request
+
+        Returns:
+            Key record (key_id, name, scopes, quota_per_minute) or None
+        """
+        if not api_key:
+            return None
+        # The dict lookup is on the SHA-256 digest, not the raw key, so its timing
+        # tells a caller nothing about how close a guess is to a valid key
+        digest = hash_api_key(api_key)
+        return self._static.get(digest) or self._keys.get(digest)
+
+    def ensure_loaded(self):
+        """Load the keys and start the change listener in this process if needed"""
+        if self._loaded_at is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._loaded_at is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            try:
+                self.reload()
+            except Exception as e:
+                # The configured key keeps working; the listener retries the load
+                logger.warning(f"Could not load API keys: {str(e)}")
+                self._loaded_at = 0.0
+            self._stop.clear()
+            self._listener = threading.Thread(target=self._listen, name='api-key-listener', daemon=True)
+            self._listener.start()
+
+    def reload(self, key_hash=None):
+        """
+        Reload keys from MongoDB
+
+        Args:
+            key_hash: Reload only this key; all keys when omitted
+        """
+        if key_hash and key_hash != '*':
+            doc = dbApiKeys.find_one({"_id": key_hash})
+            if doc and doc.get('active', True):
+                self._keys[key_hash] = self._entry(doc)
+            else:
+                self._keys.pop(key_hash, None)
+            return
+
+        keys = {doc['_id']: self._entry(doc) for doc in dbApiKeys.find({"active": True})}
+        self._keys = keys
+        self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(keys)} API keys")
+
+    def create_key(self, name, scopes=None, quota_per_minute=None):
+        """
+        Create an API key
+
+        Args:
+            name: Operator or integration the key belongs to
+            scopes: List of scopes, e.g. ['read', 'write', 'admin'] or ['*']
+            quota_per_minute: Request budget for this key (defaults to RATE_LIMIT_PER_MINUTE)
+
+        Returns:
+            Key record including the raw 'api_key', which is not stored and
+            cannot be retrieved again
+
+        Raises:
+            ValueError: If the name is missing, the scopes are not a non-empty list
+                of known scopes or the quota is not a positive integer
+        """
+        if not name:
+            raise ValueError("API key name is required")
+        if scopes is None:
+            scopes = ['read']
+        if not isinstance(scopes, list) or not scopes or not all(isinstance(scope, str) for scope in scopes):
+            raise ValueError("scopes must be a non-empty list of strings")
+        unknown = sorted(set(scopes) - SCOPES)
+        if unknown:
+            raise ValueError(f"Unknown scopes: {', '.join(unknown)} (allowed: {', '.join(sorted(SCOPES))})")
+        if quota_per_minute is not None and (not isinstance(quota_per_minute, int) or quota_per_minute <= 0):
+            raise ValueError("quota_per_minute must be a positive integer")
+
+        api_key = secrets.token_urlsafe(32)
+        key_hash = hash_api_key(api_key)
+        doc = {
+            "_id": key_hash,
+            "key_id": key_hash[:12],
+            "name": name,
+            "scopes": sorted(set(scopes)),
+            "quota_per_minute": quota_per_minute,
+            "active": True,
+            "created_at": current_timestamp()
+        }
+        dbApiKeys.insert_one(doc)
+        self._keys[key_hash] = self._entry(doc)
+        self._publish(key_hash)
+        return {**self._serialize(doc), "api_key": api_key}
+
+    def list_keys(self):
+        """
+        List API keys without their hashes
+
+        Returns:
+            List of key records
+        """
+        return [self._serialize(doc) for doc in dbApiKeys.find()]
+
+    def revoke_key(self, key_id):
+        """
+        Revoke an API key in every worker
+
+        Args:
+            key_id: Public ID of the key
+
+        Returns:
+            True if the key was revoked, False if it does not exist
+        """
+        doc = dbApiKeys.find_one({"key_id": key_id})
+        if not doc:
+            return False
+        dbApiKeys.update_one({"_id": doc["_id"]}, {"$set": {"active": False, "revoked_at": current_timestamp()}})
+        self._keys.pop(doc["_id"], None)
+        self._publish(doc["_id"])
+        return True
+
+    @staticmethod
+    def ensure_indexes():
+        """Create the indexes revocation and full reloads rely on"""
+        dbApiKeys.create_index("key_id", unique=True)
+        dbApiKeys.create_index("active")
+
+    def stop(self):
+        """Stop the change listener"""
+        self._stop.set()
+
+    def _publish(self, key_hash):
+        try:
+            self.client.publish(CHANGES_CHANNEL, key_hash)
+        except redis.RedisError as e:
+            logger.warning(f"Could not publish API key change, other workers update on their next reload: {str(e)}")
+
+    def _listen(self):
+        """Apply change notifications and reload everything every refresh_interval"""
+        backoff = 1
+        reconnect = False
+        while not self._stop.is_set():
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANGES_CHANNEL)
+                if reconnect:
+                    self.reload()  # changes published while disconnected were missed
+                backoff = 1
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        self.reload(message['data'])
+                    if self.refresh_interval and time.monotonic() - self._loaded_at >= self.refresh_interval:
+                        self.reload()
+            except Exception as e:
+                reconnect = True
+                logger.warning(f"API key listener failed, retrying in {backoff}s: {str(e)}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+    @staticmethod
+    def _entry(doc):
+        return {
+            'key_id': doc['key_id'],
+            'key_hash': doc['_id'],
+            'name': doc.get('name'),
+            'scopes': frozenset(doc.get('scopes') or []),
+            'quota_per_minute': doc.get('quota_per_minute')
+        }
+
+    @staticmethod
+    def _serialize(doc):
+        return {
+            "key_id": doc["key_id"],
+            "name": doc.get("name"),
+            "scopes": doc.get("scopes", []),
+            "quota_per_minute": doc.get("quota_per_minute"),
+            "active": doc.get("active", True),
+            "created_at": doc.get("created_at")
+        }
@@ -0,0 +1,118 @@
+"""
+Async read service for device and sensor endpoints
+"""
+
+from bson import ObjectId
+from app.models.device_model import DeviceModel
+from app.models.sensor_model import SensorModel
+from app.utils.database import AsyncDatabaseMongo
+
+
+def get_db():
+    """Database used by the async read service (replaced in tests)"""
+    return AsyncDatabaseMongo.get_db()
+
+
+class AsyncReadService:
+    """
+    Service class for device and sensor reads on pymongo's async client
+
+    Mirrors the read methods of DeviceService and SensorService. Writes
+    stay on the sync services. A device is read in one query together with
+    its version, so the ETag always matches the body. Sensor reads do not
+    depend on the device lookup and can run concurrently with it.
+    """
+
+    async def get_devices_version(self):
+        """
+        Get the version of the devices collection
+
+        Returns:
+            Version counter (0 if no write has been recorded yet)
+        """
+        doc = await get_db().collection_versions.find_one({"_id": "devices"})
+        return doc.get("version", 0) if doc else 0
+
+    async def get_device_version(self, device_id):
+        """
+        Get the version of a device without loading the document
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            Tuple of (document id, version) or None if not found
+        """
+        device = await get_db().devices.find_one({"device_id": device_id}, {"_id": 1, "version": 1})
+        if device:
+            return str(device["_id"]), device.get("version", 0)
+        return None
+
+    async def get_all_devices(self):
+        """
+        Get all device data
+
+        Returns:
+            List of device data
+        """
+        docs = await get_db().devices.find().to_list(None)
+        if docs:
+            return {"devices": [DeviceModel.from_mongo(doc).dict() for doc in docs]}
+        return []
+
+    async def get_device_by_id(self, device_id):
+        """
+        Get device by ID together with its version
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            Tuple of ((document id, version), device data) or None if not found
+        """
+        device = await get_db().devices.find_one({"device_id": device_id})
+        if device:
+            return (str(device["_id"]), device.get("version", 0)), {"device": DeviceModel.from_mongo(device).dict()}
+        return None
+
+    async def get_all_sensors(self, device_id):
+        """
+        Get all sensor data for a device
+
+        Does not check the device exists; callers run get_device_version alongside.
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            List of sensor data
+        """
+        docs = await get_db().sensors.find({"device_id": device_id}).to_list(None)
+        if docs:
+            return {"sensors": [SensorModel.from_mongo(doc).dict() for doc in docs]}
+        return []
+
+    async def get_sensor_by_id(self, device_id, sensor_id):
+        """
+        Get a sensor by ID
+
+        Does not check the device exists; callers run get_device_version alongside.
+
+        Args:
+            device_id: ID of the device
+            sensor_id: ID of the sensor
+
+        Returns:
+            Sensor data or None if not found
+
+        Raises:
+            ValueError: If the sensor ID is invalid
+        """
+        try:
+            object_id = ObjectId(sensor_id)
+        except Exception:
+            raise ValueError(f"Invalid sensor ID: {sensor_id}")
+        sensor = await get_db().sensors.find_one({"_id": object_id, "device_id": device_id})
+        if sensor:
+            return {"sensor": SensorModel.from_mongo(sensor).dict()}
+        return None
@@ -7,14 +7,38 @@ from datetime import datetime
 from app.models.device_model import DeviceModel
 from app.utils.helpers import generate_uuid, current_timestamp
 from app.utils.database import DatabaseMongo
+from app.storage.response_cache import response_cache
+from app.services.calibration_service import CalibrationService
+from app.event.device_state import device_state
 from bson import ObjectId
 
 dbDevices = DatabaseMongo.db.devices
+dbVersions = DatabaseMongo.db.collection_versions
+
+
+def bump_devices_version():
+    """
+    Increment the version counter of the devices collection
+
+    Called after every write that changes what GET /devices returns, so list
+    ETags can be derived from a single document lookup.
+    """
+    dbVersions.update_one({"_id": "devices"}, {"$inc": {"version": 1}}, upsert=True)
+
+
 class DeviceService:
     """Service class for handling device-related operations"""
     
-    def __init__(self):
-        """Initialize the service with in-memory storage (replace with database)"""
+    def __init__(self, calibration_service=None):
+        """
+        Initialize the service
+
+        Args:
+            calibration_service: Calibration service checking calibration_params overrides
+                (defaults to a new CalibrationService)
+        """
+        self.calibration_service = calibration_service or CalibrationService()
+
     def get_all_devices(self):
         """
         Get all device data
@@ -50,10 +74,13 @@ class DeviceService:
             "metadata" : {
                 "installation_date" : current_timestamp()
             },
-            "tools" : data.get("tools")
+            "tools" : data.get("tools"),
+            "version" : 1
         }
         
         result = dbDevices.insert_one(device)
+        bump_devices_version()
+        response_cache.invalidate("devices", f"device:{device['device_id']}")
         inserted_doc = dbDevices.find_one({"_id" : result.inserted_id})
         return {"device": DeviceModel.from_mongo(inserted_doc).dict()}
 
@@ -98,7 +125,17 @@ class DeviceService:
             "tools" : data.get("tools", device_data['tools'])
         }
 
-        dbDevices.update_one({"device_id": device_id}, {"$set": update_data})
+        # Calibration parameter overrides per sensor type, applied on ingest and by recalibration jobs
+        if "calibration_params" in data:
+            self.calibration_service.validate_overrides(data["calibration_params"])
+            update_data["calibration_params"] = data["calibration_params"]
+
+        dbDevices.update_one({"device_id": device_id}, {"$set": update_data, "$inc": {"version": 1}})
+        bump_devices_version()
+        response_cache.invalidate("devices", f"device:{device_id}")
+        if "calibration_params" in update_data:
+            # Replayed device state must calibrate with the new overrides too
+            device_state.set_calibration_params(device_id, update_data["calibration_params"], create=False)
 
         deviceUpdated = dbDevices.find_one({"device_id": device_id})
         return {"device": DeviceModel.from_mongo(deviceUpdated).dict()}
@@ -117,9 +154,54 @@ class DeviceService:
         if not device:
             return False
         dbDevices.delete_one({"device_id": device_id})
+        bump_devices_version()
+        response_cache.invalidate("devices", f"device:{device_id}")
 
         return {"device": DeviceModel.from_mongo(device).dict()}
 
+    def get_device_version(self, device_id):
+        """
+        Get the version of a device without loading the document
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            Tuple of (document id, version) or None if not found
+        """
+        device = dbDevices.find_one({"device_id": device_id}, {"_id": 1, "version": 1})
+        if device:
+            return str(device["_id"]), device.get("version", 0)
+        return None
+
+    def get_calibration_params(self, device_id):
+        """
+        Get a device's calibration parameter overrides without loading the document
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            The device's calibration_params, or None if it has none or is not found
+        """
+        device = dbDevices.find_one({"device_id": device_id}, {"_id": 0, "calibration_params": 1})
+        return device.get("calibration_params") if device else None
+
+    def get_devices_version(self):
+        """
+        Get the version of the devices collection
+
+        Returns:
+            Version counter (0 if no write has been recorded yet)
+        """
+        doc = dbVersions.find_one({"_id": "devices"})
+        return doc.get("version", 0) if doc else 0
+
+    @staticmethod
+    def ensure_indexes():
+        """Create the indexes version lookups and device queries rely on"""
+        dbDevices.create_index("device_id")
+
     def list_devices(self, page=1, per_page=10, status_filter=None):
         """
         List devices with pagination and optional status filter
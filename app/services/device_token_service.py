@@ -0,0 +1,182 @@
+"""
+Device Token Service for Socket.IO authentication
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+
+import redis
+
+from app.storage.redis_storage import redis_client
+
+logger = logging.getLogger(__name__)
+
+CLIENT_TYPES = ("iot", "frontend")
+
+# Redis set of revoked token salts and hash of device_id -> revoked-before timestamp
+REVOKED_TOKENS_KEY = "device_tokens:revoked"
+REVOKED_DEVICES_KEY = "device_tokens:revoked_devices"
+
+
+class DeviceTokenService:
+    """
+    Service class for stateless, HMAC-signed Socket.IO credentials
+
+    A credential is a public ``salt`` of the form ``<issued_at>.<expires_at>.<nonce>``
+    and a ``key`` that is the HMAC-SHA256 of the device ID, client type and
+    salt under the server secret. Verifying it is one HMAC and a few
+    comparisons, without a database lookup. Revocations are kept in Redis
+    and mirrored in a local copy that is refreshed every ``refresh_interval``
+    seconds, so a revoked token stops working in every worker within that
+    time (at once in the worker that revoked it).
+    """
+
+    def __init__(self, secret, client=None, ttl=None, refresh_interval=30.0, clock=time.time):
+        """
+        Initialize the service
+
+        Args:
+            secret: Signing secret (DEVICE_TOKEN_SECRET)
+            client: Redis client holding the revocation list
+            ttl: Default token lifetime in seconds
+            refresh_interval: Seconds between reloads of the revocation list
+            clock: Wall clock in seconds
+        """
+        if not secret:
+            raise ValueError("A device token secret is required")
+        self._secret = secret.encode('utf-8') if isinstance(secret, str) else secret
+        self.client = client or redis_client
+        self.ttl = ttl or 90 * 24 * 3600
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._revoked_tokens = frozenset()
+        self._revoked_devices = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def issue(self, device_id, client_type="iot", ttl=None):
+        """
+        Issue a credential for a device
+
+        Args:
+            device_id: ID of the device
+            client_type: 'iot' for the board, 'frontend' for dashboards of the device
+            ttl: Lifetime in seconds (defaults to the service TTL)
+
+        Returns:
+            Dictionary with device_id, client_type, salt, key and expires_at
+
+        Raises:
+            ValueError: If the device ID, client type or TTL is invalid
+        """
+        if not device_id or not isinstance(device_id, str):
+            raise ValueError("device_id is required")
+        if client_type not in CLIENT_TYPES:
+            raise ValueError(f"client_type must be one of {', '.join(CLIENT_TYPES)}")
+        ttl = self.ttl if ttl is None else ttl
+        if not isinstance(ttl, int) or ttl <= 0:
+            raise ValueError("ttl must be a positive integer")
+
+        issued_at = int(self.clock())
+        salt = f"{issued_at}.{issued_at + ttl}.{secrets.token_hex(8)}"
+        return {
+            "device_id": device_id,
+            "client_type": client_type,
+            "salt": salt,
+            "key": self._sign(device_id, client_type, salt),
+            "expires_at": issued_at + ttl
+        }
+
+    def verify(self, device_id, client_type, salt, key):
+        """
+        Check a credential presented on connect
+
+        Args:
+            device_id: ID of the device
+            client_type: Client type the credential must have been issued for
+            salt: Public part of the credential
+            key: Signature part of the credential
+
+        Returns:
+            str: None if the credential is valid, otherwise the reason it is not
+        """
+        if not (isinstance(device_id, str) and isinstance(salt, str) and isinstance(key, str)):
+            return "missing credentials"
+        try:
+            issued_at, expires_at, _ = salt.split(".", 2)
+            issued_at, expires_at = int(issued_at), int(expires_at)
+        except ValueError:
+            return "malformed salt"
+        if not hmac.compare_digest(self._sign(device_id, client_type, salt), key):
+            return "invalid key"
+        if self.clock() >= expires_at:
+            return "expired"
+
+        self._refresh_revocations()
+        if salt in self._revoked_tokens:
+            return "revoked"
+        revoked_before = self._revoked_devices.get(device_id)
+        if revoked_before is not None and issued_at <= revoked_before:
+            return "revoked"
+        return None
+
+    def revoke_token(self, salt):
+        """
+        Revoke one credential
+
+        Args:
+            salt: Public part of the credential
+
+        Returns:
+            True once the revocation is stored
+        """
+        self.client.sadd(REVOKED_TOKENS_KEY, salt)
+        with self._lock:
+            self._revoked_tokens = self._revoked_tokens | {salt}
+        return True
+
+    def revoke_device(self, device_id):
+        """
+        Revoke every credential issued for a device so far
+
+        Credentials issued afterwards are valid again.
+
+        Args:
+            device_id: ID of the device
+
+        Returns:
+            True once the revocation is stored
+        """
+        revoked_before = int(self.clock())
+        self.client.hset(REVOKED_DEVICES_KEY, device_id, revoked_before)
+        with self._lock:
+            self._revoked_devices = {**self._revoked_devices, device_id: revoked_before}
+        return True
+
+    def _refresh_revocations(self):
+        """Reload the revocation list from Redis when the local copy is older than refresh_interval"""
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < self.refresh_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            return  # another connect is refreshing; use the current copy
+        try:
+            tokens = self.client.smembers(REVOKED_TOKENS_KEY)
+            devices = self.client.hgetall(REVOKED_DEVICES_KEY)
+            self._revoked_tokens = frozenset(tokens)
+            self._revoked_devices = {device_id: int(ts) for device_id, ts in devices.items()}
+        except redis.RedisError as e:
+            logger.warning(f"Could not refresh device token revocations, using the cached list: {str(e)}")
+        finally:
+            self._loaded_at = now
+            self._lock.release()
+
+    def _sign(self, device_id, client_type, salt):
+        message = f"{device_id}\n{client_type}\n{salt}".encode('utf-8')
+        digest = hmac.new(self._secret, message, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
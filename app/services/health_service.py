@@ -0,0 +1,164 @@
+"""
+Background dependency checks for readiness probes
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.utils.database import DatabaseMongo
+from app.storage.redis_storage import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+def ping_redis():
+    """Ping the shared Redis server"""
+    return redis_client.ping()
+
+
+class HealthChecker:
+    """
+    Periodically checks dependencies and caches the result
+
+    Probes read the cached status instead of touching MongoDB or Redis, so
+    they cost a dictionary copy no matter how often they are called and a
+    hanging dependency cannot hang the worker serving the probe. A result
+    older than ``stale_after`` seconds counts as down, so a stuck check
+    still turns readiness off. The checker starts with the application, and
+    a probe arriving before the first round finished waits up to
+    ``startup_wait`` seconds for it rather than answering 'unknown'.
+    """
+
+    def __init__(self, checks=None, interval=5.0, stale_after=None, startup_wait=1.0):
+        """
+        Initialize the checker
+
+        Args:
+            checks: Mapping of dependency name to a callable that returns a
+                truthy value when the dependency is up (exceptions count as down)
+            interval: Seconds between check rounds
+            stale_after: Seconds after which a result is no longer trusted
+                (defaults to three intervals)
+            startup_wait: Seconds a probe waits for the first round of checks
+        """
+        self.checks = checks if checks is not None else {'mongodb': DatabaseMongo.ping, 'redis': ping_redis}
+        self.enabled = True
+        self.interval = interval
+        self.stale_after = stale_after or interval * 3
+        self.startup_wait = startup_wait
+        self._results = {}
+        self._first_round = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        """Configure the checker from the Flask application config"""
+        self.enabled = app.config.get('HEALTH_CHECK_ENABLED', True)
+        self.interval = app.config.get('HEALTH_CHECK_INTERVAL', 5.0)
+        self.stale_after = app.config.get('HEALTH_CHECK_STALE_AFTER') or self.interval * 3
+        self.startup_wait = app.config.get('HEALTH_CHECK_STARTUP_WAIT', 1.0)
+        self.ensure_started()
+
+    def ensure_started(self):
+        """
+        Start the background thread if it is not running in this process
+
+        Called when the application is created and again from the probes,
+        so a worker forked after create_app still runs its own checker.
+        """
+        if not self.enabled:
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._first_round.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='health-checker', daemon=True)
+            self._thread.start()
+
+    def wait_for_first_round(self):
+        """
+        Wait up to startup_wait seconds for the first round of checks
+
+        Returns immediately once a round has finished, so only the first
+        probes after a worker starts can wait.
+
+        Returns:
+            bool: True if a round has finished
+        """
+        if not self.enabled:
+            return False
+        return self._first_round.wait(self.startup_wait)
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+
+    def run_checks(self):
+        """Run every check once and cache the results"""
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            error = None
+            try:
+                up = bool(check())
+            except Exception as e:
+                up = False
+                error = str(e)
+            result = {
+                'status': 'up' if up else 'down',
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                'checked_at': time.time()
+            }
+            if error:
+                result['error'] = error
+            with self._lock:
+                previous = self._results.get(name)
+                self._results[name] = result
+            if previous is None or previous['status'] != result['status']:
+                logger.log(logging.INFO if up else logging.WARNING,
+                           f"Dependency {name} is {result['status']}" + (f": {error}" if error else ''))
+
+    def snapshot(self):
+        """
+        Get the cached status of every dependency
+
+        Returns:
+            Dictionary with 'ready' and per-dependency status, latency and check time
+        """
+        now = time.time()
+        with self._lock:
+            results = {name: dict(result) for name, result in self._results.items()}
+
+        checks = {}
+        for name in self.checks:
+            result = results.get(name)
+            if result is None:
+                checks[name] = {'status': 'unknown'}
+                continue
+            if now - result['checked_at'] > self.stale_after:
+                result['status'] = 'stale'
+            result['checked_at'] = datetime.fromtimestamp(result['checked_at'], timezone.utc).isoformat()
+            checks[name] = result
+
+        return {
+            'ready': all(check['status'] == 'up' for check in checks.values()),
+            'checks': checks
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_checks()
+            self._first_round.set()
+            self._stop.wait(self.interval)
+
+
+# Shared instance, configured by create_app through init_app
+health_checker = HealthChecker()
@@ -0,0 +1,345 @@
+"""
+Recalibration Service for re-applying calibration to historical sensor readings
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+
+from app.services.calibration_service import CalibrationService
+from app.utils.config import Config
+from app.utils.database import DatabaseMongo
+from app.utils.helpers import current_timestamp, generate_uuid
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+dbSensors = DatabaseMongo.db.sensors
+dbDevices = DatabaseMongo.db.devices
+dbJobs = DatabaseMongo.db.recalibration_jobs
+
+
+def normalize_timestamp(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize an ISO 8601 timestamp to the format stored on sensor readings
+
+    Args:
+        value: ISO 8601 timestamp string, or None
+
+    Returns:
+        Timestamp formatted like current_timestamp(), or None
+
+    Raises:
+        ValueError: If value is not a valid ISO 8601 timestamp
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid timestamp: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class RecalibrationService:
+    """Service class for resumable recalibration backfill jobs"""
+
+    def __init__(self, calibration_service=None, chunk_size=None, max_docs_per_second=None):
+        """
+        Initialize the service
+
+        Args:
+            calibration_service: Base calibration service (defaults to a new CalibrationService)
+            chunk_size: Number of readings fetched, calibrated and written per chunk
+            max_docs_per_second: Throughput cap so live ingest is not starved (0 disables)
+
+        Raises:
+            ValueError: If chunk_size is not a positive integer or
+                max_docs_per_second is negative or not a number
+        """
+        if chunk_size is not None and (isinstance(chunk_size, bool) or not isinstance(chunk_size, int)
+                                       or chunk_size <= 0):
+            raise ValueError("chunk_size must be a positive integer")
+        if max_docs_per_second is not None and (isinstance(max_docs_per_second, bool)
+                                                or not isinstance(max_docs_per_second, (int, float))
+                                                or not max_docs_per_second >= 0):
+            raise ValueError("max_rate must be a positive number, or 0 for no limit")
+        self.calibration_service = calibration_service or CalibrationService()
+        self.chunk_size = chunk_size or Config.RECALIBRATION_CHUNK_SIZE
+        self.max_docs_per_second = Config.RECALIBRATION_MAX_RATE if max_docs_per_second is None else max_docs_per_second
+
+    def create_job(self, device_id, start=None, end=None, sensor_types=None):
+        """
+        Create a recalibration job for a device
+
+        Args:
+            device_id: ID of the device whose readings are recalibrated
+            start: Optional ISO timestamp, inclusive lower bound
+            end: Optional ISO timestamp, exclusive upper bound
+            sensor_types: Optional list of sensor types to restrict the job to
+
+        Returns:
+            Created job data
+
+        Raises:
+            ValueError: If the device does not exist or the arguments are invalid
+        """
+        if not dbDevices.find_one({"device_id": device_id}, {"_id": 1}):
+            raise ValueError("Device with this ID does not exist")
+
+        start = normalize_timestamp(start)
+        end = normalize_timestamp(end)
+        if start and end and start >= end:
+            raise ValueError("start must be before end")
+
+        supported = self.calibration_service.get_calibration_params().keys()
+        sensor_types = [t.lower() for t in (sensor_types or supported)]
+        unsupported = [t for t in sensor_types if t not in supported]
+        if unsupported:
+            raise ValueError(f"Unsupported sensor type: {', '.join(unsupported)}")
+
+        job = {
+            "_id": generate_uuid(),
+            "device_id": device_id,
+            "start": start,
+            "end": end,
+            "sensor_types": sensor_types,
+            "status": "pending",
+            "last_id": None,
+            "processed": 0,
+            "updated": 0,
+            "skipped": 0,
+            "docs_per_second": 0.0,
+            "cancel_requested": False,
+            "error": None,
+            "created_at": current_timestamp(),
+            "updated_at": current_timestamp()
+        }
+        dbJobs.insert_one(job)
+        return self._serialize(job)
+
+    def get_job(self, job_id):
+        """
+        Get job by ID
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Job data or None if not found
+        """
+        job = dbJobs.find_one({"_id": job_id})
+        return self._serialize(job) if job else None
+
+    def cancel_job(self, job_id):
+        """
+        Request cancellation of a job; a running job stops after its current chunk
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Job data or None if not found
+        """
+        job = dbJobs.find_one_and_update(
+            {"_id": job_id},
+            {"$set": {"cancel_requested": True, "updated_at": current_timestamp()}},
+            return_document=ReturnDocument.AFTER
+        )
+        return self._serialize(job) if job else None
+
+    def start_job(self, job_id, force=False):
+        """
+        Run a job in a background thread
+
+        Args:
+            job_id: ID of the job
+            force: Also take over a job still marked as running (see run_job)
+
+        Returns:
+            The started thread
+        """
+        thread = threading.Thread(
+            target=self.run_job,
+            args=(job_id,),
+            kwargs={"force": force},
+            name=f"recalibration-{job_id}",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def run_job(self, job_id, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None, force=False):
+        """
+        Run (or resume) a job until it completes, fails or is cancelled
+
+        Readings are streamed in _id order starting after the job's checkpoint,
+        so an interrupted job picks up where its last committed chunk ended.
+
+        Args:
+            job_id: ID of the job
+            progress_callback: Optional callable receiving job data after every chunk
+            force: Also take over a job still marked as running, e.g. after the
+                process running it died
+
+        Returns:
+            Final job data
+
+        Raises:
+            ValueError: If the job does not exist
+        """
+        excluded = ["completed"] if force else ["running", "completed"]
+        job = dbJobs.find_one_and_update(
+            {"_id": job_id, "status": {"$nin": excluded}},
+            {"$set": {"status": "running", "cancel_requested": False, "error": None, "updated_at": current_timestamp()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not job:
+            existing = self.get_job(job_id)
+            if not existing:
+                raise ValueError("Recalibration job not found")
+            return existing
+
+        try:
+            device = dbDevices.find_one({"device_id": job["device_id"]}, {"calibration_params": 1})
+            if not device:
+                raise ValueError("Device with this ID does not exist")
+            calibration_service = self.calibration_service.with_overrides(device.get("calibration_params"))
+
+            started = time.monotonic()
+            processed_this_run = 0
+            chunk = []
+            cursor = dbSensors.find(
+                self._build_query(job),
+                {"_id": 1, "sensor_type": 1, "raw_value": 1, "value": 1}
+            ).sort("_id", 1).batch_size(self.chunk_size)
+
+            for doc in cursor:
+                chunk.append(doc)
+                if len(chunk) < self.chunk_size:
+                    continue
+                job = self._commit_chunk(job, chunk, calibration_service, started, processed_this_run)
+                processed_this_run += len(chunk)
+                chunk = []
+                if progress_callback:
+                    progress_callback(self._serialize(job))
+                if job.get("cancel_requested"):
+                    cursor.close()
+                    return self._finish(job_id, "cancelled")
+                self._throttle(started, processed_this_run)
+
+            if chunk:
+                job = self._commit_chunk(job, chunk, calibration_service, started, processed_this_run)
+                if progress_callback:
+                    progress_callback(self._serialize(job))
+
+            return self._finish(job_id, "completed")
+        except Exception as e:
+            logger.error(f"Recalibration job {job_id} failed: {str(e)}")
+            return self._finish(job_id, "failed", str(e))
+
+    def build_updates(self, docs: List[Dict[str, Any]], calibration_service, job_id) -> List[UpdateOne]:
+        """
+        Recalibrate a chunk of readings and build the writes for changed values
+
+        Readings are grouped by sensor type and calibrated in one batch per type.
+
+        Args:
+            docs: Sensor documents with _id, sensor_type, raw_value and value
+            calibration_service: Calibration service holding the device's parameters
+            job_id: ID of the job, recorded on every rewritten reading
+
+        Returns:
+            List of UpdateOne operations, one per reading whose value changed
+        """
+        by_type = {}
+        for doc in docs:
+            by_type.setdefault(doc.get("sensor_type"), []).append(doc)
+
+        timestamp = current_timestamp()
+        updates = []
+        for sensor_type, typed_docs in by_type.items():
+            values = calibration_service.calibrate_batch(sensor_type, [doc.get("raw_value") for doc in typed_docs])
+            for doc, value in zip(typed_docs, values):
+                if value is None or doc.get("value") == float(value):
+                    continue
+                updates.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"value": float(value), "recalibrated_at": timestamp, "recalibration_job": job_id}}
+                ))
+        return updates
+
+    def _build_query(self, job):
+        """Build the sensor query for the remaining part of a job"""
+        query = {
+            "device_id": job["device_id"],
+            "sensor_type": {"$in": job["sensor_types"]},
+            "raw_value": {"$type": "number"}
+        }
+        if job.get("start") or job.get("end"):
+            query["timestamp"] = {}
+            if job.get("start"):
+                query["timestamp"]["$gte"] = job["start"]
+            if job.get("end"):
+                query["timestamp"]["$lt"] = job["end"]
+        if job.get("last_id") is not None:
+            query["_id"] = {"$gt": job["last_id"]}
+        return query
+
+    def _commit_chunk(self, job, chunk, calibration_service, started, processed_before):
+        """Write one chunk back and checkpoint the job; returns the refreshed job document"""
+        updates = self.build_updates(chunk, calibration_service, job["_id"])
+        if updates:
+            dbSensors.bulk_write(updates, ordered=False)
+            # Readings changed, so conditional GETs of the device's sensors must miss
+            dbDevices.update_one({"device_id": job["device_id"]}, {"$inc": {"version": 1}})
+
+        elapsed = time.monotonic() - started
+        processed = processed_before + len(chunk)
+        rate = round(processed / elapsed, 1) if elapsed > 0 else 0.0
+
+        job = dbJobs.find_one_and_update(
+            {"_id": job["_id"]},
+            {
+                "$set": {"last_id": chunk[-1]["_id"], "docs_per_second": rate, "updated_at": current_timestamp()},
+                "$inc": {"processed": len(chunk), "updated": len(updates), "skipped": len(chunk) - len(updates)}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        logger.info(
+            f"Recalibration job {job['_id']}: {job['processed']} processed, "
+            f"{job['updated']} updated, {rate} docs/s"
+        )
+        return job
+
+    def _throttle(self, started, processed):
+        """Sleep long enough to keep the run under max_docs_per_second"""
+        if not self.max_docs_per_second:
+            return
+        ahead = processed / self.max_docs_per_second - (time.monotonic() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    def _finish(self, job_id, status, error=None):
+        """Record the final status of a run"""
+        job = dbJobs.find_one_and_update(
+            {"_id": job_id},
+            {"$set": {"status": status, "error": error, "updated_at": current_timestamp()}},
+            return_document=ReturnDocument.AFTER
+        )
+        return self._serialize(job)
+
+    @staticmethod
+    def _serialize(job):
+        """Convert a job document into response data"""
+        data = {**job, "job_id": job["_id"]}
+        del data["_id"]
+        if data.get("last_id") is not None:
+            data["last_id"] = str(data["last_id"])
+        return data
@@ -0,0 +1,179 @@
+"""
+Application-scoped service registry
+"""
+
+import atexit
+import logging
+import threading
+import weakref
+from flask import current_app
+
+from app.services.anomaly_service import anomaly_service
+from app.services.api_key_service import ApiKeyService
+from app.services.calibration_service import CalibrationService
+from app.services.device_service import DeviceService
+from app.services.device_token_service import DeviceTokenService
+from app.services.example_service import ExampleService
+from app.services.health_service import health_checker
+from app.services.recalibration_service import RecalibrationService
+from app.services.sensor_service import SensorService
+
+logger = logging.getLogger(__name__)
+
+# Registries of the live applications, shut down by one exit hook per process
+_registries = weakref.WeakSet()
+
+
+class ServiceRegistry:
+    """
+    Lazily built, process-wide service instances with warmup and shutdown hooks
+
+    Each service is created once per application on first use and then shared
+    by every request, thread and greenlet, so caches and warmed state survive
+    between requests. Services must therefore keep per-request state out of
+    their attributes.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._order = []
+        self._lock = threading.RLock()
+        self._shut_down = False
+
+    def init_app(self, app):
+        """Attach the registry to a Flask application"""
+        app.extensions['services'] = self
+        _registries.add(self)
+
+    def register(self, name, factory, warmup=None, shutdown=None):
+        """
+        Register a service factory
+
+        Args:
+            name: Name the service is looked up by
+            factory: Callable taking the registry and returning the instance
+            warmup: Optional callable run with the instance by warmup()
+            shutdown: Optional callable run with the instance by shutdown()
+        """
+        with self._lock:
+            if name in self._factories:
+                raise ValueError(f"Service '{name}' is already registered")
+            self._factories[name] = (factory, warmup, shutdown)
+
+    def get(self, name):
+        """
+        Get a service, creating it on first use
+
+        Args:
+            name: Name of the service
+
+        Returns:
+            The shared service instance
+
+        Raises:
+            KeyError: If no service is registered under the name
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                factory = self._factories[name][0]
+                instance = factory(self)
+                self._instances[name] = instance
+                self._order.append(name)
+            return instance
+
+    def warmup(self):
+        """Create every registered service and run its warmup hook"""
+        for name, (_, warmup, _) in list(self._factories.items()):
+            instance = self.get(name)
+            if warmup:
+                warmup(instance)
+                logger.info(f"Warmed up service '{name}'")
+
+    def shutdown(self, done=None):
+        """
+        Run shutdown hooks in reverse creation order; safe to call more than once
+
+        Args:
+            done: Optional set of ids of instances already shut down, updated in
+                place, so process-wide singletons shared by several registries
+                (e.g. the anomaly service) are shut down once
+        """
+        with self._lock:
+            if self._shut_down:
+                return
+            self._shut_down = True
+            created = [(name, self._instances[name]) for name in reversed(self._order)]
+        for name, instance in created:
+            hook = self._factories[name][2]
+            if not hook:
+                continue
+            if done is not None:
+                if id(instance) in done:
+                    continue
+                done.add(id(instance))
+            try:
+                hook(instance)
+            except Exception as e:
+                logger.warning(f"Shutdown of service '{name}' failed: {str(e)}")
+
+
+@atexit.register
+def _shutdown_registries():
+    """Shut down every live application's services once at interpreter exit"""
+    done = set()
+    for registry in list(_registries):
+        registry.shutdown(done)
+
+
+def create_registry(app):
+    """
+    Build the registry with the application's services
+
+    Args:
+        app: Flask application
+
+    Returns:
+        ServiceRegistry attached to the application
+    """
+    registry = ServiceRegistry()
+    registry.register('calibration', lambda services: CalibrationService(),
+                      warmup=lambda service: service.warmup())
+    registry.register('anomaly', lambda services: anomaly_service,
+                      shutdown=lambda service: service.flush())
+    registry.register('device', lambda services: DeviceService(calibration_service=services.get('calibration')))
+    registry.register('sensor', lambda services: SensorService(calibration_service=services.get('calibration')))
+    registry.register('recalibration', lambda services: RecalibrationService(calibration_service=services.get('calibration')))
+    registry.register('example', lambda services: ExampleService())
+    # Device tokens are signed with their own secret, never with SECRET_KEY and its committed default
+    if app.config.get('DEVICE_TOKEN_SECRET'):
+        registry.register('device_tokens', lambda services: DeviceTokenService(
+            app.config['DEVICE_TOKEN_SECRET'],
+            ttl=app.config.get('DEVICE_TOKEN_TTL'),
+            refresh_interval=app.config.get('DEVICE_TOKEN_REVOCATION_REFRESH', 30.0)
+        ))
+    elif app.config.get('DEVICE_AUTH_REQUIRED', True):
+        raise ValueError("DEVICE_TOKEN_SECRET is required while DEVICE_AUTH_REQUIRED is on")
+    registry.register('api_keys', lambda services: ApiKeyService(legacy_key=app.config.get('API_KEY')),
+                      shutdown=lambda service: service.stop())
+    registry.register('health', lambda services: health_checker,
+                      shutdown=lambda checker: checker.stop())
+    registry.init_app(app)
+    return registry
+
+
+def get_service(name):
+    """
+    Get a service of the current application
+
+    Args:
+        name: Name of the service, e.g. 'device' or 'sensor'
+
+    Returns:
+        The shared service instance
+    """
+    return current_app.extensions['services'].get(name)
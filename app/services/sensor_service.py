@@ -8,6 +8,9 @@ from app.models.sensor_model import SensorModel
 from app.utils.helpers import generate_uuid, current_timestamp
 from app.utils.database import DatabaseMongo
 from app.services.calibration_service import CalibrationService
+from app.services.anomaly_service import anomaly_service
+from app.services.device_service import bump_devices_version
+from app.storage.response_cache import response_cache
 from bson import ObjectId
 
 dbSensors = DatabaseMongo.db.sensors
@@ -15,9 +18,16 @@ dbDevices = DatabaseMongo.db.devices
 class SensorService:
     """Service class for handling sensor-related operations"""
     
-    def __init__(self):
-        """Initialize the service with calibration service"""
-        self.calibration_service = CalibrationService()
+    def __init__(self, calibration_service=None):
+        """
+        Initialize the service with calibration and anomaly services
+
+        Args:
+            calibration_service: Shared calibration service (defaults to a new CalibrationService)
+        """
+        self.calibration_service = calibration_service or CalibrationService()
+        self.anomaly_service = anomaly_service
+
     def get_all_sensors(self, device_id):
         """
         Get all sensor data for a specific device
@@ -58,10 +68,18 @@ class SensorService:
         raw_value = float(data.get("value"))
         sensor_type = data.get("sensor_type", "").lower()
         
-        # Apply calibration based on sensor type
-        calibrated_result = self._apply_calibration(sensor_type, raw_value)
+        # Apply calibration based on sensor type, honouring per-device parameter overrides
+        calibration_service = self.calibration_service.with_overrides(check.get("calibration_params"))
+        calibrated_result = self._apply_calibration(sensor_type, raw_value, calibration_service)
         calibrated_value = calibrated_result.get('value', 0.0)
         calibrated_unit = calibrated_result.get('unit', data.get("unit", ""))
+
+        # Score the raw reading before it is persisted; iot_data scores raw payload values
+        # in the same window, and raw values keep their meaning across recalibrations
+        anomaly = self.anomaly_service.observe(device_id, sensor_type, raw_value)
+        if anomaly.is_anomaly and self.anomaly_service.drop_anomalies:
+            raise ValueError(f"Reading rejected as anomalous (score {anomaly.score})")
+
         sensor = {
             "device_id": device_id,
             "timestamp": current_timestamp(),
@@ -69,6 +87,7 @@ class SensorService:
             "value": float(calibrated_value),  # Use calibrated value
             "raw_value": float(raw_value),     # Store original raw value
             "unit": calibrated_unit,    # Use calibrated unit
+            "anomaly_score": anomaly.score,
             # "calibration_data": calibrated_result,  # Store full calibration info
             # "status": 1,
         }
@@ -80,35 +99,41 @@ class SensorService:
                 "unit": calibrated_unit,
                 "calibration_date": current_timestamp(),
                 "calibration_data": calibrated_result,
+                "anomaly_score": anomaly.score,
                 "status": True,
                 "type": sensor_type
             }
         }
 
-        merged = {**existing_sensors, **updateSensor}
-        dbDevices.update_one({"device_id": device_id}, {"$set": {"sensors": merged}})
+        # Store the reading before bumping the version, so a read seeing the new version also sees it
         result = dbSensors.insert_one(sensor)
+        merged = {**existing_sensors, **updateSensor}
+        dbDevices.update_one({"device_id": device_id}, {"$set": {"sensors": merged}, "$inc": {"version": 1}})
+        bump_devices_version()
+        response_cache.invalidate("devices", f"device:{device_id}")
         inserted_doc = dbSensors.find_one({"_id": result.inserted_id})
         return {"sensor": SensorModel.from_mongo(inserted_doc).dict()}
     
-    def _apply_calibration(self, sensor_type, raw_value):
+    def _apply_calibration(self, sensor_type, raw_value, calibration_service=None):
         """
         Apply calibration based on sensor type
         
         Args:
             sensor_type: Type of sensor (ph, tds, turbidity)
             raw_value: Raw sensor value
+            calibration_service: Calibration service to use (defaults to the service's own)
             
         Returns:
             Dictionary containing calibrated value and metadata
         """
+        calibration_service = calibration_service or self.calibration_service
         try:
             if sensor_type == "ph":
-                return self.calibration_service.calibrate_ph(raw_value)
+                return calibration_service.calibrate_ph(raw_value)
             elif sensor_type == "tds":
-                return self.calibration_service.calibrate_tds(raw_value)
+                return calibration_service.calibrate_tds(raw_value)
             elif sensor_type == "turbidity":
-                return self.calibration_service.calibrate_turbidity(raw_value)
+                return calibration_service.calibrate_turbidity(raw_value)
             else:
                 # For unknown sensor types, return default values
                 return {
@@ -174,6 +199,7 @@ class SensorService:
         }
 
         dbSensors.update_one({"_id": ObjectId(sensor_id)}, {"$set": update_data})
+        dbDevices.update_one({"device_id": sensor.get("device_id")}, {"$inc": {"version": 1}})
 
         sensorUpdated = dbSensors.find_one({"_id": ObjectId(sensor_id)})
         return {"sensor": SensorModel.from_mongo(sensorUpdated).dict()}
@@ -194,6 +220,7 @@ class SensorService:
         if not sensor:
             return False
         dbSensors.delete_one({"_id": ObjectId(sensor_id)})
+        dbDevices.update_one({"device_id": device_id}, {"$inc": {"version": 1}})
 
         return {"sensor": SensorModel.from_mongo(sensor).dict()}
 
@@ -1,6 +1,8 @@
 import os
 import redis, json
 
+from app.utils.db_instrumentation import db_instrumentation
+
 # koneksi redis
 # redis_client = redis.Redis(host="localhost", port=6379, db=0, decode_responses=True)
 # Redis Cloud connection from environment variables
@@ -12,6 +14,7 @@ redis_client = redis.Redis(
     decode_responses=True,
     client_name=os.environ.get("REDIS_CLIENT_NAME", "database-MFDVSCZD")
 )
+db_instrumentation.instrument_redis(redis_client)  # per-request command counts and slow-command log
 REDIS_KEY = "connected_devices"
 
 
@@ -82,3 +85,4 @@ def save_payload(device_id: str, payload: dict, sid: str):
 
     print(f"INFO: Payload saved for {device_id} by SID {sid} → {payload}")
     return True
+
@@ -0,0 +1,245 @@
+"""
+Redis-backed read-through cache for API reads
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+import redis
+
+from app.storage.redis_storage import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Takes the key's load lock and registers the key under its tags before the
+# load, so an invalidation racing the load can cancel it. The tag sets get the
+# value's TTL right away: a load that stores nothing (e.g. a 404) must not
+# leave a tag set behind that never expires.
+LOCK_SCRIPT = """
+local acquired = redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2])
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], ARGV[3])
+    if redis.call('TTL', KEYS[i]) < tonumber(ARGV[4]) then
+        redis.call('EXPIRE', KEYS[i], ARGV[4])
+    end
+end
+if acquired then
+    return 1
+end
+return 0
+"""
+
+# Stores a loaded value only if this loader still holds the key's lock. An
+# invalidation that ran while the value was being loaded deleted the lock, so
+# the (possibly stale) value is discarded instead of cached.
+STORE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+for i = 3, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[2])
+    -- tag sets must outlive every key they reference
+    if redis.call('TTL', KEYS[i]) < tonumber(ARGV[3]) then
+        redis.call('EXPIRE', KEYS[i], ARGV[3])
+    end
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+
+class ResponseCache:
+    """
+    Read-through cache keyed by route and query parameters
+
+    Every cached key is registered under one or more tags (e.g. ``devices``,
+    ``device:<id>``). Writes invalidate exactly the keys of the tags they
+    touch. Concurrent misses on the same key are collapsed: one caller loads
+    while the others wait for the value to appear.
+    """
+
+    def __init__(self, client=None, prefix="cache"):
+        self.client = client or redis_client
+        self.prefix = prefix
+        self.enabled = True
+        self.ttl = 60
+        self.lock_ttl_ms = 5000
+        self.lock_wait = 2.0
+        self._lock = None
+        self._store = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'stores': 0, 'discarded': 0,
+                       'invalidations': 0, 'errors': 0}
+
+    def init_app(self, app):
+        """Configure the cache from the Flask application config"""
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        self.ttl = app.config.get('CACHE_TTL', 60)
+        self.lock_ttl_ms = app.config.get('CACHE_LOCK_TTL_MS', 5000)
+        self.lock_wait = app.config.get('CACHE_LOCK_WAIT', 2.0)
+
+    def key(self, route, params=None, version=None):
+        """
+        Build a cache key for a route and its query parameters
+
+        Writes bump the version before they invalidate, so a read that sees the
+        new version must not be served a body cached under the old one; pass
+        the version the ETag is built from to keep the two in step.
+
+        Args:
+            route: Logical route name, e.g. 'devices'
+            params: Mapping of query parameters (order does not matter)
+            version: Version of the resource, e.g. the (document id, version) tuple
+
+        Returns:
+            str: Cache key
+        """
+        items = sorted((params or {}).items())
+        digest = hashlib.sha1(json.dumps(items, default=str).encode('utf-8')).hexdigest()[:16]
+        if version is None:
+            return f"{self.prefix}:{route}:{digest}"
+        parts = version if isinstance(version, (tuple, list)) else (version,)
+        return f"{self.prefix}:{route}:v{'-'.join(str(part) for part in parts)}:{digest}"
+
+    def get_or_set(self, key, loader, tags, ttl=None):
+        """
+        Return the cached value for a key, loading and caching it on a miss
+
+        Args:
+            key: Cache key from key()
+            loader: Callable producing the value; None results are not cached
+            tags: Tags the key is invalidated by
+            ttl: Seconds to keep the value (defaults to CACHE_TTL)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        if not self.enabled:
+            return loader()
+
+        try:
+            cached = self.client.get(key)
+            if cached is not None:
+                self._count('hits')
+                return json.loads(cached)
+            self._count('misses')
+
+            token = uuid.uuid4().hex
+            lock_key = f"{key}:lock"
+            acquired = self._get_lock()(
+                keys=[lock_key] + [self._tag_key(tag) for tag in tags],
+                args=[token, self.lock_ttl_ms, key, ttl or self.ttl]
+            )
+        except redis.RedisError as e:
+            self._count('errors')
+            logger.warning(f"Cache unavailable, loading {key} directly: {str(e)}")
+            return loader()
+
+        if not acquired:
+            value = self._wait_for(key)
+            if value is not None:
+                return value
+            return loader()
+
+        value = loader()
+        if value is None:
+            self._release(lock_key, token)
+            return None
+        try:
+            stored = self._get_store()(
+                keys=[lock_key, key] + [self._tag_key(tag) for tag in tags],
+                args=[token, json.dumps(value, default=str), ttl or self.ttl]
+            )
+            self._count('stores' if stored else 'discarded')
+        except redis.RedisError as e:
+            self._count('errors')
+            logger.warning(f"Could not cache {key}: {str(e)}")
+        return value
+
+    def invalidate(self, *tags):
+        """
+        Drop every cached key registered under the given tags
+
+        Loads in flight for those keys are cancelled as well, so they cannot
+        write back data read before the change.
+
+        Args:
+            *tags: Tags to invalidate
+        """
+        if not self.enabled or not tags:
+            return
+        try:
+            tag_keys = [self._tag_key(tag) for tag in tags]
+            pipe = self.client.pipeline(transaction=False)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            keys = set().union(*pipe.execute())
+            doomed = list(keys) + [f"{key}:lock" for key in keys] + tag_keys
+            self.client.delete(*doomed)
+            self._count('invalidations')
+        except redis.RedisError as e:
+            self._count('errors')
+            logger.warning(f"Could not invalidate cache tags {tags}: {str(e)}")
+
+    def stats(self):
+        """
+        Get hit/miss counters for this worker
+
+        Returns:
+            Dictionary of counters and the hit ratio
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+        return stats
+
+    def _wait_for(self, key):
+        """Poll for a value another caller is loading; None if it does not appear in time"""
+        self._count('waits')
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.01
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+            try:
+                cached = self.client.get(key)
+            except redis.RedisError:
+                return None
+            if cached is not None:
+                return json.loads(cached)
+        return None
+
+    def _release(self, lock_key, token):
+        """Release a lock this caller still holds"""
+        try:
+            if self.client.get(lock_key) == token:
+                self.client.delete(lock_key)
+        except redis.RedisError:
+            pass
+
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = self.client.register_script(LOCK_SCRIPT)
+        return self._lock
+
+    def _get_store(self):
+        if self._store is None:
+            self._store = self.client.register_script(STORE_SCRIPT)
+        return self._store
+
+    def _tag_key(self, tag):
+        return f"{self.prefix}:tag:{tag}"
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+
+# Shared instance, configured by create_app through init_app
+response_cache = ResponseCache()
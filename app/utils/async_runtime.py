@@ -0,0 +1,131 @@
+"""
+Background event loop for async views
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    One event loop per worker process, running in a daemon thread
+
+    Flask runs ``async def`` views through ``app.async_to_sync``, which by
+    default starts a fresh event loop for every request. Clients such as
+    ``pymongo.AsyncMongoClient`` are bound to the loop they were first used
+    on and keep their connection pool there, so every async view is instead
+    scheduled on this long-lived loop. The request's context variables are
+    copied along, so ``request``, ``g`` and ``current_app`` work inside the
+    coroutine.
+    """
+
+    def __init__(self, timeout=None):
+        """
+        Initialize the runtime
+
+        Args:
+            timeout: Seconds to wait for a coroutine before giving up (None waits forever)
+        """
+        self.timeout = timeout
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Run the application's async views on this runtime"""
+        self.timeout = app.config.get('ASYNC_VIEW_TIMEOUT', self.timeout)
+        app.async_to_sync = self.async_to_sync
+
+    @property
+    def loop(self):
+        """The running event loop of this process, started on first use"""
+        if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    self._start()
+        return self._loop
+
+    def run(self, coro, timeout=None):
+        """
+        Run a coroutine on the loop and wait for its result
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait (defaults to the runtime timeout)
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            TimeoutError: If the coroutine did not finish in time (it is cancelled)
+        """
+        loop = self.loop
+        context = contextvars.copy_context()
+        future = concurrent.futures.Future()
+
+        def start():
+            task = loop.create_task(coro, context=context)
+            task.add_done_callback(functools.partial(self._resolve, future))
+            future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+        loop.call_soon_threadsafe(start)
+        try:
+            return future.result(timeout if timeout is not None else self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError("Async view did not finish in time")
+
+    def async_to_sync(self, func):
+        """
+        Wrap a coroutine function so it can be called from a sync worker thread
+
+        Args:
+            func: Coroutine function, e.g. an ``async def`` view
+
+        Returns:
+            Sync callable that runs func on the loop
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(func(*args, **kwargs))
+        return wrapper
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name='async-runtime', daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+        self._pid = os.getpid()
+        logger.info("Started async runtime event loop")
+
+    @staticmethod
+    def _resolve(future, task):
+        try:
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        except concurrent.futures.InvalidStateError:
+            pass  # the caller timed out and cancelled the future
+
+
+# Shared instance, configured by create_app through init_app when ASYNC_VIEWS is enabled
+async_runtime = AsyncRuntime()
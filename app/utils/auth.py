@@ -2,39 +2,122 @@
 API Authentication and Security Utilities
 """
 
+import inspect
 import os
 from functools import wraps
-from flask import request, current_app, abort
+from flask import request, current_app, abort, g
 
-def require_api_key(f):
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+# WSGI environ key under which POST /batch hands its validated key record to sub-requests
+BATCH_API_KEY_ENVIRON = 'dispenser.batch.api_key'
+
+
+def current_api_key():
+    """
+    Get the key record of the current request's X-API-Key
+
+    The lookup runs once per request and is cached on ``g``, so the rate
+    limiter and the view share it. Sub-requests of a batch reuse the record
+    the batch request was authenticated with.
+
+    Returns:
+        Key record (key_id, name, scopes, quota_per_minute) or None
+    """
+    batch_key = request.environ.get(BATCH_API_KEY_ENVIRON)
+    if batch_key is not None:
+        return batch_key
+
+    header = request.headers.get('X-API-Key')
+    if 'api_key' not in g or g.get('api_key_header') != header:
+        from app.services.registry import get_service
+
+        api_key_service = get_service('api_keys')
+        if current_app.config.get('API_KEY_REGISTRY_ENABLED', True):
+            api_key_service.ensure_loaded()
+        g.api_key = api_key_service.authenticate(header)
+        g.api_key_header = header
+    return g.api_key
+
+
+def has_scope(key, scope):
+    """Check whether a key record grants a scope"""
+    return '*' in key['scopes'] or scope in key['scopes']
+
+
+def _authorize_request(scope=None):
+    """Abort unless the request carries a valid API key with the given scope, by default the one its method needs"""
+    # Check if API key is provided
+    if not request.headers.get('X-API-Key'):
+        abort(403, description='API key is missing')
+    
+    # Validate API key
+    key = current_api_key()
+    if key is None:
+        abort(401, description='Invalid API key')
+    
+    if scope is None:
+        scope = 'read' if request.method in READ_METHODS else 'write'
+    if not has_scope(key, scope):
+        abort(403, description=f"API key lacks the '{scope}' scope")
+
+
+def require_api_key(f=None, scope=None):
     """
     Decorator to require API key authentication
     
+    Reads need the 'read' scope, every other method the 'write' scope. The
+    key record is available to the view as ``g.api_key``. Works on both
+    sync and ``async def`` views. Use ``@require_api_key(scope='read')`` for
+    a view whose method does not say what it does, e.g. POST /batch.
+    
     Args:
         f: Function to decorate
+        scope: Scope to require instead of the one the method needs
         
     Returns:
         Decorated function that requires API key
     """
+    if f is None:
+        return lambda f: require_api_key(f, scope=scope)
+
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def async_decorated_function(*args, **kwargs):
+            _authorize_request(scope)
+            return await f(*args, **kwargs)
+        
+        return async_decorated_function
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get API key from headers
-        api_key = request.headers.get('X-API-Key')
-        
-        # Check if API key is provided
-        if not api_key:
-            abort(403, description='API key is missing')
-        
-        # Validate API key
-        expected_api_key = current_app.config.get('API_KEY')
-        if api_key != expected_api_key:
-            abort(401, description='Invalid API key')
-        
+        _authorize_request(scope)
         return f(*args, **kwargs)
     
     return decorated_function
 
 
+def require_scope(scope):
+    """
+    Decorator to require an additional scope, applied below require_api_key
+    
+    Args:
+        scope: Scope the API key must grant, e.g. 'admin'
+        
+    Returns:
+        Decorator function
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not has_scope(current_api_key(), scope):
+                abort(403, description=f"API key lacks the '{scope}' scope")
+            return f(*args, **kwargs)
+        
+        return decorated_function
+    return decorator
+
+
 def validate_json_payload(required_fields=None):
     """
     Decorator to validate JSON payload
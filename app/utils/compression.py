@@ -0,0 +1,152 @@
+"""
+Content-negotiated response compression
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+class _GzipStream:
+    """Incremental gzip compressor flushing after every chunk"""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    """Incremental brotli compressor flushing after every chunk"""
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    """Incremental zstd compressor flushing after every chunk"""
+
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def _compress_gzip(data, level):
+    return gzip.compress(data, compresslevel=level)
+
+
+def _compress_brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def _compress_zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+# encoding -> (available, one-shot compressor, streaming compressor, level config key)
+ENCODINGS = {
+    'br': (brotli is not None, _compress_brotli, _BrotliStream, 'COMPRESS_BR_LEVEL'),
+    'zstd': (zstandard is not None, _compress_zstd, _ZstdStream, 'COMPRESS_ZSTD_LEVEL'),
+    'gzip': (True, _compress_gzip, _GzipStream, 'COMPRESS_LEVEL'),
+}
+
+
+def available_encodings(preferred):
+    """
+    Filter a preference list down to the encodings installed in this process
+
+    Args:
+        preferred: Encodings in server preference order, e.g. ['br', 'zstd', 'gzip']
+
+    Returns:
+        List of usable encodings in the same order
+    """
+    return [name for name in preferred if name in ENCODINGS and ENCODINGS[name][0]]
+
+
+def _stream(iterable, compressor):
+    """Compress a streamed body chunk by chunk so clients receive data as it is produced"""
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def init_compression(app):
+    """Register response compression for the Flask application"""
+    encodings = available_encodings(app.config.get('COMPRESS_ALGORITHMS', ['gzip']))
+    mimetypes = set(app.config.get('COMPRESS_MIMETYPES', ['application/json']))
+    min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    compress_streams = app.config.get('COMPRESS_STREAMS', True)
+
+    if not app.config.get('COMPRESS_ENABLED', True) or not encodings:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in mimetypes:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (request.method == 'HEAD'
+                or response.status_code < 200
+                or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough):
+            return response
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if not encoding:
+            return response
+        _, compress, stream_class, level_key = ENCODINGS[encoding]
+        level = app.config.get(level_key)
+
+        if response.is_streamed:
+            if not compress_streams:
+                return response
+            response.response = _stream(response.response, stream_class(level))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, level))
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -4,6 +4,7 @@ Application Configuration
 
 import os
 from dotenv import load_dotenv
+from app.utils.rate_limit import redis_storage_uri
 
 # Load environment variables
 load_dotenv()
@@ -19,15 +20,87 @@ class Config:
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     
     # API Configuration
-    API_KEY = os.environ.get('API_KEY')
+    API_KEY = os.environ.get('API_KEY')  # bootstrap key with every scope; per-operator keys live in MongoDB
+    API_KEY_REGISTRY_ENABLED = os.environ.get('API_KEY_REGISTRY_ENABLED', 'True').lower() == 'true'
+    API_KEY_REFRESH_INTERVAL = int(os.environ.get('API_KEY_REFRESH_INTERVAL', 300))  # seconds between full reloads
     API_VERSION = os.environ.get('API_VERSION', 'v1')
     
     # Server Configuration
     HOST = os.environ.get('HOST', '0.0.0.0')
     PORT = int(os.environ.get('PORT', 5000))
     
-    # Rate Limiting
-    RATE_LIMIT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_PER_MINUTE', 60))
+    # Rate Limiting (counted in Redis so the budget is shared by all workers)
+    RATE_LIMIT_PER_MINUTE = int(os.environ.get('RATE_LIMIT_PER_MINUTE', 60))  # per API key
+    RATE_LIMIT_DEVICE_PER_MINUTE = int(os.environ.get('RATE_LIMIT_DEVICE_PER_MINUTE', 120))  # telemetry per device
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI') or redis_storage_uri()
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'moving-window')
+    RATELIMIT_KEY_PREFIX = 'ratelimit'
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True  # keep limiting per worker if Redis is down
+    RATELIMIT_HEADERS_ENABLED = False  # headers cost an extra Redis round trip per request
+    
+    # JSON Responses
+    JSON_FAST_PROVIDER = os.environ.get('JSON_FAST_PROVIDER', 'True').lower() == 'true'
+    JSON_PRETTY = os.environ.get('JSON_PRETTY', 'False').lower() == 'true'
+    JSON_SORT_KEYS = os.environ.get('JSON_SORT_KEYS', 'False').lower() == 'true'
+    
+    # Response Compression
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_ALGORITHMS = [a.strip() for a in os.environ.get('COMPRESS_ALGORITHMS', 'br,zstd,gzip').split(',') if a.strip()]
+    COMPRESS_MIMETYPES = ['application/json', 'application/x-ndjson', 'text/plain', 'text/csv']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip, 1-9
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))  # brotli, 0-11
+    COMPRESS_ZSTD_LEVEL = int(os.environ.get('COMPRESS_ZSTD_LEVEL', 3))  # zstd, 1-22
+    COMPRESS_STREAMS = os.environ.get('COMPRESS_STREAMS', 'True').lower() == 'true'
+    
+    # Async Views (device and sensor reads on pymongo's AsyncMongoClient; needs a threaded worker, not eventlet)
+    ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False').lower() == 'true'
+    ASYNC_VIEW_TIMEOUT = float(os.environ.get('ASYNC_VIEW_TIMEOUT', 30.0))  # seconds
+    
+    # Realtime Updates (Socket.IO iot_update fan-out)
+    IOT_UPDATE_MAX_RATE = float(os.environ.get('IOT_UPDATE_MAX_RATE', 5.0))  # Hz per frontend, latest payload wins
+    IOT_SEND_QUEUE_SIZE = int(os.environ.get('IOT_SEND_QUEUE_SIZE', 50))  # messages held per slow frontend, oldest dropped
+    IOT_SEND_MAX_BACKLOG = int(os.environ.get('IOT_SEND_MAX_BACKLOG', 20))  # transport packets before a frontend counts as slow
+    IOT_SLOW_CONSUMER_TIMEOUT = float(os.environ.get('IOT_SLOW_CONSUMER_TIMEOUT', 30.0))  # seconds slow before disconnect
+    SOCKET_CONNECT_RATE = float(os.environ.get('SOCKET_CONNECT_RATE', 20.0))  # connects admitted per second
+    SOCKET_CONNECT_BURST = int(os.environ.get('SOCKET_CONNECT_BURST', 40))
+    SOCKET_CONNECT_MAX_RETRY_AFTER = float(os.environ.get('SOCKET_CONNECT_MAX_RETRY_AFTER', 30.0))  # seconds
+    COMMAND_ACK_TIMEOUT = float(os.environ.get('COMMAND_ACK_TIMEOUT', 1.0))  # seconds before a command is resent
+    COMMAND_MAX_RETRIES = int(os.environ.get('COMMAND_MAX_RETRIES', 2))
+    
+    # Device Tokens (HMAC-signed Socket.IO credentials)
+    DEVICE_AUTH_REQUIRED = os.environ.get('DEVICE_AUTH_REQUIRED', 'True').lower() == 'true'
+    DEVICE_TOKEN_SECRET = os.environ.get('DEVICE_TOKEN_SECRET')  # required while DEVICE_AUTH_REQUIRED is on
+    DEVICE_TOKEN_TTL = int(os.environ.get('DEVICE_TOKEN_TTL', 90 * 24 * 3600))  # seconds
+    DEVICE_TOKEN_REVOCATION_REFRESH = float(os.environ.get('DEVICE_TOKEN_REVOCATION_REFRESH', 30.0))  # seconds between revocation reloads
+    
+    # Metrics (Prometheus, GET /metrics)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'  # /metrics, needs prometheus_client
+    
+    # Database Instrumentation (command counts per request, slow-command log)
+    DB_SLOW_COMMAND_MS = float(os.environ.get('DB_SLOW_COMMAND_MS', 100.0))  # log Mongo/Redis commands at least this slow
+    DB_STATS_HEADER = os.environ.get('DB_STATS_HEADER', 'False').lower() == 'true'  # X-DB-Commands/Server-Timing headers (always on in debug)
+    PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS', 60.0))  # longest POST /admin/profile
+    
+    # Batch Requests (POST /batch)
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))  # sub-requests per batch
+    BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 8))  # concurrent reads per worker process
+    
+    # Services
+    SERVICES_WARMUP = os.environ.get('SERVICES_WARMUP', 'True').lower() == 'true'  # build caches at startup
+    
+    # Health Checks (background pings behind /health/ready)
+    HEALTH_CHECK_ENABLED = os.environ.get('HEALTH_CHECK_ENABLED', 'True').lower() == 'true'
+    HEALTH_CHECK_INTERVAL = float(os.environ.get('HEALTH_CHECK_INTERVAL', 5.0))  # seconds
+    HEALTH_CHECK_STALE_AFTER = float(os.environ.get('HEALTH_CHECK_STALE_AFTER', 15.0))  # seconds
+    # Seconds the first readiness probe waits for the first round of checks
+    HEALTH_CHECK_STARTUP_WAIT = float(os.environ.get('HEALTH_CHECK_STARTUP_WAIT', 1.0))
+    
+    # Response Cache (Redis read-through for device reads)
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'True').lower() == 'true'
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 60))  # seconds
+    CACHE_LOCK_TTL_MS = int(os.environ.get('CACHE_LOCK_TTL_MS', 5000))
+    CACHE_LOCK_WAIT = float(os.environ.get('CACHE_LOCK_WAIT', 2.0))  # seconds to wait for a concurrent load
     
     # CORS Configuration
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*')
@@ -35,12 +108,30 @@ class Config:
     # Database Configuration (if needed)
     DATABASE_URL = os.environ.get('MONGODB_URI')
     DATABASE_NAME = os.environ.get('MONGODB_DATABASE', 'dispenser_db')
+    
+    # Recalibration Backfill
+    RECALIBRATION_CHUNK_SIZE = int(os.environ.get('RECALIBRATION_CHUNK_SIZE', 500))
+    RECALIBRATION_MAX_RATE = int(os.environ.get('RECALIBRATION_MAX_RATE', 2000))  # readings per second, 0 = unthrottled
+    
+    # Anomaly Detection at Ingestion
+    ANOMALY_WINDOW = int(os.environ.get('ANOMALY_WINDOW', 60))  # readings per rolling window
+    ANOMALY_EWMA_ALPHA = float(os.environ.get('ANOMALY_EWMA_ALPHA', 0.2))
+    ANOMALY_THRESHOLD = float(os.environ.get('ANOMALY_THRESHOLD', 6.0))  # score in standard deviations
+    ANOMALY_MIN_SAMPLES = int(os.environ.get('ANOMALY_MIN_SAMPLES', 10))
+    ANOMALY_DROP = os.environ.get('ANOMALY_DROP', 'False').lower() == 'true'
+    # Consecutive dropped readings after which the window restarts from them (0 never)
+    ANOMALY_REBASELINE_AFTER = int(os.environ.get('ANOMALY_REBASELINE_AFTER', 10))
+    ANOMALY_SPILL_EVERY = int(os.environ.get('ANOMALY_SPILL_EVERY', 20))
+    ANOMALY_MAX_TRACKED = int(os.environ.get('ANOMALY_MAX_TRACKED', 10000))
+    ANOMALY_STATE_TTL = int(os.environ.get('ANOMALY_STATE_TTL', 86400))  # seconds
 
     @staticmethod
     def validate_config():
         """Validate required configuration"""
         if not Config.API_KEY:
             raise ValueError("API_KEY environment variable is required")
+        if Config.DEVICE_AUTH_REQUIRED and not Config.DEVICE_TOKEN_SECRET:
+            raise ValueError("DEVICE_TOKEN_SECRET environment variable is required while DEVICE_AUTH_REQUIRED is on")
 
 
 class DevelopmentConfig(Config):
@@ -60,6 +151,11 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     API_KEY = 'test-api-key'
+    CACHE_ENABLED = False
+    DEVICE_TOKEN_SECRET = 'test-device-token-secret'
+    RATELIMIT_STORAGE_URI = 'memory://'
+    HEALTH_CHECK_ENABLED = False
+    API_KEY_REGISTRY_ENABLED = False
 
 
 # Configuration mapping
@@ -2,9 +2,12 @@ import os
 from app.utils.config import Config
 
 
+from pymongo import AsyncMongoClient
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 
+from app.utils.db_instrumentation import db_instrumentation
+
 class DatabaseMongo:
     """Configuration for MongoDB connection"""
 
@@ -12,7 +15,7 @@ class DatabaseMongo:
     MONGODB_DATABASE = Config.DATABASE_NAME
 
 
-    client = MongoClient(MONGODB_URI, server_api=ServerApi('1'))
+    client = MongoClient(MONGODB_URI, server_api=ServerApi('1'), event_listeners=[db_instrumentation.mongo_listener])
     db = client[MONGODB_DATABASE]
 
     @staticmethod
@@ -27,9 +30,35 @@ class DatabaseMongo:
     
     @staticmethod
     def ping():
-        """Ping the MongoDB server to check connection"""
-        try:
-            DatabaseMongo.client.admin.command('ping')
-            print("Pinged your deployment. You successfully connected to MongoDB!")
-        except Exception as e:
-            print(f"Failed to connect to MongoDB: {e}")
\ No newline at end of file
+        """
+        Ping the MongoDB server to check connection
+
+        Returns:
+            bool: True if the server answered
+
+        Raises:
+            Exception: If the server could not be reached
+        """
+        DatabaseMongo.client.admin.command('ping')
+        return True
+
+
+class AsyncDatabaseMongo:
+    """Async MongoDB connection for async views, bound to the async runtime's event loop"""
+
+    _client = None
+    _pid = None
+
+    @staticmethod
+    def get_db():
+        """
+        Get the async database, creating the client on first use in this process
+
+        Must be called from coroutines running on the async runtime loop, since
+        the client keeps its connection pool on the loop it is first used on.
+        """
+        if AsyncDatabaseMongo._client is None or AsyncDatabaseMongo._pid != os.getpid():
+            AsyncDatabaseMongo._client = AsyncMongoClient(DatabaseMongo.MONGODB_URI, server_api=ServerApi('1'),
+                                                          event_listeners=[db_instrumentation.mongo_listener])
+            AsyncDatabaseMongo._pid = os.getpid()
+        return AsyncDatabaseMongo._client[DatabaseMongo.MONGODB_DATABASE]
@@ -0,0 +1,243 @@
+"""
+MongoDB and Redis command instrumentation with per-request counts
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+
+from flask import request
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# WSGI environ key holding the context variable token of the request's stats
+TOKEN_ENVIRON = 'dispenser.db_stats.token'
+
+_current = contextvars.ContextVar('db_stats', default=None)
+
+# Concurrent batch reads merge into the same parent
+_merge_lock = threading.Lock()
+
+
+class CommandStats:
+    """Database commands issued while handling one request or Socket.IO event"""
+
+    __slots__ = ('counts', 'millis', 'parent')
+
+    def __init__(self, parent=None):
+        self.counts = {'mongo': 0, 'redis': 0}
+        self.millis = {'mongo': 0.0, 'redis': 0.0}
+        self.parent = parent
+
+    def record(self, backend, millis):
+        self.counts[backend] += 1
+        self.millis[backend] += millis
+
+    def merge_into_parent(self):
+        """Add these counts to the enclosing request's (e.g. a batch sub-request to its batch)"""
+        if self.parent is not None:
+            with _merge_lock:
+                for backend, count in self.counts.items():
+                    self.parent.counts[backend] += count
+                    self.parent.millis[backend] += self.millis[backend]
+
+    def as_dict(self):
+        return {
+            backend: {'commands': self.counts[backend], 'ms': round(self.millis[backend], 3)}
+            for backend in self.counts
+        }
+
+    def server_timing(self):
+        """Server-Timing header value, e.g. 'mongo;dur=4.2;desc="3 commands", redis;dur=0.8;desc="2 commands"'"""
+        return ', '.join(
+            f'{backend};dur={self.millis[backend]:.3f};desc="{self.counts[backend]} commands"'
+            for backend in self.counts
+        )
+
+
+def current_stats():
+    """
+    Get the command stats of the request or event being handled
+
+    Returns:
+        CommandStats, or None outside a tracked request or event
+    """
+    return _current.get()
+
+
+class DbInstrumentation:
+    """
+    Counts and times MongoDB and Redis commands
+
+    The pymongo client reports every command to ``mongo_listener``; Redis
+    clients passed to ``instrument_redis`` have their ``execute_command``
+    (and pipeline ``execute``, one round trip) timed. Each command is added
+    to the stats of the request or Socket.IO event being handled, if any,
+    and logged when it takes ``slow_command_ms`` or longer. With
+    ``DB_STATS_HEADER`` (on by default in debug mode) responses carry the
+    request's counts in ``X-DB-Commands`` and time in ``Server-Timing``.
+    """
+
+    def __init__(self, slow_command_ms=100.0):
+        """
+        Initialize the instrumentation
+
+        Args:
+            slow_command_ms: Commands taking this long or longer are logged
+        """
+        self.slow_command_ms = slow_command_ms
+        self.headers = False
+        self.mongo_listener = _MongoListener(self)
+
+    def init_app(self, app):
+        """Track the commands of every request of the application"""
+        self.slow_command_ms = app.config.get('DB_SLOW_COMMAND_MS', self.slow_command_ms)
+        self.headers = app.config.get('DB_STATS_HEADER') or app.debug
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def record(self, backend, name, millis):
+        """
+        Record one command
+
+        Args:
+            backend: 'mongo' or 'redis'
+            name: Command and target, e.g. 'find sensors' or 'GET connected_devices'
+            millis: Duration in ms
+        """
+        stats = _current.get()
+        if stats is not None:
+            stats.record(backend, millis)
+        if millis >= self.slow_command_ms:
+            logger.warning(f"Slow {backend} command {name}: {millis:.1f} ms")
+
+    def instrument_redis(self, client):
+        """
+        Time every command of a Redis client
+
+        Args:
+            client: redis.Redis instance
+
+        Returns:
+            The same client
+        """
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        @functools.wraps(execute_command)
+        def timed_execute_command(*args, **options):
+            started = time.perf_counter()
+            try:
+                return execute_command(*args, **options)
+            finally:
+                self.record('redis', _redis_name(args), (time.perf_counter() - started) * 1000)
+
+        @functools.wraps(pipeline)
+        def timed_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            @functools.wraps(execute)
+            def timed_execute(*execute_args, **execute_kwargs):
+                queued = len(pipe)
+                started = time.perf_counter()
+                try:
+                    return execute(*execute_args, **execute_kwargs)
+                finally:
+                    self.record('redis', f"PIPELINE ({queued} commands)", (time.perf_counter() - started) * 1000)
+
+            pipe.execute = timed_execute
+            return pipe
+
+        client.execute_command = timed_execute_command
+        client.pipeline = timed_pipeline
+        return client
+
+    def tracked(self, event):
+        """
+        Decorator collecting the commands of a Socket.IO event handler
+
+        The counts are logged at debug level and available through
+        current_stats() while the handler runs.
+
+        Args:
+            event: Event name used in the log
+        """
+        def decorator(handler):
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                stats = CommandStats(parent=_current.get())
+                token = _current.set(stats)
+                try:
+                    return handler(*args, **kwargs)
+                finally:
+                    _current.reset(token)
+                    stats.merge_into_parent()
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Event {event}: {stats.as_dict()}")
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _before_request():
+        request.environ[TOKEN_ENVIRON] = _current.set(CommandStats(parent=_current.get()))
+
+    def _after_request(self, response):
+        stats = _current.get()
+        if self.headers and stats is not None and TOKEN_ENVIRON in request.environ:
+            response.headers['X-DB-Commands'] = f"mongo={stats.counts['mongo']}, redis={stats.counts['redis']}"
+            response.headers['Server-Timing'] = stats.server_timing()
+        return response
+
+    @staticmethod
+    def _teardown_request(exc=None):
+        token = request.environ.pop(TOKEN_ENVIRON, None)
+        if token is None:
+            return
+        stats = _current.get()
+        try:
+            _current.reset(token)
+        except ValueError:  # torn down in another context than it started in
+            _current.set(None)
+        if stats is not None:
+            stats.merge_into_parent()
+
+
+class _MongoListener(monitoring.CommandListener):
+    """Feeds pymongo command events to the instrumentation"""
+
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+        self._targets = {}  # request_id -> collection, for the slow-command log
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if isinstance(target, str):
+            self._targets[event.request_id] = target
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        target = self._targets.pop(event.request_id, None)
+        name = f"{event.command_name} {target}" if target else event.command_name
+        self.instrumentation.record('mongo', name, event.duration_micros / 1000)
+
+
+def _redis_name(args):
+    if not args:
+        return '?'
+    if len(args) > 1 and isinstance(args[1], (str, bytes)):
+        return f"{args[0]} {args[1] if isinstance(args[1], str) else args[1].decode('utf-8', 'replace')}"
+    return str(args[0])
+
+
+# Shared instance, configured by create_app through init_app
+db_instrumentation = DbInstrumentation()
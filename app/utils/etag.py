@@ -0,0 +1,71 @@
+"""
+ETag helpers for conditional GET requests
+"""
+
+import hashlib
+from flask import request, current_app
+
+
+def make_etag(*parts):
+    """
+    Build an ETag from the parts identifying a representation
+
+    The request's query string and the API version are always included, so
+    paginated or filtered views of the same resource get different tags.
+
+    Args:
+        *parts: Values identifying the resource version, e.g. document id and version
+
+    Returns:
+        str: Opaque ETag value (without quotes)
+    """
+    key = ":".join(str(part) for part in parts)
+    key = f"{current_app.config.get('API_VERSION', 'v1')}:{key}:{request.query_string.decode('latin-1')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def is_not_modified(etag):
+    """
+    Check the request's If-None-Match header against an ETag
+
+    Args:
+        etag: Current ETag of the resource
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    return request.if_none_match.contains_weak(etag)
+
+
+def not_modified_response(etag):
+    """
+    Create an empty 304 Not Modified response
+
+    Args:
+        etag: Current ETag of the resource
+
+    Returns:
+        Flask response object
+    """
+    response = current_app.response_class(status=304)
+    return with_etag(response, etag)
+
+
+def with_etag(response, etag):
+    """
+    Attach an ETag to a response
+
+    Bodies carry a per-response timestamp, so tags are weak: they promise the
+    same resource state, not byte-identical bodies.
+
+    Args:
+        response: Flask response object or (response, status_code) tuple
+        etag: ETag of the resource
+
+    Returns:
+        The response, unchanged apart from headers
+    """
+    target = response[0] if isinstance(response, tuple) else response
+    target.set_etag(etag, weak=True)
+    target.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -1,3 +1,11 @@
+from flask_limiter import Limiter
 from flask_socketio import SocketIO
 
-socketio = SocketIO(cors_allowed_origins="*")
\ No newline at end of file
+from app.utils.rate_limit import api_key_rate_limit, api_key_rate_limit_key, is_batch_subrequest
+
+socketio = SocketIO(cors_allowed_origins="*")
+
+# Storage and strategy come from the RATELIMIT_* config at init_app; limits are
+# callables so every app created from this instance uses its own config
+limiter = Limiter(key_func=api_key_rate_limit_key, default_limits=[api_key_rate_limit],
+                  default_limits_exempt_when=is_batch_subrequest)
@@ -0,0 +1,96 @@
+"""
+Fast JSON Provider for API responses
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency, falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(o):
+    """Serialize types the encoders do not handle natively"""
+    if isinstance(o, ObjectId):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "model_dump"):
+        return o.model_dump()
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson when it is installed
+
+    ObjectId, datetime, Decimal, UUID, dataclasses and pydantic models are
+    serialized natively. Responses are compact and unsorted unless
+    JSON_PRETTY / JSON_SORT_KEYS are enabled. Without orjson, or for values
+    orjson rejects (e.g. integers beyond 64 bits), the stdlib encoder is used
+    with the same conventions.
+    """
+
+    default = staticmethod(_default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.sort_keys = app.config.get('JSON_SORT_KEYS', False)
+        self.pretty = app.config.get('JSON_PRETTY', False)
+        self._options = orjson.OPT_NON_STR_KEYS if orjson else 0
+        if self.sort_keys and orjson:
+            self._options |= orjson.OPT_SORT_KEYS
+
+    def dumps_bytes(self, obj, pretty=False):
+        """
+        Serialize data as UTF-8 encoded JSON
+
+        Args:
+            obj: The data to serialize
+            pretty: Indent the output
+
+        Returns:
+            bytes: Encoded JSON
+        """
+        if orjson is not None:
+            options = (self._options | orjson.OPT_INDENT_2) if pretty else self._options
+            try:
+                return orjson.dumps(obj, default=_default, option=options)
+            except TypeError:
+                pass
+        return self._stdlib_dumps(obj, pretty).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj, self.pretty) + b"\n", mimetype=self.mimetype)
+
+    def _stdlib_dumps(self, obj, pretty):
+        """Serialize with the stdlib encoder using the provider's conventions"""
+        if pretty:
+            return json.dumps(obj, default=_default, ensure_ascii=False, sort_keys=self.sort_keys, indent=2)
+        return json.dumps(obj, default=_default, ensure_ascii=False, sort_keys=self.sort_keys, separators=(",", ":"))
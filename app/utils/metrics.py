@@ -0,0 +1,170 @@
+"""
+Prometheus metrics for HTTP routes and Socket.IO events
+"""
+
+import functools
+import logging
+import os
+import time
+
+from flask import request
+from flask_socketio import ConnectionRefusedError
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # optional dependency, metrics are disabled without it
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# WSGI environ key holding the request start time
+STARTED_ENVIRON = 'dispenser.metrics.started'
+
+# Histogram buckets in seconds, from cache hits to slow Mongo aggregations
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    """
+    Request and Socket.IO metrics in Prometheus format
+
+    Uses prometheus_client when it is installed and does nothing otherwise.
+    Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does)
+    so every worker writes its samples to memory-mapped files there and
+    /metrics aggregates all workers, whichever one serves the scrape.
+    Labelled children are cached, so recording a sample on the hot path
+    is a dictionary lookup and a lock-protected add.
+    """
+
+    def __init__(self, registry=None):
+        """
+        Initialize the metrics
+
+        Args:
+            registry: prometheus_client registry (defaults to the global one)
+        """
+        self.registry = registry
+        self.enabled = False
+        self._children = {}
+
+    def init_app(self, app):
+        """Create the metrics and time every request of the application"""
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        if prometheus_client is None:
+            logger.info("prometheus_client is not installed; /metrics is disabled")
+            return
+        if not self.enabled:
+            self._create()
+            self.enabled = True
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _create(self):
+        self.registry = self.registry or prometheus_client.REGISTRY
+        self.request_duration = prometheus_client.Histogram(
+            'http_request_duration_seconds', 'Flask request duration by route, method and status',
+            ('route', 'method', 'status'), buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.event_duration = prometheus_client.Histogram(
+            'socketio_event_duration_seconds', 'Socket.IO event handler duration by event and outcome',
+            ('event', 'outcome'), buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.active_sockets = prometheus_client.Gauge(
+            'socketio_active_sockets', 'Connected Socket.IO clients by client type',
+            ('client_type',), multiprocess_mode='livesum', registry=self.registry
+        )
+        self.rooms = prometheus_client.Gauge(
+            'socketio_rooms', 'Socket.IO rooms with frontends: devices and iot_update rooms',
+            ('kind',), multiprocess_mode='livesum', registry=self.registry
+        )
+
+    def _child(self, metric, *labels):
+        key = (id(metric), labels)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = metric.labels(*labels)
+        return child
+
+    @staticmethod
+    def _before_request():
+        request.environ[STARTED_ENVIRON] = time.perf_counter()
+
+    def _after_request(self, response):
+        started = request.environ.get(STARTED_ENVIRON)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            self._child(self.request_duration, route, request.method, str(response.status_code)).observe(
+                time.perf_counter() - started
+            )
+        return response
+
+    def timed_event(self, event):
+        """
+        Decorator recording a Socket.IO handler's duration and outcome
+
+        The outcome is 'ok', 'rejected' when the handler returns False or
+        refuses the connection, or 'error' when it raises.
+
+        Args:
+            event: Event name used as the label
+        """
+        def decorator(handler):
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return handler(*args, **kwargs)
+                started = time.perf_counter()
+                outcome = 'error'
+                try:
+                    result = handler(*args, **kwargs)
+                    outcome = 'rejected' if result is False else 'ok'
+                    return result
+                except ConnectionRefusedError:
+                    outcome = 'rejected'
+                    raise
+                finally:
+                    self._child(self.event_duration, event, outcome).observe(time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def set_sockets(self, counts):
+        """
+        Record this worker's connected Socket.IO clients
+
+        Args:
+            counts: Dictionary of client type to number of connected clients
+        """
+        if self.enabled:
+            for client_type, count in counts.items():
+                self._child(self.active_sockets, client_type).set(count)
+
+    def set_rooms(self, counts):
+        """
+        Record this worker's room counts
+
+        Args:
+            counts: Dictionary of room kind to number of rooms
+        """
+        if self.enabled:
+            for kind, count in counts.items():
+                self._child(self.rooms, kind).set(count)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format
+
+        Returns:
+            Tuple of (body bytes, content type)
+        """
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = self.registry
+        return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+
+# Shared instance, configured by create_app through init_app
+metrics = Metrics()
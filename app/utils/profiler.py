@@ -0,0 +1,194 @@
+"""
+On-demand sampling profiler for a live worker
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+try:
+    from eventlet import patcher as eventlet_patcher
+except ImportError:  # eventlet is only used by the Socket.IO server
+    eventlet_patcher = None
+
+FORMATS = ('collapsed', 'speedscope')
+
+# Directory holding the app package, stripped from file names in profiles
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _os_threading():
+    """Real threading and time modules, even when eventlet has monkey-patched them"""
+    if eventlet_patcher is not None and eventlet_patcher.is_monkey_patched('thread'):
+        return eventlet_patcher.original('threading'), eventlet_patcher.original('time')
+    return threading, time
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread of the worker
+
+    A separate OS thread (a real one, also under eventlet) reads
+    ``sys._current_frames()`` every ``interval`` seconds. Under eventlet
+    all greenlets share the hub's thread, so each sample shows the
+    greenlet running at that moment, which is the one using the CPU.
+    Identical stacks are counted, not stored, and frame names are cached
+    per code object, so a profile costs a stack walk per thread and
+    sample. Only one profile runs at a time per worker.
+    """
+
+    def __init__(self, max_seconds=60.0):
+        """
+        Initialize the profiler
+
+        Args:
+            max_seconds: Longest profile that can be requested
+        """
+        self.max_seconds = max_seconds
+        self._running = threading.Lock()
+        self._names = {}  # code object -> frame name
+
+    def init_app(self, app):
+        """Configure the profiler from the Flask application config"""
+        self.max_seconds = app.config.get('PROFILER_MAX_SECONDS', self.max_seconds)
+
+    def profile(self, seconds, interval=0.005):
+        """
+        Sample this worker for a while
+
+        Args:
+            seconds: How long to sample
+            interval: Seconds between samples
+
+        Returns:
+            Dictionary with the samples as a Counter of (thread name, stack)
+            -> count, the interval and the duration, or None if another
+            profile is running
+
+        Raises:
+            ValueError: If seconds or interval are out of range
+        """
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"seconds must be between 0 and {self.max_seconds:g}")
+        if not 0.001 <= interval <= 1.0:
+            raise ValueError("interval must be between 1 and 1000 ms")
+        if not self._running.acquire(blocking=False):
+            return None
+        try:
+            os_threading, os_time = _os_threading()
+            samples = Counter()
+            stop = os_threading.Event()
+            sampler = os_threading.Thread(target=self._sample, args=(samples, stop, interval, os_time.sleep),
+                                          name='sampling-profiler', daemon=True)
+            started = time.perf_counter()
+            sampler.start()
+            time.sleep(seconds)  # cooperative under eventlet, so the hub keeps serving
+            stop.set()
+            sampler.join()
+            return {'samples': samples, 'interval': interval, 'duration': time.perf_counter() - started}
+        finally:
+            self._running.release()
+
+    def _sample(self, samples, stop, interval, sleep):
+        os_threading, _ = _os_threading()
+        me = os_threading.get_ident()
+        while not stop.is_set():
+            names = {thread.ident: thread.name for thread in os_threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = self._stack(frame)
+                if stack:
+                    samples[(names.get(ident, f"thread-{ident}"), stack)] += 1
+            sleep(interval)
+
+    def _stack(self, frame):
+        codes = []
+        while frame is not None:
+            code = frame.f_code
+            if code is _PROFILE_CODE:
+                return None  # the request waiting for this profile
+            codes.append(code)
+            frame = frame.f_back
+        names = self._names
+        stack = []
+        for code in reversed(codes):
+            name = names.get(code)
+            if name is None:
+                name = names[code] = (code.co_name, _short_path(code.co_filename), code.co_firstlineno)
+            stack.append(name)
+        return tuple(stack)
+
+
+def to_collapsed(result):
+    """
+    Render a profile in the collapsed-stack format of flamegraph.pl and speedscope
+
+    Args:
+        result: Result of SamplingProfiler.profile
+
+    Returns:
+        str: One 'thread;outer;...;inner count' line per distinct stack, most sampled first
+    """
+    lines = []
+    for (thread, stack), count in result['samples'].most_common():
+        frames = ';'.join(f"{name} ({path}:{line})" for name, path, line in stack)
+        lines.append(f"{thread};{frames} {count}")
+    return '\n'.join(lines) + '\n'
+
+
+def to_speedscope(result, name='profile'):
+    """
+    Render a profile as a speedscope sampled profile, one per thread
+
+    Args:
+        result: Result of SamplingProfiler.profile
+        name: Name shown in speedscope
+
+    Returns:
+        str: speedscope JSON document
+    """
+    frame_index = {}
+    frames = []
+    profiles = {}
+    for (thread, stack), count in result['samples'].most_common():
+        indices = []
+        for frame in stack:
+            index = frame_index.get(frame)
+            if index is None:
+                index = frame_index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            indices.append(index)
+        profile = profiles.setdefault(thread, {
+            'type': 'sampled', 'name': thread, 'unit': 'seconds',
+            'startValue': 0, 'endValue': 0, 'samples': [], 'weights': []
+        })
+        weight = count * result['interval']
+        profile['samples'].append(indices)
+        profile['weights'].append(weight)
+        profile['endValue'] += weight
+    return json.dumps({
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'sampling-profiler',
+        'shared': {'frames': frames},
+        'profiles': list(profiles.values())
+    })
+
+
+def _short_path(filename):
+    if filename.startswith(_PROJECT_ROOT + os.sep):
+        return filename[len(_PROJECT_ROOT) + 1:]
+    marker = filename.rfind('site-packages' + os.sep)
+    if marker != -1:
+        return filename[marker + len('site-packages') + 1:]
+    return filename
+
+
+_PROFILE_CODE = SamplingProfiler.profile.__code__
+
+# Shared instance, configured by create_app through init_app
+profiler = SamplingProfiler()
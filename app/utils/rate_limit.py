@@ -0,0 +1,63 @@
+"""
+Rate limit keys and storage configuration
+"""
+
+import os
+from urllib.parse import quote
+from flask import current_app, request
+from flask_limiter.util import get_remote_address
+from app.utils.auth import current_api_key, BATCH_API_KEY_ENVIRON
+
+
+def redis_storage_uri():
+    """
+    Build the limiter storage URI from the shared Redis settings
+
+    Returns:
+        str: redis:// URI (rediss:// when REDIS_SSL is set)
+    """
+    scheme = 'rediss' if os.environ.get('REDIS_SSL', 'False').lower() == 'true' else 'redis'
+    host = os.environ.get("REDIS_HOST", "redis-15828.c9.us-east-1-4.ec2.redns.redis-cloud.com")
+    port = int(os.environ.get("REDIS_PORT", 15828))
+    username = quote(os.environ.get("REDIS_USERNAME", "default"), safe='')
+    password = quote(os.environ.get("REDIS_PASSWORD", ""), safe='')
+    credentials = f"{username}:{password}@" if password else ''
+    return f"{scheme}://{credentials}{host}:{port}/0"
+
+
+def api_key_rate_limit_key():
+    """Bucket requests by API key, falling back to the client address for unknown keys"""
+    key = current_api_key()
+    if key:
+        return f"key:{key['key_id']}"
+    return f"ip:{get_remote_address()}"
+
+
+def device_rate_limit_key():
+    """Bucket telemetry requests by the device_id in the URL"""
+    device_id = (request.view_args or {}).get('device_id')
+    if device_id:
+        return f"device:{device_id}"
+    return api_key_rate_limit_key()
+
+
+def is_batch_subrequest():
+    """
+    Exempt batch sub-requests from the per-API-key default limit
+
+    POST /batch already charged the key one hit per sub-request. Route
+    limits, such as the per-device telemetry budget, still apply.
+    """
+    return BATCH_API_KEY_ENVIRON in request.environ
+
+
+def api_key_rate_limit():
+    """Per-API-key budget: the key's own quota, or RATE_LIMIT_PER_MINUTE"""
+    key = current_api_key()
+    quota = key and key.get('quota_per_minute')
+    return f"{quota or current_app.config.get('RATE_LIMIT_PER_MINUTE', 60)} per minute"
+
+
+def device_rate_limit():
+    """Per-device telemetry budget from the application config"""
+    return f"{current_app.config.get('RATE_LIMIT_DEVICE_PER_MINUTE', 120)} per minute"
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings picked up from the working directory
+
+Workers share Prometheus metrics through files in PROMETHEUS_MULTIPROC_DIR,
+so /metrics reports every worker whichever one serves the scrape.
+"""
+
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'prometheus-multiproc'))
+
+
+def on_starting(server):
+    """Start from an empty metrics directory so samples of an earlier run are not reported"""
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
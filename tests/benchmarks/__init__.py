@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks for calibration, ingestion and Redis presence storage
+
+Run with ``python -m tests.benchmarks.run``; see that module for options.
+"""
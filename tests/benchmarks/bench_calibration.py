@@ -0,0 +1,37 @@
+"""
+CalibrationService throughput: scalar vs batch vs lookup table
+"""
+
+import random
+from app.services.calibration_service import CalibrationService
+from tests.benchmarks.harness import measure
+
+SENSOR_TYPES = ('ph', 'tds', 'turbidity')
+
+
+def run(quick=False, min_time=0.2):
+    """Run the calibration benchmarks and return their results"""
+    service = CalibrationService()
+    rng = random.Random(42)
+    size = 1000 if quick else 10000
+    readings = [rng.randint(0, 4095) for _ in range(size)]
+    results = []
+
+    for sensor_type in SENSOR_TYPES:
+        calibrate = getattr(service, f'calibrate_{sensor_type}')
+        results.append(measure(
+            f'calibration.scalar.{sensor_type}',
+            lambda: [calibrate(raw) for raw in readings],
+            min_time=min_time, batch=size, readings=size
+        ))
+        results.append(measure(
+            f'calibration.batch.{sensor_type}',
+            lambda: service.calibrate_batch(sensor_type, readings, use_lut=False),
+            min_time=min_time, batch=size, readings=size
+        ))
+        results.append(measure(
+            f'calibration.lut.{sensor_type}',
+            lambda: service.calibrate_batch(sensor_type, readings, use_lut=True),
+            min_time=min_time, batch=size, readings=size
+        ))
+    return results
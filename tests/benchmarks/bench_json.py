@@ -0,0 +1,49 @@
+"""
+Response serialization: Flask's default JSON provider vs FastJSONProvider
+"""
+
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.utils.json_provider import FastJSONProvider
+from tests.benchmarks.harness import measure
+
+
+def _device_listing(count):
+    """Build a GET /devices style payload with embedded sensor calibration data"""
+    sensors = {
+        sensor_type: {
+            "value": 7.02, "raw_value": 2051.0, "unit": unit, "status": True, "type": sensor_type,
+            "calibration_date": "2025-08-17T10:00:00.000000Z",
+            "calibration_data": {
+                "value": 7.02, "unit": unit, "raw_value": 2051.0, "adc_value": 2051, "voltage": 1.6527,
+                "calibration_timestamp": "2025-08-17T10:00:00.000000", "sensor_type": sensor_type, "status": "success"
+            }
+        }
+        for sensor_type, unit in (("ph", "pH"), ("tds", "ppm"), ("turbidity", "NTU"))
+    }
+    devices = [
+        {"id": str(ObjectId()), "device_id": f"device-{i}", "name": f"Dispenser {i}", "sensors": sensors,
+         "metadata": {"installation_date": "2025-08-17T10:00:00.000000Z"},
+         "tools": [{"type": "pump", "model": "P-1", "status": True}]}
+        for i in range(count)
+    ]
+    return {"status": "success", "message": "Devices retrieved successfully",
+            "result": {"data": {"devices": devices}}, "timestamp": "2025-08-17T10:00:00.000000Z"}
+
+
+def run(quick=False, min_time=0.2):
+    """Run the serialization benchmarks and return their results"""
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+    results = []
+
+    for count in ((100,) if quick else (100, 1000)):
+        listing = _device_listing(count)
+        with app.app_context():
+            results.append(measure(f'json.default.devices.{count}', lambda: default_provider.response(listing),
+                                   min_time=min_time, devices=count))
+            results.append(measure(f'json.fast.devices.{count}', lambda: fast_provider.response(listing),
+                                   min_time=min_time, devices=count))
+    return results
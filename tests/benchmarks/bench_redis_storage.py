@@ -0,0 +1,52 @@
+"""
+Redis presence storage operations as the connected fleet grows
+"""
+
+import contextlib
+import io
+import json
+from app.storage import redis_storage
+from tests.fakes import FakeRedis, patched
+from tests.benchmarks.harness import measure
+
+FLEET_SIZES = (10, 100, 1000, 10000, 100000)
+QUICK_FLEET_SIZES = (10, 1000)
+
+
+def _populate(client, fleet_size):
+    """Register one IoT and one frontend connection with a payload for every device"""
+    devices = {
+        f"device-{i}": {
+            f"iot-{i}": "iot",
+            f"fe-{i}": "frontend",
+            "last_payload": {"ph": 7.0, "tds": 120.5, "turbidity": 3.2}
+        }
+        for i in range(fleet_size)
+    }
+    client.set(redis_storage.REDIS_KEY, json.dumps(devices))
+
+
+def run(quick=False, min_time=0.2):
+    """Run the presence storage benchmarks and return their results"""
+    results = []
+    for fleet_size in (QUICK_FLEET_SIZES if quick else FLEET_SIZES):
+        client = FakeRedis()
+        _populate(client, fleet_size)
+        target = f"device-{fleet_size // 2}"
+        payload = {"ph": 7.1, "tds": 121.0, "turbidity": 3.1}
+
+        operations = {
+            'get_room_members': lambda: redis_storage.get_room_members(target),
+            'find_device_by_sid': lambda: redis_storage.find_device_by_sid(f"fe-{fleet_size - 1}"),
+            'save_device': lambda: redis_storage.save_device(target, "fe-bench", "frontend"),
+            'save_payload': lambda: redis_storage.save_payload(target, payload, f"iot-{fleet_size // 2}"),
+        }
+
+        # The storage helpers log every write to stdout
+        with patched(redis_storage, redis_client=client), contextlib.redirect_stdout(io.StringIO()):
+            for operation, fn in operations.items():
+                results.append(measure(
+                    f'redis_storage.{operation}.{fleet_size}',
+                    fn, min_time=min_time, repeat=1 if fleet_size >= 10000 else 3, fleet_size=fleet_size
+                ))
+    return results
@@ -0,0 +1,44 @@
+"""
+SensorService.create_sensor round trips against in-process collections
+"""
+
+import random
+from app.services import device_service as device_module
+from app.services import sensor_service as sensor_module
+from app.services.anomaly_service import AnomalyService
+from app.services.sensor_service import SensorService
+from app.storage.response_cache import ResponseCache
+from tests.fakes import FakeCollection, FakeRedis, patched
+from tests.benchmarks.harness import measure
+
+
+def run(quick=False, min_time=0.2):
+    """Run the ingestion benchmarks and return their results"""
+    devices = FakeCollection()
+    sensors = FakeCollection()
+    devices.insert_one({"device_id": "bench-device", "name": "Bench", "sensors": {}, "metadata": {}, "tools": []})
+
+    service = SensorService()
+    service.anomaly_service = AnomalyService(client=FakeRedis())
+    rng = random.Random(7)
+    results = []
+
+    versions = FakeCollection()
+
+    cache = ResponseCache(client=FakeRedis())
+
+    with patched(sensor_module, dbDevices=devices, dbSensors=sensors, response_cache=cache), \
+            patched(device_module, dbVersions=versions):
+        for sensor_type in ('ph', 'tds', 'turbidity'):
+            payload = {"value": rng.randint(0, 4095), "unit": "raw", "sensor_type": sensor_type}
+            calls_before = devices.calls + sensors.calls + versions.calls
+            creates_before = len(sensors._docs)
+            result = measure(
+                f'ingest.create_sensor.{sensor_type}',
+                lambda: service.create_sensor(payload, "bench-device"),
+                min_time=min_time
+            )
+            creates = len(sensors._docs) - creates_before
+            result['params']['db_calls_per_op'] = round((devices.calls + sensors.calls + versions.calls - calls_before) / creates, 2)
+            results.append(result)
+    return results
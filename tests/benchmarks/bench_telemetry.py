@@ -0,0 +1,21 @@
+"""
+iot_data parsing: JSON text vs the binary telemetry frame
+"""
+
+import json
+from app.utils.telemetry_codec import decode_payload, encode_readings
+from tests.benchmarks.harness import measure
+
+
+def run(quick=False, min_time=0.2):
+    """Run the telemetry decoding benchmarks and return their results"""
+    payload = {'ph': 7.02, 'tds': 412.5, 'turbidity': 3.1}
+    text = json.dumps({'device_id': 'device-1', 'payload': payload})
+    frame = encode_readings(payload)
+
+    return [
+        measure('telemetry.decode.json', lambda: json.loads(text)['payload'],
+                min_time=min_time, bytes=len(text)),
+        measure('telemetry.decode.binary', lambda: decode_payload(frame),
+                min_time=min_time, bytes=len(frame)),
+    ]
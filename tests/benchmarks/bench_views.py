@@ -0,0 +1,101 @@
+"""
+Device and sensor reads: sync views vs async views, with simulated database latency
+
+Each view is measured one request at a time and with CONCURRENCY requests in
+flight on one worker, as a threaded server would run them.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from app import create_app
+from app.services import async_read_service as async_read_module
+from app.services import device_service as device_module
+from app.services import sensor_service as sensor_module
+from app.utils.config import TestingConfig
+from tests.fakes import FakeAsyncCollection, FakeCollection, RoundTrips, patched
+from tests.benchmarks.harness import measure
+
+LATENCY = 0.002  # seconds per MongoDB round trip
+CONCURRENCY = 8  # requests in flight per worker in the concurrent runs
+
+
+class SlowCollection:
+    """Blocking view of a FakeCollection whose reads take one simulated round trip"""
+
+    def __init__(self, collection, round_trips):
+        self._collection = collection
+        self._round_trips = round_trips
+
+    def find_one(self, *args, **kwargs):
+        self._round_trips.count += 1
+        time.sleep(LATENCY)
+        return self._collection.find_one(*args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        self._round_trips.count += 1
+        time.sleep(LATENCY)
+        return self._collection.find(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+class SyncViewsConfig(TestingConfig):
+    """Testing configuration without rate limits, which would cut the runs short"""
+    RATELIMIT_ENABLED = False
+
+
+class AsyncViewsConfig(SyncViewsConfig):
+    """Benchmark configuration with async views"""
+    ASYNC_VIEWS = True
+
+
+def run(quick=False, min_time=0.2):
+    """Run the view benchmarks and return their results"""
+    devices, sensors, versions = FakeCollection(), FakeCollection(), FakeCollection()
+    devices.insert_one({"device_id": "bench-device", "name": "Bench", "sensors": {}, "metadata": {}, "tools": [],
+                        "version": 1})
+    for _ in range(5 if quick else 20):
+        sensors.insert_one({"device_id": "bench-device", "timestamp": "2025-01-01T00:00:00Z", "sensor_type": "ph",
+                            "unit": "pH", "value": 7.0, "raw_value": 2048.0, "status": 1})
+
+    # Both paths read the same documents; only the client differs
+    round_trips = RoundTrips()
+    async_db = SimpleNamespace(
+        devices=FakeAsyncCollection(devices, latency=LATENCY, round_trips=round_trips),
+        sensors=FakeAsyncCollection(sensors, latency=LATENCY, round_trips=round_trips),
+        collection_versions=FakeAsyncCollection(versions, latency=LATENCY, round_trips=round_trips)
+    )
+    sync_devices, sync_sensors, sync_versions = (SlowCollection(c, round_trips) for c in (devices, sensors, versions))
+
+    headers = {'X-API-Key': TestingConfig.API_KEY}
+    results = []
+    pool = ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix='bench-client')
+    with pool, patched(device_module, dbDevices=sync_devices, dbVersions=sync_versions), \
+            patched(sensor_module, dbDevices=sync_devices, dbSensors=sync_sensors), \
+            patched(async_read_module, get_db=lambda: async_db):
+        for mode, config in (('sync', SyncViewsConfig), ('async', AsyncViewsConfig)):
+            client = create_app(config).test_client()
+            for name, url in (('get_sensors', '/api/v1/device/bench-device/sensors'),
+                              ('get_device', '/api/v1/device/bench-device')):
+                calls = []
+
+                def request():
+                    response = client.get(url, headers=headers)
+                    assert response.status_code == 200, response.get_data(as_text=True)
+                    calls.append(1)
+
+                def concurrent_requests():
+                    for future in [pool.submit(request) for _ in range(CONCURRENCY)]:
+                        future.result()
+
+                trips_before = round_trips.count
+                result = measure(f'views.{mode}.{name}', request, min_time=min_time, repeat=2,
+                                 latency_ms=LATENCY * 1000)
+                result['params']['round_trips_per_request'] = round((round_trips.count - trips_before) / len(calls), 2)
+                results.append(result)
+                results.append(measure(f'views.{mode}.{name}.concurrent', concurrent_requests, min_time=min_time,
+                                       repeat=2, batch=CONCURRENCY, latency_ms=LATENCY * 1000,
+                                       concurrency=CONCURRENCY))
+    return results
@@ -0,0 +1,56 @@
+"""
+Timing helpers shared by the benchmark modules
+"""
+
+import gc
+import time
+
+
+def measure(name, fn, min_time=0.2, repeat=3, batch=1, **params):
+    """
+    Time a callable and report its throughput
+
+    The callable is run in rounds until at least min_time has elapsed; the
+    best of ``repeat`` rounds is reported to reduce scheduler noise.
+
+    Args:
+        name: Benchmark name, used as key for thresholds and baselines
+        fn: Callable to time, taking no arguments
+        min_time: Minimum seconds per round
+        repeat: Number of rounds
+        batch: Operations performed by one call of fn (e.g. batch size)
+        **params: Extra parameters recorded with the result
+
+    Returns:
+        Dictionary with name, ops_per_sec, us_per_op, iterations and params
+    """
+    fn()  # warm-up: caches, lookup tables, lazy imports
+
+    best = None
+    iterations = 0
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            calls = 0
+            started = time.perf_counter()
+            elapsed = 0.0
+            while elapsed < min_time:
+                fn()
+                calls += 1
+                elapsed = time.perf_counter() - started
+            per_op = elapsed / (calls * batch)
+            if best is None or per_op < best:
+                best = per_op
+            iterations += calls
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        'name': name,
+        'ops_per_sec': round(1 / best, 1),
+        'us_per_op': round(best * 1e6, 3),
+        'iterations': iterations * batch,
+        'params': params
+    }
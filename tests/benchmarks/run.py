@@ -0,0 +1,137 @@
+"""
+Benchmark runner
+
+Usage:
+    python -m tests.benchmarks.run [--quick] [--output results.json]
+                                   [--baseline previous.json] [--max-regression 0.25]
+                                   [--thresholds tests/benchmarks/thresholds.json]
+                                   [--only calibration]
+
+Results are written as JSON. The run fails (exit code 1) when a benchmark is
+slower than its floor in the thresholds file, or when a baseline is given and
+a benchmark's throughput dropped by more than --max-regression.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+from tests.benchmarks import bench_calibration, bench_json, bench_redis_storage, bench_sensor_service, bench_telemetry, bench_views
+
+SUITES = {
+    'calibration': bench_calibration,
+    'ingest': bench_sensor_service,
+    'json': bench_json,
+    'redis_storage': bench_redis_storage,
+    'telemetry': bench_telemetry,
+    'views': bench_views,
+}
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(__file__), 'thresholds.json')
+
+
+def check_thresholds(results, thresholds, scale=1.0):
+    """
+    Compare results against absolute throughput floors
+
+    Args:
+        results: Benchmark results
+        thresholds: Mapping of benchmark name to {"min_ops_per_sec": float}
+        scale: Multiplier applied to every floor (e.g. 0.5 on slow CI machines)
+
+    Returns:
+        List of failure messages
+    """
+    failures = []
+    for result in results:
+        floor = thresholds.get(result['name'], {}).get('min_ops_per_sec')
+        if floor is not None and result['ops_per_sec'] < floor * scale:
+            failures.append(f"{result['name']}: {result['ops_per_sec']} ops/s below floor {floor * scale}")
+    return failures
+
+
+def check_baseline(results, baseline, max_regression):
+    """
+    Compare results against a previous run
+
+    Args:
+        results: Benchmark results
+        baseline: Results of a previous run (as written by this runner)
+        max_regression: Allowed fractional throughput drop, e.g. 0.25
+
+    Returns:
+        List of failure messages
+    """
+    previous = {result['name']: result for result in baseline.get('results', [])}
+    failures = []
+    for result in results:
+        before = previous.get(result['name'])
+        if not before:
+            continue
+        change = result['ops_per_sec'] / before['ops_per_sec'] - 1
+        result['change_vs_baseline'] = round(change, 3)
+        if change < -max_regression:
+            failures.append(f"{result['name']}: {change:.1%} vs baseline (allowed -{max_regression:.0%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the calibration and ingestion micro-benchmarks')
+    parser.add_argument('--quick', action='store_true', help='Smaller inputs and fleet sizes')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per timing round')
+    parser.add_argument('--only', action='append', choices=sorted(SUITES), help='Run only the given suite')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS, help='JSON file of per-benchmark floors')
+    parser.add_argument('--threshold-scale', type=float,
+                        default=float(os.environ.get('BENCH_THRESHOLD_SCALE', 1.0)),
+                        help='Multiplier for every floor (env BENCH_THRESHOLD_SCALE)')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--max-regression', type=float,
+                        default=float(os.environ.get('BENCH_MAX_REGRESSION', 0.25)),
+                        help='Allowed fractional slowdown vs baseline (env BENCH_MAX_REGRESSION)')
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in (args.only or SUITES):
+        print(f"Running {name} benchmarks...", file=sys.stderr)
+        results.extend(SUITES[name].run(quick=args.quick, min_time=args.min_time))
+
+    failures = []
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            failures += check_thresholds(results, json.load(f), args.threshold_scale)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += check_baseline(results, json.load(f), args.max_regression)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'quick': args.quick
+        },
+        'results': results,
+        'failures': failures
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for result in results:
+        print(f"{result['name']:<48} {result['ops_per_sec']:>14,.1f} ops/s {result['us_per_op']:>12,.3f} us/op",
+              file=sys.stderr)
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
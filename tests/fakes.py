@@ -0,0 +1,245 @@
+"""
+In-process stand-ins for MongoDB collections and Redis used by tests and benchmarks
+
+They implement only the calls the exercised code paths make, so tests and
+benchmarks run offline and benchmarks measure application overhead rather
+than network latency.
+"""
+
+import asyncio
+import copy
+from contextlib import contextmanager
+from bson import ObjectId
+from app.storage.response_cache import LOCK_SCRIPT
+
+
+class InsertOneResult:
+    """Result of FakeCollection.insert_one"""
+
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class FakeCollection:
+    """Dictionary-backed collection supporting equality filters; counts calls as round trips"""
+
+    def __init__(self):
+        self._docs = {}
+        self.calls = 0
+
+    def _matches(self, doc, query):
+        return all(doc.get(key) == value for key, value in query.items())
+
+    def _iter(self, query):
+        if set(query) == {"_id"}:
+            doc = self._docs.get(query["_id"])
+            return [doc] if doc is not None else []
+        return [doc for doc in self._docs.values() if self._matches(doc, query)]
+
+    def find_one(self, query=None, projection=None):
+        self.calls += 1
+        found = self._iter(query or {})
+        return copy.deepcopy(found[0]) if found else None
+
+    def find(self, query=None, projection=None):
+        self.calls += 1
+        return [copy.deepcopy(doc) for doc in self._iter(query or {})]
+
+    def insert_one(self, doc):
+        self.calls += 1
+        doc.setdefault("_id", ObjectId())
+        self._docs[doc["_id"]] = copy.deepcopy(doc)
+        return InsertOneResult(doc["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        self.calls += 1
+        for doc in self._iter(query):
+            doc.update(copy.deepcopy(update.get("$set", {})))
+            for key, amount in update.get("$inc", {}).items():
+                doc[key] = doc.get(key, 0) + amount
+            return
+        if upsert:
+            self.insert_one({**query, **update.get("$set", {}), **update.get("$inc", {})})
+
+    def delete_one(self, query):
+        self.calls += 1
+        for doc in self._iter(query):
+            del self._docs[doc["_id"]]
+            return
+
+
+class FakeAsyncCursor:
+    """Async cursor over a FakeCollection query"""
+
+    def __init__(self, collection, query):
+        self._collection = collection
+        self._query = query
+
+    async def to_list(self, length=None):
+        await self._collection.round_trip()
+        docs = self._collection.sync.find(self._query)
+        return docs if length is None else docs[:length]
+
+
+class RoundTrips:
+    """Counts simulated round trips, and how many overlapped, across fake async collections"""
+
+    def __init__(self):
+        self.count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+
+class FakeAsyncCollection:
+    """Async view of a FakeCollection; each call is one simulated round trip"""
+
+    def __init__(self, collection, latency=0.0, round_trips=None):
+        self.sync = collection
+        self.latency = latency
+        self.round_trips = round_trips or RoundTrips()
+
+    async def round_trip(self):
+        trips = self.round_trips
+        trips.count += 1
+        trips.in_flight += 1
+        trips.max_in_flight = max(trips.max_in_flight, trips.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            trips.in_flight -= 1
+
+    async def find_one(self, query=None, projection=None):
+        await self.round_trip()
+        return self.sync.find_one(query, projection)
+
+    def find(self, query=None, projection=None):
+        return FakeAsyncCursor(self, query)
+
+
+class FakePipeline:
+    """Buffered command pipeline for FakeRedis"""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self._client, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+class FakeRedis:
+    """Dictionary-backed Redis client with string, hash and set commands"""
+
+    def __init__(self):
+        self._data = {}
+        self._ttls = {}
+        self.published = []
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self._data:
+            return None
+        self._data[key] = value
+        self._ttls.pop(key, None)
+        if ex is not None or px is not None:
+            self._ttls[key] = int(ex) if ex is not None else int(px) // 1000
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self._ttls.pop(key, None)
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def ttl(self, key):
+        """Seconds left as set, -1 without an expiry, -2 for a missing key (time does not pass)"""
+        if key not in self._data:
+            return -2
+        return self._ttls.get(key, -1)
+
+    def hget(self, key, field):
+        return self._data.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self._data.setdefault(key, {})[field] = value
+        return 1
+
+    def hgetall(self, key):
+        return dict(self._data.get(key, {}))
+
+    def expire(self, key, seconds):
+        if key not in self._data:
+            return False
+        self._ttls[key] = int(seconds)
+        return True
+
+    def sadd(self, key, *members):
+        bucket = self._data.setdefault(key, set())
+        added = len(set(members) - bucket)
+        bucket.update(members)
+        return added
+
+    def smembers(self, key):
+        return set(self._data.get(key, set()))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    def register_script(self, script):
+        """Only the response cache lock and store scripts are emulated"""
+        def register(tag_keys, key, ttl):
+            for tag_key in tag_keys:
+                self.sadd(tag_key, key)
+                if self.ttl(tag_key) < int(ttl):
+                    self.expire(tag_key, ttl)
+
+        def lock(keys, args):
+            acquired = self.set(keys[0], args[0], px=args[1], nx=True)
+            register(keys[1:], args[2], args[3])
+            return 1 if acquired else 0
+
+        def store(keys, args):
+            lock_key, key, tag_keys = keys[0], keys[1], keys[2:]
+            if self.get(lock_key) != args[0]:
+                return 0
+            self.set(key, args[1], ex=args[2])
+            register(tag_keys, key, args[2])
+            self.delete(lock_key)
+            return 1
+        return lock if script == LOCK_SCRIPT else store
+
+
+@contextmanager
+def patched(target, **attributes):
+    """Temporarily replace module or object attributes"""
+    originals = {name: getattr(target, name) for name in attributes}
+    for name, value in attributes.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(target, name, value)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,78 @@
+"""
+Test Socket.IO connect admission control
+"""
+
+import random
+from flask import request
+from app.event.admission import ConnectAdmission, connect_admission
+from app.event.sensor_event import handle_connect
+from tests.fakes import FakeClock, patched
+
+
+class TestConnectAdmission:
+    """Test ConnectAdmission"""
+
+    def setup_method(self):
+        """Set up a bucket of 10 connects refilling at 5 per second"""
+        self.clock = FakeClock()
+        self.admission = ConnectAdmission(rate=5.0, burst=10, max_retry_after=30.0, clock=self.clock,
+                                          rng=random.Random(1))
+
+    def test_burst_is_admitted_then_refused(self):
+        """Test connects beyond the burst are refused with a retry hint"""
+        results = [self.admission.admit() for _ in range(12)]
+
+        assert all(admitted and retry_after == 0 for admitted, retry_after in results[:10])
+        assert all(not admitted and retry_after >= 1.0 for admitted, retry_after in results[10:])
+
+    def test_bucket_refills_over_time(self):
+        """Test tokens come back at the configured rate"""
+        for _ in range(10):
+            self.admission.admit()
+        assert not self.admission.admit()[0]
+
+        self.clock.now += 0.5
+
+        assert [self.admission.admit()[0] for _ in range(3)] == [True, True, False]
+
+    def test_retry_hints_spread_with_demand(self):
+        """Test a storm gets increasing, jittered retry hints capped at the maximum"""
+        for _ in range(10):
+            self.admission.admit()
+        hints = [self.admission.admit()[1] for _ in range(300)]
+
+        assert len(set(hints)) > 20
+        assert max(hints) == 30.0
+        assert sum(hints[:50]) / 50 < sum(hints[50:100]) / 50
+
+    def test_stats(self):
+        """Test counters and handling times are reported"""
+        for _ in range(11):
+            if self.admission.admit()[0]:
+                with self.admission.track():
+                    pass
+
+        stats = self.admission.stats()
+        assert stats['admitted'] == 10
+        assert stats['refused'] == 1
+        assert stats['in_flight'] == 0
+        assert stats['waiting'] == 1.0
+        assert set(stats['handle_ms']) == {'p50', 'p95', 'max'}
+
+    def test_admin_endpoint_reports_admission(self, client, api_headers):
+        """Test the admin endpoint returns the shared bucket's counters"""
+        response = client.get('/api/v1/admin/realtime/admission', headers=api_headers)
+
+        assert response.status_code == 200
+        assert {'admitted', 'refused', 'tokens'} <= set(response.get_json()['result']['data'])
+
+    def test_unauthenticated_connects_take_no_token(self, app):
+        """Test connects with a bad token are refused before admission, leaving the budget to real devices"""
+        admitted = []
+        with patched(connect_admission, admit=lambda: admitted.append(True) or (False, 1.0)), \
+                app.test_request_context('/socket.io/'):
+            request.sid = 'sid-1'
+            accepted = handle_connect({'device_id': 'dev1', 'client_type': 'iot', 'key': 'WRONG', 'salt': 'salt'})
+
+        assert accepted is False
+        assert admitted == []
@@ -0,0 +1,152 @@
+"""
+Test Anomaly Service
+"""
+
+import random
+import statistics
+import pytest
+import redis
+from app.services import device_service as device_module
+from app.services import sensor_service as sensor_module
+from app.services.anomaly_service import AnomalyService, RollingStats
+from tests.fakes import FakeCollection, patched
+
+
+class UnavailableRedis:
+    """Redis stand-in that is always unreachable"""
+
+    def hget(self, *args):
+        raise redis.ConnectionError("unavailable")
+
+    def pipeline(self, *args, **kwargs):
+        raise redis.ConnectionError("unavailable")
+
+
+class TestRollingStats:
+    """Test rolling statistics"""
+
+    def test_window_statistics(self):
+        """Test mean, variance, min and max follow the last window of readings"""
+        values = [random.uniform(6.0, 8.0) for _ in range(137)]
+        stats = RollingStats(window=20, alpha=0.2)
+        for value in values:
+            stats.push(value)
+
+        window = values[-20:]
+        assert stats.mean == pytest.approx(statistics.fmean(window))
+        assert stats.variance == pytest.approx(statistics.pvariance(window), abs=1e-9)
+        assert stats.minimum == min(window)
+        assert stats.maximum == max(window)
+
+    def test_round_trip(self):
+        """Test serialized state restores the same window"""
+        stats = RollingStats(window=5, alpha=0.5)
+        for value in [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]:
+            stats.push(value)
+
+        restored = RollingStats.from_dict(stats.to_dict(), window=5, alpha=0.5)
+
+        assert restored.mean == stats.mean
+        assert restored.ewma == stats.ewma
+        assert restored.minimum == 3.0
+        assert restored.maximum == 7.0
+
+
+class TestAnomalyService:
+    """Test anomaly scoring"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.service = AnomalyService(
+            window=30, threshold=6.0, min_samples=10, drop_anomalies=True, client=UnavailableRedis(),
+            rebaseline_after=10
+        )
+
+    def test_spike_is_flagged(self):
+        """Test a pH jump is scored as anomalous after warm-up"""
+        for i in range(30):
+            result = self.service.observe('dev1', 'ph', 7.0 + (i % 3) * 0.05)
+        assert result.score is not None and not result.is_anomaly
+
+        spike = self.service.observe('dev1', 'ph', 12.5)
+        assert spike.is_anomaly
+
+    def test_dropped_spikes_stay_out_of_statistics(self):
+        """Test repeated dropped spikes keep being flagged and leave the statistics untouched"""
+        for i in range(30):
+            self.service.observe('dev4', 'ph', 7.0 + (i % 3) * 0.05)
+        before = self.service.get_stats('dev4', 'ph')
+
+        spikes = [self.service.observe('dev4', 'ph', 12.5) for _ in range(9)]
+
+        assert all(spike.is_anomaly for spike in spikes)
+        assert self.service.get_stats('dev4', 'ph') == before
+
+    def test_level_shift_rebaselines_window(self):
+        """Test a run of dropped readings at a new level restarts the window from them"""
+        for i in range(30):
+            self.service.observe('dev6', 'ph', 7.0 + (i % 3) * 0.05)
+
+        shifted = [self.service.observe('dev6', 'ph', 9.0 + (i % 2) * 0.05) for i in range(12)]
+
+        assert all(result.is_anomaly for result in shifted[:9])
+        assert not any(result.is_anomaly for result in shifted[9:])
+        stats = self.service.get_stats('dev6', 'ph')
+        assert stats['count'] == 12 and stats['min'] == 9.0
+
+    def test_isolated_spikes_do_not_rebaseline(self):
+        """Test an accepted reading between spikes restarts the run"""
+        for i in range(30):
+            self.service.observe('dev7', 'ph', 7.0 + (i % 3) * 0.05)
+
+        for _ in range(3):
+            spikes = [self.service.observe('dev7', 'ph', 12.5) for _ in range(9)]
+            assert all(spike.is_anomaly for spike in spikes)
+            assert not self.service.observe('dev7', 'ph', 7.05).is_anomaly
+
+        assert self.service.get_stats('dev7', 'ph')['max'] < 12.5
+
+    def test_kept_anomalies_update_statistics(self):
+        """Test without dropping, flagged readings are stored and so join the statistics"""
+        service = AnomalyService(window=30, threshold=6.0, min_samples=10, drop_anomalies=False,
+                                 client=UnavailableRedis())
+        for i in range(30):
+            service.observe('dev5', 'ph', 7.0 + (i % 3) * 0.05)
+
+        assert service.observe('dev5', 'ph', 12.5).is_anomaly
+        assert service.get_stats('dev5', 'ph')['max'] == 12.5
+
+    def test_warm_up_has_no_score(self):
+        """Test readings are not scored before min_samples"""
+        result = self.service.observe('dev2', 'tds', 300.0)
+        assert result.score is None
+        assert result.is_anomaly is False
+
+    def test_filter_readings_drops_anomalies(self):
+        """Test anomalous readings are removed from IoT payloads"""
+        for i in range(30):
+            self.service.filter_readings('dev3', {'turbidity': {'value': 5.0 + (i % 2) * 0.1}, 'ph': 7.0})
+
+        payload, scores = self.service.filter_readings('dev3', {'turbidity': {'value': 900.0}, 'ph': 7.0})
+
+        assert 'turbidity' not in payload
+        assert payload['ph'] == 7.0
+        assert scores['turbidity'] >= 6.0
+
+
+class TestSensorServiceScoring:
+    """Test REST ingestion feeds the same windows as iot_data"""
+
+    def test_create_sensor_scores_raw_values(self):
+        """Test create_sensor observes the raw reading, the unit iot_data payloads are scored in"""
+        anomaly = AnomalyService(window=30, threshold=6.0, min_samples=10, client=UnavailableRedis())
+        devices = FakeCollection()
+        with patched(device_module, dbDevices=devices, dbVersions=FakeCollection()), \
+                patched(sensor_module, dbDevices=devices, dbSensors=FakeCollection()):
+            device_module.DeviceService().create_device({'device_id': 'dev1', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+            service = sensor_module.SensorService()
+            service.anomaly_service = anomaly
+            service.create_sensor({'sensor_type': 'ph', 'value': 2048}, 'dev1')
+        anomaly.filter_readings('dev1', {'ph': 2050})
+
+        assert anomaly.get_stats('dev1', 'ph')['mean'] == 2049.0
@@ -0,0 +1,155 @@
+"""
+Test the API key registry
+"""
+
+import pytest
+from app.services import api_key_service as api_key_module
+from app.services.api_key_service import ApiKeyService, CHANGES_CHANNEL, hash_api_key
+from tests.fakes import FakeCollection, FakeRedis, patched
+
+
+@pytest.fixture
+def keys():
+    """Replace the API key collection with an in-process fake"""
+    collection = FakeCollection()
+    with patched(api_key_module, dbApiKeys=collection):
+        yield collection
+
+
+class TestApiKeyService:
+    """Test ApiKeyService"""
+
+    def setup_method(self):
+        """Set up a service with the configured bootstrap key"""
+        self.redis = FakeRedis()
+        self.service = ApiKeyService(client=self.redis, legacy_key='bootstrap-key')
+
+    def test_configured_key_has_all_scopes(self):
+        """Test the configured key keeps working with every scope"""
+        key = self.service.authenticate('bootstrap-key')
+
+        assert key['key_id'] == 'config'
+        assert '*' in key['scopes']
+        assert self.service.authenticate('wrong-key') is None
+        assert self.service.authenticate(None) is None
+
+    def test_created_key_is_stored_hashed(self, keys):
+        """Test only the hash of a new key is stored and the change is published"""
+        created = self.service.create_key('Kiosk operator', scopes=['read'], quota_per_minute=30)
+        stored = keys.find_one({"key_id": created['key_id']})
+
+        assert stored['_id'] == hash_api_key(created['api_key'])
+        assert created['api_key'] not in str(stored)
+        assert self.redis.published == [(CHANGES_CHANNEL, stored['_id'])]
+        assert self.service.authenticate(created['api_key'])['quota_per_minute'] == 30
+
+    def test_reload_picks_up_keys_created_elsewhere(self, keys):
+        """Test a change notification makes another worker accept a new key"""
+        created = ApiKeyService(client=self.redis).create_key('Integration')
+        assert self.service.authenticate(created['api_key']) is None
+
+        self.service.reload(self.redis.published[-1][1])
+
+        assert self.service.authenticate(created['api_key'])['name'] == 'Integration'
+
+    def test_revoked_key_is_rejected(self, keys):
+        """Test revocation removes the key here and on reload elsewhere"""
+        other_worker = ApiKeyService(client=self.redis)
+        created = self.service.create_key('Kiosk operator')
+        other_worker.reload()
+
+        assert self.service.revoke_key(created['key_id']) is True
+        other_worker.reload(self.redis.published[-1][1])
+
+        assert self.service.authenticate(created['api_key']) is None
+        assert other_worker.authenticate(created['api_key']) is None
+        assert self.service.revoke_key('missing') is False
+
+    def test_full_reload_skips_inactive_keys(self, keys):
+        """Test a full reload only caches active keys"""
+        active = self.service.create_key('Active')
+        revoked = self.service.create_key('Revoked')
+        self.service.revoke_key(revoked['key_id'])
+
+        fresh = ApiKeyService(client=self.redis)
+        fresh.reload()
+
+        assert fresh.authenticate(active['api_key']) is not None
+        assert fresh.authenticate(revoked['api_key']) is None
+
+    def test_invalid_quota_rejected(self, keys):
+        """Test quotas must be positive integers"""
+        with pytest.raises(ValueError):
+            self.service.create_key('Kiosk', quota_per_minute=0)
+        with pytest.raises(ValueError):
+            self.service.create_key('')
+
+
+    @pytest.mark.parametrize('scopes', ['admin', [], ['read', 'owner'], [1]])
+    def test_invalid_scopes_rejected(self, keys, scopes):
+        """Test scopes must be a non-empty list of known scope names"""
+        with pytest.raises(ValueError):
+            self.service.create_key('Kiosk', scopes=scopes)
+        assert keys.find() == []
+
+
+@pytest.fixture
+def app_keys(app, keys):
+    """The application's API key service, publishing to an in-process Redis"""
+    with app.app_context():
+        from app.services.registry import get_service
+        service = get_service('api_keys')
+    with patched(service, client=FakeRedis()):
+        yield service
+
+
+class TestApiKeyScopes:
+    """Test scopes on routes"""
+
+    def test_read_only_key_cannot_write(self, client, app_keys):
+        """Test a read-only key is refused on writes and admin routes"""
+        created = app_keys.create_key('Dashboard', scopes=['read'])
+        headers = {'X-API-Key': created['api_key']}
+
+        read = client.get('/api/v1/example', headers=headers)
+        write = client.post('/api/v1/example', json={'name': 'n', 'value': 'v'}, headers=headers)
+        admin = client.get('/api/v1/admin/cache/stats', headers=headers)
+
+        assert read.status_code == 200
+        assert write.status_code == 403
+        assert admin.status_code == 403
+
+    def test_read_only_key_can_batch_reads(self, client, app_keys):
+        """Test a read-only key may batch reads while each write sub-request is still refused"""
+        created = app_keys.create_key('Dashboard', scopes=['read'])
+        headers = {'X-API-Key': created['api_key']}
+
+        response = client.post('/api/v1/batch', headers=headers, json={'requests': [
+            {'path': '/api/v1/example'},
+            {'method': 'POST', 'path': '/api/v1/example', 'body': {'name': 'n', 'value': 'v'}}
+        ]})
+
+        assert response.status_code == 200
+        results = response.get_json()['result']['data']['responses']
+        assert [result['status'] for result in results] == [200, 403]
+
+    def test_invalid_scopes_answer_400(self, client, api_headers, app_keys):
+        """Test the admin route refuses a scope given as a string"""
+        response = client.post('/api/v1/admin/api-keys', json={'name': 'Kiosk', 'scopes': 'admin'},
+                               headers=api_headers)
+
+        assert response.status_code == 400
+
+    def test_admin_can_manage_keys(self, client, api_headers, app_keys):
+        """Test the configured key can create, list and revoke keys"""
+        created = client.post('/api/v1/admin/api-keys', json={'name': 'Kiosk', 'quota_per_minute': 10},
+                              headers=api_headers).get_json()['result']['data']
+        listed = client.get('/api/v1/admin/api-keys', headers=api_headers).get_json()['result']['data']
+        revoked = client.delete(f"/api/v1/admin/api-keys/{created['key_id']}", headers=api_headers)
+        rejected = client.get('/api/v1/example', headers={'X-API-Key': created['api_key']})
+
+        assert created['scopes'] == ['read', 'write']
+        assert [key['key_id'] for key in listed] == [created['key_id']]
+        assert 'api_key' not in listed[0]
+        assert revoked.status_code == 200
+        assert rejected.status_code == 401
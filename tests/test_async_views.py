@@ -0,0 +1,196 @@
+"""
+Test the async views for device and sensor reads
+"""
+
+import asyncio
+import contextvars
+from types import SimpleNamespace
+import pytest
+from bson import ObjectId
+from app import create_app
+from app.services import async_read_service as async_read_module
+from app.services import device_service as device_module
+from app.services import sensor_service as sensor_module
+from app.storage.response_cache import response_cache
+from app.utils.async_runtime import AsyncRuntime
+from app.utils.config import TestingConfig
+from app.utils.etag import make_etag
+from tests.fakes import FakeAsyncCollection, FakeCollection, FakeRedis, RoundTrips, patched
+
+
+class AsyncViewsConfig(TestingConfig):
+    """Testing configuration with async views"""
+    ASYNC_VIEWS = True
+
+
+@pytest.fixture
+def app():
+    """Create an app serving reads with the async views"""
+    return create_app(AsyncViewsConfig)
+
+
+@pytest.fixture
+def database():
+    """Back the sync services and the async read service with the same in-process collections"""
+    devices, sensors, versions = FakeCollection(), FakeCollection(), FakeCollection()
+    round_trips = RoundTrips()
+    async_db = SimpleNamespace(
+        devices=FakeAsyncCollection(devices, latency=0.01, round_trips=round_trips),
+        sensors=FakeAsyncCollection(sensors, latency=0.01, round_trips=round_trips),
+        collection_versions=FakeAsyncCollection(versions, latency=0.01, round_trips=round_trips)
+    )
+    with patched(device_module, dbDevices=devices, dbVersions=versions), \
+            patched(sensor_module, dbDevices=devices, dbSensors=sensors), \
+            patched(async_read_module, get_db=lambda: async_db):
+        device_module.DeviceService().create_device({'device_id': 'dev1', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+        sensor_id = sensors.insert_one({
+            'device_id': 'dev1', 'timestamp': '2025-01-01T00:00:00Z', 'sensor_type': 'ph',
+            'unit': 'pH', 'value': 7.0, 'raw_value': 2048, 'status': 1
+        }).inserted_id
+        yield SimpleNamespace(devices=devices, sensors=sensors, round_trips=round_trips, sensor_id=str(sensor_id))
+
+
+class TestAsyncRuntime:
+    """Test AsyncRuntime"""
+
+    def setup_method(self):
+        """Set up a runtime with its own loop"""
+        self.runtime = AsyncRuntime(timeout=2)
+
+    def test_runs_on_one_shared_loop(self):
+        """Test coroutines from different calls share the same event loop"""
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        assert self.runtime.run(current_loop()) is self.runtime.run(current_loop())
+
+    def test_propagates_exceptions(self):
+        """Test exceptions raised in the coroutine reach the caller"""
+        async def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            self.runtime.run(fail())
+
+    def test_timeout_cancels(self):
+        """Test a slow coroutine times out and is cancelled"""
+        cancelled = []
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        with pytest.raises(TimeoutError):
+            self.runtime.run(slow(), timeout=0.05)
+        self.runtime.run(asyncio.sleep(0.05))
+
+        assert cancelled == [True]
+
+    def test_copies_context(self):
+        """Test context variables of the caller are visible in the coroutine"""
+        variable = contextvars.ContextVar('variable')
+        variable.set('request-1')
+
+        async def read():
+            return variable.get()
+
+        assert self.runtime.run(read()) == 'request-1'
+
+
+class TestAsyncViews:
+    """Test the async device and sensor views"""
+
+    def test_async_views_are_installed(self, app):
+        """Test the read endpoints are served by coroutine views"""
+        assert asyncio.iscoroutinefunction(app.view_functions['device.get_device_by_id'])
+        assert not asyncio.iscoroutinefunction(create_app(TestingConfig).view_functions['device.get_device_by_id'])
+
+    def test_get_device_and_conditional_poll(self, client, api_headers, database):
+        """Test a device read returns the sync path's ETag and answers polls with 304"""
+        response = client.get('/api/v1/device/dev1', headers=api_headers)
+        etag = response.headers['ETag']
+        polled = client.get('/api/v1/device/dev1', headers={**api_headers, 'If-None-Match': etag})
+
+        doc = database.devices.find_one({'device_id': 'dev1'})
+        assert response.status_code == 200
+        assert response.get_json()['result']['data']['device']['device_id'] == 'dev1'
+        assert etag == f'W/"{make_etag("device", str(doc["_id"]), doc["version"])}"'
+        assert polled.status_code == 304
+
+    def test_missing_device(self, client, api_headers, database):
+        """Test unknown devices return 404 and 400 like the sync views"""
+        assert client.get('/api/v1/device/missing', headers=api_headers).status_code == 404
+        assert client.get('/api/v1/device/missing/sensors', headers=api_headers).status_code == 400
+
+    def test_device_is_one_round_trip(self, client, api_headers, database):
+        """Test a device read takes its ETag from the document it returns"""
+        before = database.round_trips.count
+        response = client.get('/api/v1/device/dev1', headers=api_headers)
+
+        assert response.status_code == 200
+        assert database.round_trips.count - before == 1
+
+    @pytest.mark.parametrize('path', ['/sensors', '/sensor/{sensor_id}'])
+    def test_sensor_reads_run_alongside_device_lookup(self, client, api_headers, database, path):
+        """Test the device lookup and the sensor read overlap"""
+        response = client.get('/api/v1/device/dev1' + path.format(sensor_id=database.sensor_id), headers=api_headers)
+
+        assert response.status_code == 200
+        assert database.round_trips.max_in_flight == 2
+
+    def test_sensor_etag_covers_body(self, client, api_headers, database):
+        """Test a reading the version does not reflect yet still changes the ETag"""
+        etag = client.get('/api/v1/device/dev1/sensors', headers=api_headers).headers['ETag']
+        # As if read before create_sensor bumped the version
+        database.sensors.insert_one({
+            'device_id': 'dev1', 'timestamp': '2025-01-01T00:01:00Z', 'sensor_type': 'ph',
+            'unit': 'pH', 'value': 7.1, 'raw_value': 2050, 'status': 1
+        })
+        response = client.get('/api/v1/device/dev1/sensors', headers={**api_headers, 'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert len(response.get_json()['result']['data']['sensors']) == 2
+
+    def test_device_reads_use_response_cache(self, client, api_headers, database):
+        """Test the device list is cached in Redis and invalidated by writes, like the sync view"""
+        with patched(response_cache, client=FakeRedis(), enabled=True, _lock=None, _store=None):
+            first = client.get('/api/v1/devices', headers=api_headers)
+            reads = database.round_trips.count
+            cached = client.get('/api/v1/devices', headers=api_headers)
+            cached_reads = database.round_trips.count - reads
+
+            device_module.DeviceService().update_device('dev1', {'name': 'Renamed'})
+            renamed = client.get('/api/v1/devices', headers=api_headers)
+
+        assert cached.get_json()['result'] == first.get_json()['result']
+        assert cached_reads == 1  # the version only
+        assert renamed.get_json()['result']['data']['devices'][0]['name'] == 'Renamed'
+
+    @pytest.mark.parametrize('url, service, method', [
+        ('/api/v1/devices?page=2&per_page=5&status=active', device_module.DeviceService, 'list_devices'),
+        ('/api/v1/device/dev1/sensors?page=2&per_page=5&status=active', sensor_module.SensorService, 'list_sensors'),
+    ])
+    def test_pagination_matches_sync_views(self, api_headers, database, monkeypatch, url, service, method):
+        """Test paginated reads go to the same service call in both views"""
+        calls = []
+        monkeypatch.setattr(service, method, lambda self, *args, **kwargs: calls.append((args, kwargs)) or {'page': 2})
+
+        responses = [create_app(config).test_client().get(url, headers=api_headers)
+                     for config in (TestingConfig, AsyncViewsConfig)]
+
+        assert [response.get_json()['result']['data'] for response in responses] == [{'page': 2}] * 2
+        assert calls[0] == calls[1]
+        assert calls[0][1] == {'page': 2, 'per_page': 5, 'status_filter': 'active'}
+
+    def test_invalid_sensor_id(self, client, api_headers, database):
+        """Test malformed sensor IDs are rejected with 400"""
+        response = client.get('/api/v1/device/dev1/sensor/not-an-id', headers=api_headers)
+
+        assert response.status_code == 400
+
+    def test_requires_api_key(self, client, database):
+        """Test async views keep API key authentication"""
+        assert client.get('/api/v1/device/dev1').status_code == 403
@@ -0,0 +1,155 @@
+"""
+Test the batch endpoint
+"""
+
+import threading
+import pytest
+from app import create_app
+from app.services import device_service as device_module
+from app.services import sensor_service as sensor_module
+from app.utils.config import TestingConfig
+from tests.fakes import FakeCollection, patched
+
+
+class BatchLimitedConfig(TestingConfig):
+    """Testing configuration with a small budget and batch size"""
+    RATE_LIMIT_PER_MINUTE = 3
+    RATE_LIMIT_DEVICE_PER_MINUTE = 2
+    BATCH_MAX_REQUESTS = 4
+
+
+@pytest.fixture
+def devices():
+    """Replace the device collections with in-process fakes holding one device"""
+    with patched(device_module, dbDevices=FakeCollection(), dbVersions=FakeCollection()):
+        device_module.DeviceService().create_device({'device_id': 'dev1', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+        yield
+
+
+def responses(response):
+    return response.get_json()['result']['data']['responses']
+
+
+class TestBatch:
+    """Test POST /api/v1/batch"""
+
+    def test_runs_sub_requests_in_order(self, client, api_headers):
+        """Test results come back in request order with their ids and statuses"""
+        response = client.post('/api/v1/batch', headers=api_headers, json={'requests': [
+            {'id': 'create', 'method': 'POST', 'path': '/api/v1/example', 'body': {'name': 'a', 'value': 'b'}},
+            {'id': 'list', 'path': '/api/v1/example'},
+            {'id': 'missing', 'path': '/api/v1/example/does-not-exist'}
+        ]})
+
+        assert response.status_code == 200
+        results = responses(response)
+        assert [r['id'] for r in results] == ['create', 'list', 'missing']
+        assert [r['status'] for r in results] == [201, 200, 404]
+        created = results[0]['body']['result']['data']
+        assert created['name'] == 'a'
+
+    def test_reads_run_concurrently(self, client, api_headers, app):
+        """Test consecutive reads are in flight at the same time"""
+        threads = set()
+        barrier = threading.Barrier(4, timeout=5)
+        service = app.extensions['services'].get('example')
+        original = service.get_example_data
+
+        def record():
+            threads.add(threading.get_ident())
+            barrier.wait()  # breaks unless all four reads run concurrently
+            return original()
+
+        with patched(service, get_example_data=record):
+            response = client.post('/api/v1/batch', headers=api_headers,
+                                   json={'requests': [{'path': '/api/v1/example'}] * 4})
+
+        assert {r['status'] for r in responses(response)} == {200}
+        assert len(threads) == 4
+
+    def test_returns_etag_and_honours_if_none_match(self, client, api_headers, devices):
+        """Test ETags are returned and conditional sub-requests get 304"""
+        first = responses(client.post('/api/v1/batch', headers=api_headers,
+                                      json={'requests': [{'path': '/api/v1/device/dev1'}]}))[0]
+        etag = first['headers']['ETag']
+        second = responses(client.post('/api/v1/batch', headers=api_headers, json={'requests': [
+            {'path': '/api/v1/device/dev1', 'headers': {'If-None-Match': etag}}
+        ]}))[0]
+
+        assert first['status'] == 200
+        assert second['status'] == 304
+        assert second['body'] is None
+
+    def test_api_key_is_validated_once(self, client, api_headers, app):
+        """Test sub-requests reuse the batch's key record instead of authenticating again"""
+        api_keys = app.extensions['services'].get('api_keys')
+        calls = []
+        original = api_keys.authenticate
+
+        def counting(raw):
+            calls.append(raw)
+            return original(raw)
+
+        with patched(api_keys, authenticate=counting):
+            response = client.post('/api/v1/batch', headers=api_headers,
+                                   json={'requests': [{'path': '/api/v1/example'}] * 3})
+
+        assert {r['status'] for r in responses(response)} == {200}
+        assert len(calls) == 1
+
+    def test_requires_api_key(self, client):
+        """Test a batch without a key is rejected before any sub-request runs"""
+        response = client.post('/api/v1/batch', json={'requests': [{'path': '/api/v1/example'}]})
+
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize('requests', [
+        [],
+        [{'path': '/health'}],
+        [{'path': '/api/v1/batch', 'method': 'POST'}],
+        [{'path': '/api/v1/example', 'method': 'PATCH'}],
+        ['/api/v1/example']
+    ])
+    def test_rejects_invalid_sub_requests(self, client, api_headers, requests):
+        """Test empty batches, foreign paths, nesting and unknown methods are rejected"""
+        response = client.post('/api/v1/batch', headers=api_headers, json={'requests': requests})
+
+        assert response.status_code == 400
+
+
+class TestBatchLimits:
+    """Test batch size and rate limits"""
+
+    @pytest.fixture
+    def app(self):
+        """Create an app with a small budget and batch size"""
+        return create_app(BatchLimitedConfig)
+
+    def test_rejects_oversized_batch(self, client, api_headers):
+        """Test a batch larger than BATCH_MAX_REQUESTS is rejected"""
+        response = client.post('/api/v1/batch', headers=api_headers,
+                               json={'requests': [{'path': '/api/v1/example'}] * 5})
+
+        assert response.status_code == 400
+
+    def test_charges_one_hit_per_sub_request(self, client, api_headers):
+        """Test the batch is charged once, with a cost of one hit per sub-request"""
+        first = client.post('/api/v1/batch', headers=api_headers,
+                            json={'requests': [{'path': '/api/v1/example'}] * 3})
+        second = client.post('/api/v1/batch', headers=api_headers,
+                             json={'requests': [{'path': '/api/v1/example'}]})
+
+        assert first.status_code == 200
+        assert {r['status'] for r in responses(first)} == {200}
+        assert second.status_code == 429
+
+    def test_sub_requests_keep_device_budget(self, client, api_headers):
+        """Test telemetry sent through a batch is still counted against the device's budget"""
+        payload = {'value': 1024, 'unit': 'raw', 'sensor_type': 'ph'}
+        with patched(sensor_module, dbDevices=FakeCollection()):
+            response = client.post('/api/v1/batch', headers=api_headers, json={'requests': [
+                {'method': 'POST', 'path': '/api/v1/device/dev1/sensor', 'body': payload}
+            ] * 3})
+
+        assert response.status_code == 200
+        assert [r['status'] for r in responses(response)] == [400, 400, 429]
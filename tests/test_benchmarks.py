@@ -0,0 +1,39 @@
+"""
+Test the benchmark runner
+"""
+
+import json
+from tests.benchmarks import run
+
+
+class TestBenchmarkRunner:
+    """Test benchmark runner"""
+
+    def test_quick_run_writes_results(self, tmp_path):
+        """Test a quick calibration run emits machine-readable results"""
+        output = tmp_path / 'bench.json'
+
+        exit_code = run.main(['--quick', '--only', 'calibration', '--min-time', '0.01',
+                              '--thresholds', '', '--output', str(output)])
+
+        report = json.loads(output.read_text())
+        assert exit_code == 0
+        assert {r['name'] for r in report['results']} >= {'calibration.scalar.ph', 'calibration.lut.ph'}
+        assert all(r['ops_per_sec'] > 0 for r in report['results'])
+
+    def test_threshold_failure(self):
+        """Test results below their floor are reported"""
+        results = [{'name': 'calibration.lut.ph', 'ops_per_sec': 10.0}]
+
+        assert run.check_thresholds(results, {'calibration.lut.ph': {'min_ops_per_sec': 100}})
+        assert not run.check_thresholds(results, {'calibration.lut.ph': {'min_ops_per_sec': 100}}, scale=0.05)
+
+    def test_baseline_regression(self):
+        """Test throughput drops beyond the allowed regression are reported"""
+        baseline = {'results': [{'name': 'ingest.create_sensor.ph', 'ops_per_sec': 1000.0}]}
+
+        slower = [{'name': 'ingest.create_sensor.ph', 'ops_per_sec': 700.0}]
+        similar = [{'name': 'ingest.create_sensor.ph', 'ops_per_sec': 900.0}]
+
+        assert run.check_baseline(slower, baseline, 0.25)
+        assert not run.check_baseline(similar, baseline, 0.25)
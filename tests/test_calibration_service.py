@@ -0,0 +1,166 @@
+"""
+Test Calibration Service
+"""
+
+import pytest
+from app.event.device_state import device_state
+from app.services import device_service as device_module
+from app.services.calibration_service import CalibrationService
+from app.services.recalibration_service import RecalibrationService, normalize_timestamp
+from tests.fakes import FakeCollection, patched
+
+
+class TestCalibrationService:
+    """Test Calibration Service"""
+
+    def setup_method(self):
+        """Set up test fixtures"""
+        self.service = CalibrationService()
+        self.raw_values = [0, 1, 1.65, 3.3, 4, 512, 2048, 3000, 4095, 1234.7]
+
+    @pytest.mark.parametrize('sensor_type', ['ph', 'tds', 'turbidity'])
+    def test_batch_matches_scalar(self, sensor_type):
+        """Test batch calibration gives the same values as scalar calibration"""
+        expected = [self.service.calibrate_sensor_value(sensor_type, raw)['value'] for raw in self.raw_values]
+
+        assert self.service.calibrate_batch(sensor_type, self.raw_values) == expected
+        assert self.service.calibrate_batch(sensor_type, self.raw_values, use_lut=False) == expected
+
+    def test_batch_invalid_values(self):
+        """Test invalid readings calibrate to None"""
+        result = self.service.calibrate_batch('ph', [-1, 5000, None, 'abc'])
+        assert result == [None, None, None, None]
+
+    def test_batch_unsupported_sensor(self):
+        """Test batch calibration rejects unknown sensor types"""
+        with pytest.raises(ValueError):
+            self.service.calibrate_batch('flow', [1.0])
+
+    def test_lut_rebuilt_after_param_update(self):
+        """Test the lookup table follows parameter updates"""
+        before = self.service.calibrate_batch('tds', [2048])
+        self.service.update_calibration_params('tds', {
+            'slope': 250.0, 'intercept': 0.0, 'min_value': 0.0, 'max_value': 2000.0
+        })
+        after = self.service.calibrate_batch('tds', [2048])
+
+        assert after != before
+        assert after == [self.service.calibrate_tds(2048)['value']]
+
+    def test_with_overrides(self):
+        """Test overrides produce a copy without touching the original"""
+        overridden = self.service.with_overrides({'ph': {'slope': 5.0}})
+
+        assert overridden is not self.service
+        assert overridden.get_calibration_params('ph')['ph']['slope'] == 5.0
+        assert self.service.get_calibration_params('ph')['ph']['slope'] == 3.5
+        assert self.service.with_overrides(None) is self.service
+
+    def test_with_overrides_skips_malformed_entries(self):
+        """Test overrides that are not parameter objects leave the defaults in place"""
+        overridden = self.service.with_overrides({'ph': 5, 'tds': {'slope': 250.0}})
+
+        assert overridden.get_calibration_params('ph')['ph']['slope'] == 3.5
+        assert overridden.get_calibration_params('tds')['tds']['slope'] == 250.0
+
+    def test_validate_overrides_accepts_partial_params(self):
+        """Test any subset of the overridable parameters is accepted"""
+        self.service.validate_overrides({'PH': {'slope': 5}, 'tds': {'min_value': 0.0, 'max_value': 1500.0}, 'turbidity': {}})
+
+    @pytest.mark.parametrize('overrides', [
+        [],
+        {'flow': {'slope': 1.0}},
+        {'ph': 5},
+        {'ph': {'slope': 'x'}},
+        {'ph': {'slope': True}},
+        {'ph': {'neutral_adc': 2000}},
+    ])
+    def test_validate_overrides_rejects(self, overrides):
+        """Test unknown sensor types, non-object entries, unknown parameters and non-numeric values are refused"""
+        with pytest.raises(ValueError):
+            self.service.validate_overrides(overrides)
+
+
+class TestDeviceCalibrationParams:
+    """Test calibration_params on PUT /api/v1/device/<id>"""
+
+    @pytest.fixture(autouse=True)
+    def devices(self):
+        """Replace the devices and version collections with in-process fakes"""
+        devices = FakeCollection()
+        with patched(device_module, dbDevices=devices, dbVersions=FakeCollection()):
+            device_module.DeviceService().create_device({'device_id': 'dev1', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+            yield devices
+
+    def put(self, client, api_headers, calibration_params):
+        return client.put('/api/v1/device/dev1', headers=api_headers,
+                          json={'name': 'Kiosk', 'calibration_params': calibration_params})
+
+    def test_valid_params_are_stored(self, client, api_headers, devices):
+        """Test valid overrides are saved on the device"""
+        response = self.put(client, api_headers, {'ph': {'slope': 5.0}})
+
+        assert response.status_code == 200
+        assert devices.find_one({'device_id': 'dev1'})['calibration_params'] == {'ph': {'slope': 5.0}}
+
+    def test_update_refreshes_replayed_state(self, client, api_headers, devices):
+        """Test a device this worker serves replays values with the new overrides"""
+        device_state.seed('dev1', {'ph': 1.5})
+        try:
+            self.put(client, api_headers, {'ph': {'slope': 5.0}})
+            calibrated = device_state.snapshot('dev1', calibration=CalibrationService())['calibrated']
+        finally:
+            device_state.remove('dev1')
+
+        expected = CalibrationService().with_overrides({'ph': {'slope': 5.0}}).calibrate_sensor_value('ph', 1.5)
+        assert calibrated['ph']['value'] == expected['value']
+
+    @pytest.mark.parametrize('calibration_params', [{'ph': 5}, {'ph': {'slope': 'x'}}, {'flow': {}}])
+    def test_invalid_params_are_refused(self, client, api_headers, devices, calibration_params):
+        """Test malformed overrides answer 400 and are not stored"""
+        response = self.put(client, api_headers, calibration_params)
+
+        assert response.status_code == 400
+        assert 'calibration_params' not in devices.find_one({'device_id': 'dev1'})
+
+
+class TestRecalibrationService:
+    """Test recalibration chunk processing"""
+
+    def test_build_updates_only_changed_values(self):
+        """Test only readings whose value changes are rewritten"""
+        calibration = CalibrationService()
+        current = calibration.calibrate_ph(2048)['value']
+        docs = [
+            {'_id': 1, 'sensor_type': 'ph', 'raw_value': 2048.0, 'value': current},
+            {'_id': 2, 'sensor_type': 'ph', 'raw_value': 3000.0, 'value': 0.0},
+            {'_id': 3, 'sensor_type': 'tds', 'raw_value': 9999.0, 'value': 1.0},
+        ]
+
+        updates = RecalibrationService(calibration_service=calibration).build_updates(docs, calibration, 'job-1')
+
+        assert len(updates) == 1
+        assert updates[0]._filter == {'_id': 2}
+        assert updates[0]._doc['$set']['value'] == calibration.calibrate_ph(3000)['value']
+
+    def test_normalize_timestamp(self):
+        """Test timestamps are normalized to the stored format"""
+        assert normalize_timestamp('2025-08-17T10:00:00Z') == '2025-08-17T10:00:00.000000Z'
+        assert normalize_timestamp('2025-08-17T12:00:00+02:00') == '2025-08-17T10:00:00.000000Z'
+        assert normalize_timestamp(None) is None
+        with pytest.raises(ValueError):
+            normalize_timestamp('yesterday')
+
+    @pytest.mark.parametrize('settings', [
+        {'chunk_size': '500'},
+        {'chunk_size': 0},
+        {'chunk_size': 2.5},
+        {'max_rate': 'fast'},
+        {'max_rate': -1},
+        {'max_rate': True},
+    ])
+    def test_invalid_job_settings_are_refused(self, client, api_headers, settings):
+        """Test malformed chunk_size and max_rate answer 400 before a job is created"""
+        response = client.post('/api/v1/admin/recalibrate', headers=api_headers, json={'device_id': 'dev1', **settings})
+
+        assert response.status_code == 400
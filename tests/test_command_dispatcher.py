@@ -0,0 +1,149 @@
+"""
+Test the frontend -> IoT command downlink
+"""
+
+import pytest
+from app.event import command_dispatcher as dispatcher_module
+from app.event.command_dispatcher import CommandDispatcher, parse_command
+from tests.fakes import FakeClock
+
+
+class TestParseCommand:
+    """Test parse_command"""
+
+    def test_valid_command(self):
+        """Test a command is normalized with defaults"""
+        assert parse_command({'action': 'stop'}) == {'action': 'stop', 'tool': None, 'params': {}}
+
+    @pytest.mark.parametrize('data', [None, {}, {'action': ''}, {'action': 'dispense', 'tool': 1},
+                                      {'action': 'dispense', 'params': [250]}])
+    def test_invalid_command(self, data):
+        """Test malformed commands are refused"""
+        with pytest.raises(ValueError):
+            parse_command(data)
+
+
+class TestCommandDispatcher:
+    """Test CommandDispatcher"""
+
+    def setup_method(self):
+        """Set up a dispatcher recording emits, with a manual clock"""
+        self.clock = FakeClock()
+        self.emitted = []
+        self.dispatcher = CommandDispatcher(ack_timeout=1.0, max_retries=2, clock=self.clock,
+                                            emit=lambda event, message, to: self.emitted.append((event, message, to)))
+        self.dispatcher.ensure_started = lambda: None  # timeouts are checked by hand
+        self.dispatcher.register_device('dev1', 'iot-sid')
+
+    def send(self):
+        return self.dispatcher.send('dev1', 'iot-sid', 'frontend-sid', parse_command({'tool': 'pump', 'action': 'dispense'}))
+
+    def acks(self):
+        return [message for event, message, to in self.emitted if event == 'command_ack' and to == 'frontend-sid']
+
+    def test_command_is_sent_to_device_with_id(self):
+        """Test the command goes to the IoT sid with a server-assigned id"""
+        command_id = self.send()
+
+        assert self.emitted == [('command', {'id': command_id, 'action': 'dispense', 'tool': 'pump', 'params': {}},
+                                 'iot-sid')]
+        assert self.dispatcher.iot_sid('dev1') == 'iot-sid'
+
+    def test_ack_is_forwarded_with_latency(self):
+        """Test the device's ack reaches the sending frontend with its round trip"""
+        command_id = self.send()
+        self.clock.now += 0.03
+
+        latency = self.dispatcher.ack('iot-sid', command_id, result={'ml': 250})
+
+        assert latency == pytest.approx(30.0)
+        [ack] = self.acks()
+        assert ack['id'] == command_id
+        assert ack['status'] == 'ok'
+        assert ack['latency_ms'] == pytest.approx(30.0)
+        assert ack['result'] == {'ml': 250}
+
+    def test_duplicate_or_foreign_acks_are_ignored(self):
+        """Test an ack from another sid or a second ack does nothing"""
+        command_id = self.send()
+
+        assert self.dispatcher.ack('other-sid', command_id) is None
+        assert self.dispatcher.ack('iot-sid', command_id) is not None
+        assert self.dispatcher.ack('iot-sid', command_id) is None
+        assert len(self.acks()) == 1
+
+    def test_unacked_command_is_retried_then_times_out(self):
+        """Test a command is resent with the same id and the frontend is told when retries run out"""
+        command_id = self.send()
+
+        self.clock.now += 0.5
+        assert self.dispatcher.check_timeouts() == 0
+        self.clock.now += 0.5
+        assert self.dispatcher.check_timeouts() == 1
+        self.clock.now += 1.0
+        assert self.dispatcher.check_timeouts() == 1
+        self.clock.now += 1.0
+        assert self.dispatcher.check_timeouts() == 0
+
+        sent = [message['id'] for event, message, _ in self.emitted if event == 'command']
+        assert sent == [command_id] * 3
+        [ack] = self.acks()
+        assert ack['status'] == 'timeout'
+        assert ack['attempts'] == 3
+
+    def test_ack_after_retry_measures_from_first_send(self):
+        """Test the round trip includes the retries"""
+        command_id = self.send()
+        self.clock.now += 1.0
+        self.dispatcher.check_timeouts()
+        self.clock.now += 0.02
+
+        assert self.dispatcher.ack('iot-sid', command_id) == pytest.approx(1020.0)
+        assert self.acks()[0]['attempts'] == 2
+
+    def test_device_disconnect_fails_pending_commands(self):
+        """Test pending commands fail at once when the IoT client leaves"""
+        self.send()
+
+        assert self.dispatcher.unregister_device('dev1', 'iot-sid') == 1
+        assert self.acks()[0]['status'] == 'disconnected'
+        assert self.dispatcher.iot_sid('dev1') is None
+        assert self.dispatcher.stats()['in_flight'] == 0
+
+    def test_stats_histogram(self):
+        """Test round trips land in cumulative latency buckets"""
+        for delay in (0.004, 0.03, 0.03, 3.0):
+            command_id = self.send()
+            self.clock.now += delay
+            self.dispatcher.ack('iot-sid', command_id)
+
+        stats = self.dispatcher.stats()
+
+        assert stats['sent'] == 4
+        assert stats['acked'] == 4
+        buckets = stats['latency_ms']['buckets']
+        assert buckets['5'] == 1
+        assert buckets['25'] == 1
+        assert buckets['50'] == 3
+        assert buckets['2500'] == 3
+        assert buckets['+Inf'] == 4
+        assert stats['latency_ms']['count'] == 4
+
+    def test_send_starts_timeout_task(self, monkeypatch):
+        """Test the first command starts the timeout task, also on a worker without local IoT clients"""
+        started = []
+        monkeypatch.setattr(dispatcher_module.socketio, 'start_background_task',
+                            lambda target: started.append(target) or object())
+        dispatcher = CommandDispatcher(emit=lambda event, message, to: None)
+
+        dispatcher.send('dev1', 'iot-sid', 'frontend-sid', parse_command({'action': 'stop'}))
+        dispatcher.send('dev1', 'iot-sid', 'frontend-sid', parse_command({'action': 'stop'}))
+
+        assert started == [dispatcher._run]
+
+    def test_admin_endpoint_reports_commands(self, client, api_headers):
+        """Test the admin endpoint returns the shared dispatcher's stats"""
+        response = client.get('/api/v1/admin/realtime/commands', headers=api_headers)
+
+        assert response.status_code == 200
+        assert {'sent', 'acked', 'timed_out', 'latency_ms'} <= set(response.get_json()['result']['data'])
@@ -0,0 +1,66 @@
+"""
+Test response compression
+"""
+
+import gzip
+import json
+import zlib
+import pytest
+from flask import Response, jsonify
+from app import create_app
+from app.utils.config import TestingConfig
+
+
+@pytest.fixture
+def app():
+    """Create a test app with a large and a streamed endpoint"""
+    app = create_app(TestingConfig)
+
+    @app.route('/test/large')
+    def large():
+        return jsonify({'readings': [{'sensor_type': 'ph', 'value': 7.0 + i / 1000} for i in range(500)]})
+
+    @app.route('/test/stream')
+    def stream():
+        def generate():
+            for i in range(100):
+                yield json.dumps({'seq': i, 'value': 7.0}) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    return app
+
+
+class TestCompression:
+    """Test response compression"""
+
+    def test_large_response_gzipped(self, client):
+        """Test large JSON responses are compressed for gzip clients"""
+        response = client.get('/test/large', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert len(json.loads(gzip.decompress(response.data))['readings']) == 500
+
+    def test_health_not_compressed(self, client):
+        """Test tiny responses are sent as is"""
+        response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+
+        assert 'Content-Encoding' not in response.headers
+        assert json.loads(response.data)['status'] == 'healthy'
+
+    def test_not_compressed_without_accept_encoding(self, client):
+        """Test clients that do not accept an encoding get identity responses"""
+        response = client.get('/test/large', headers={'Accept-Encoding': 'gzip;q=0'})
+
+        assert 'Content-Encoding' not in response.headers
+        assert len(json.loads(response.data)['readings']) == 500
+
+    def test_streamed_response_compressed(self, client):
+        """Test chunked responses are compressed incrementally"""
+        response = client.get('/test/stream', headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        lines = zlib.decompress(response.data, 31).decode().splitlines()
+        assert len(lines) == 100
+        assert json.loads(lines[-1])['seq'] == 99
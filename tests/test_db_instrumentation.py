@@ -0,0 +1,160 @@
+"""
+Test MongoDB and Redis command instrumentation
+"""
+
+import logging
+from types import SimpleNamespace
+from flask import Flask
+from app.utils.db_instrumentation import DbInstrumentation, current_stats, db_instrumentation
+
+
+class RecordingRedis:
+    """Minimal Redis client surface the instrumentation wraps"""
+
+    def __init__(self):
+        self.commands = []
+
+    def execute_command(self, *args, **options):
+        self.commands.append(args)
+        return 'OK'
+
+    def get(self, key):
+        return self.execute_command('GET', key)
+
+    def pipeline(self, transaction=True):
+        return RecordingPipeline(self)
+
+
+class RecordingPipeline:
+    """Pipeline that sends its queued commands in one execute"""
+
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    def __len__(self):
+        return len(self.queued)
+
+    def set(self, key, value):
+        self.queued.append(('SET', key, value))
+        return self
+
+    def execute(self):
+        results = ['OK'] * len(self.queued)
+        self.queued = []
+        return results
+
+
+def mongo_event(command_name, collection, request_id=1, duration_micros=2000):
+    return SimpleNamespace(command_name=command_name, command={command_name: collection},
+                           request_id=request_id, duration_micros=duration_micros)
+
+
+class TestDbInstrumentation:
+    """Test DbInstrumentation"""
+
+    def setup_method(self):
+        """Set up instrumentation, an instrumented Redis client and an app with a route using both"""
+        self.instrumentation = DbInstrumentation(slow_command_ms=50.0)
+        self.redis = self.instrumentation.instrument_redis(RecordingRedis())
+        self.app = Flask(__name__)
+        self.app.config['DB_STATS_HEADER'] = True
+        self.app.config['DB_SLOW_COMMAND_MS'] = 50.0
+        self.instrumentation.init_app(self.app)
+
+        @self.app.route('/things')
+        def things():
+            self.mongo_find()
+            self.mongo_find()
+            self.redis.get('connected_devices')
+            return current_stats().as_dict()
+
+    def mongo_find(self, duration_micros=2000):
+        listener = self.instrumentation.mongo_listener
+        listener.started(mongo_event('find', 'sensors'))
+        listener.succeeded(mongo_event('find', 'sensors', duration_micros=duration_micros))
+
+    def test_commands_outside_requests_are_not_counted(self):
+        """Test commands run without a request or event only pass through"""
+        assert self.redis.get('key') == 'OK'
+        assert current_stats() is None
+
+    def test_request_counts_in_context_and_headers(self):
+        """Test a request's commands are counted and reported in response headers"""
+        response = self.app.test_client().get('/things')
+
+        assert response.get_json()['mongo'] == {'commands': 2, 'ms': 4.0}
+        assert response.get_json()['redis']['commands'] == 1
+        assert response.headers['X-DB-Commands'] == 'mongo=2, redis=1'
+        assert response.headers['Server-Timing'].startswith('mongo;dur=4.000;desc="2 commands", redis;dur=')
+        assert current_stats() is None
+
+    def test_headers_are_off_outside_debug(self):
+        """Test the headers are only added when enabled"""
+        self.instrumentation.headers = False
+
+        response = self.app.test_client().get('/things')
+
+        assert 'X-DB-Commands' not in response.headers
+
+    def test_pipeline_is_one_round_trip(self):
+        """Test a pipeline counts once however many commands it sends"""
+        @self.instrumentation.tracked('iot_data')
+        def handler():
+            self.redis.pipeline().set('a', 1).set('b', 2).execute()
+            return current_stats().counts['redis']
+
+        assert handler() == 1
+
+    def test_event_counts_roll_up_into_enclosing_stats(self):
+        """Test nested tracking (e.g. batch sub-requests) adds to the outer counts"""
+        @self.instrumentation.tracked('inner')
+        def inner():
+            self.redis.get('a')
+
+        @self.instrumentation.tracked('outer')
+        def outer():
+            self.redis.get('b')
+            inner()
+            return current_stats().counts['redis']
+
+        assert outer() == 2
+
+    def test_slow_commands_are_logged(self, caplog):
+        """Test commands at or above the threshold are logged with their target"""
+        with caplog.at_level(logging.WARNING, logger='app.utils.db_instrumentation'):
+            self.mongo_find(duration_micros=20000)
+            self.mongo_find(duration_micros=75000)
+
+        assert [record.getMessage() for record in caplog.records] == ['Slow mongo command find sensors: 75.0 ms']
+
+    def test_failed_commands_are_counted(self):
+        """Test a failed Mongo command still counts as a round trip"""
+        @self.instrumentation.tracked('connect')
+        def handler():
+            listener = self.instrumentation.mongo_listener
+            listener.started(mongo_event('insert', 'devices'))
+            listener.failed(mongo_event('insert', 'devices'))
+            return current_stats().counts['mongo']
+
+        assert handler() == 1
+
+
+class TestBatchCommandCounts:
+    """Test batch sub-requests roll up into the batch's counts"""
+
+    def test_concurrent_reads_are_counted(self, client, api_headers, app):
+        """Test reads run on the batch worker pool add their commands to the batch response"""
+        service = app.extensions['services'].get('example')
+        original = service.get_example_data
+
+        def one_find():
+            db_instrumentation.record('mongo', 'find examples', 1.0)
+            return original()
+
+        service.get_example_data = one_find
+        response = client.post('/api/v1/batch', headers=api_headers,
+                               json={'requests': [{'path': '/api/v1/example'}] * 3})
+
+        assert {r['status'] for r in response.get_json()['result']['data']['responses']} == {200}
+        assert response.headers['X-DB-Commands'].startswith('mongo=3,')
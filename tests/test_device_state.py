@@ -0,0 +1,128 @@
+"""
+Test the worker-local device state replayed to frontends on join
+"""
+
+from app.event.device_state import DeviceStateCache
+from app.event.update_coalescer import UpdateCoalescer
+from app.services.calibration_service import CalibrationService
+from tests.fakes import FakeClock
+
+
+class CountingCalibrationService(CalibrationService):
+    """CalibrationService recording the sensor types it calibrates, shared with its overridden copies"""
+
+    def __init__(self):
+        super().__init__()
+        self.calibrations = []
+
+    def calibrate_sensor_value(self, sensor_type, raw_value):
+        self.calibrations.append(sensor_type)
+        return super().calibrate_sensor_value(sensor_type, raw_value)
+
+
+class TestDeviceStateCache:
+    """Test DeviceStateCache"""
+
+    def setup_method(self):
+        """Set up a cache with a manual clock and a counting calibration"""
+        self.clock = FakeClock()
+        self.cache = DeviceStateCache(clock=self.clock)
+        self.calibration = CountingCalibrationService()
+        self.calibrations = self.calibration.calibrations
+
+    def test_unknown_device_has_no_snapshot(self):
+        """Test nothing is replayed for a device the worker has not seen"""
+        assert self.cache.snapshot('dev1') is None
+
+    def test_snapshot_has_latest_payload_and_status(self):
+        """Test the latest payload, scores and update time are replayed"""
+        self.cache.update('dev1', {'ph': 1.5}, {'ph': 0.2})
+        self.clock.now += 5
+        self.cache.update('dev1', {'ph': 1.6, 'tds': 0.8}, {'tds': 0.1})
+
+        snapshot = self.cache.snapshot('dev1')
+
+        assert snapshot['payload'] == {'ph': 1.6, 'tds': 0.8}
+        assert snapshot['anomaly_scores'] == {'tds': 0.1}
+        assert snapshot['online'] is True
+        assert snapshot['updated_at'] == 1005.0
+        assert snapshot['calibrated'] == {}
+
+    def test_calibrated_values_are_computed_once_per_payload(self):
+        """Test joins between two payloads reuse the calibrated values"""
+        self.cache.update('dev1', {'ph': 1.5, 'tds': 0.8, 'flow_in': 3, 'label': 'x'})
+
+        first = self.cache.snapshot('dev1', calibration=self.calibration)
+        self.cache.snapshot('dev1', calibration=self.calibration)
+
+        assert set(first['calibrated']) == {'ph', 'tds'}
+        assert set(first['calibrated']['ph']) == {'value', 'unit', 'status'}
+        assert sorted(self.calibrations) == ['flow_in', 'ph', 'tds']
+
+        self.cache.update('dev1', {'ph': 1.7})
+        assert set(self.cache.snapshot('dev1', calibration=self.calibration)['calibrated']) == {'ph'}
+        assert len(self.calibrations) == 4
+
+    def test_calibrated_values_use_device_overrides(self):
+        """Test replayed values are calibrated with the device's calibration_params"""
+        self.cache.update('dev1', {'ph': 1.5})
+        default = self.cache.snapshot('dev1', calibration=self.calibration)['calibrated']['ph']['value']
+        assert self.cache.needs_calibration_params('dev1')
+
+        self.cache.set_calibration_params('dev1', {'ph': {'slope': 2.0, 'intercept': 0.0}})
+        snapshot = self.cache.snapshot('dev1', calibration=self.calibration)
+
+        assert not self.cache.needs_calibration_params('dev1')
+        expected = self.calibration.with_overrides({'ph': {'slope': 2.0, 'intercept': 0.0}})
+        assert snapshot['calibrated']['ph']['value'] == expected.calibrate_sensor_value('ph', 1.5)['value']
+        assert snapshot['calibrated']['ph']['value'] != default
+
+    def test_calibration_params_update_only_tracked_devices(self):
+        """Test update_device does not start tracking a device this worker does not serve"""
+        self.cache.set_calibration_params('dev1', {'ph': {'slope': 2.0}}, create=False)
+
+        assert self.cache.snapshot('dev1') is None
+        assert not self.cache.needs_calibration_params('dev1')
+
+    def test_seed_fills_in_without_overwriting_newer_payload(self):
+        """Test a payload from Redis is used only until the device reports here"""
+        self.cache.seed('dev1', {'ph': 1.0}, online=True)
+        assert self.cache.payload('dev1') == {'ph': 1.0}
+
+        self.cache.update('dev1', {'ph': 2.0})
+        self.cache.seed('dev1', {'ph': 1.0}, online=True)
+
+        assert self.cache.payload('dev1') == {'ph': 2.0}
+
+    def test_seed_without_payload_records_status(self):
+        """Test a device that has not reported yet is replayed with its status only"""
+        self.cache.seed('dev1', None, online=False)
+
+        snapshot = self.cache.snapshot('dev1')
+
+        assert snapshot['payload'] is None
+        assert snapshot['online'] is False
+        assert snapshot['updated_at'] is None
+
+    def test_remove_forgets_device(self):
+        """Test a device whose IoT client left is no longer replayed"""
+        self.cache.update('dev1', {'ph': 1.5})
+        self.cache.remove('dev1')
+
+        assert self.cache.snapshot('dev1') is None
+
+
+class TestUpdateCoalescerSelect:
+    """Test filtering a message by a frontend's subscription"""
+
+    def test_select_uses_frontend_subscription(self):
+        """Test a message is restricted to the sensors the frontend subscribed to"""
+        coalescer = UpdateCoalescer(emit=lambda room, message, sids: None)
+        coalescer.add('dev1', 'all')
+        coalescer.add('dev1', 'ph-only', sensors=['ph'])
+        message = {'payload': {'ph': 1.5, 'tds': 0.8}, 'anomaly_scores': {'tds': 0.1}}
+
+        assert coalescer.select('all', message) == message
+        assert coalescer.select('ph-only', message)['payload'] == {'ph': 1.5}
+        assert coalescer.select('ph-only', {'payload': {'tds': 0.8}}) is None
+        assert coalescer.select('unknown', message) is None
@@ -0,0 +1,187 @@
+"""
+Test signed device tokens for Socket.IO authentication
+"""
+
+import pytest
+import redis
+from app import create_app
+from app.services import device_service as device_module
+from app.services.device_token_service import DeviceTokenService
+from app.utils.config import TestingConfig
+from tests.fakes import FakeClock, FakeCollection, FakeRedis, patched
+
+
+class BrokenRedis(FakeRedis):
+    """Redis client whose reads fail"""
+
+    def smembers(self, key):
+        raise redis.ConnectionError("down")
+
+
+class TestDeviceTokenService:
+    """Test DeviceTokenService"""
+
+    def setup_method(self):
+        """Set up a service with an in-process Redis and a manual clock"""
+        self.redis = FakeRedis()
+        self.clock = FakeClock()
+        self.service = DeviceTokenService('secret', client=self.redis, ttl=3600, refresh_interval=30.0,
+                                          clock=self.clock)
+
+    def verify(self, token, service=None):
+        return (service or self.service).verify(token['device_id'], token['client_type'], token['salt'], token['key'])
+
+    def test_issued_token_verifies(self):
+        """Test a fresh token is accepted"""
+        token = self.service.issue('dev1')
+
+        assert token['expires_at'] == 1000 + 3600
+        assert self.verify(token) is None
+
+    def test_token_is_bound_to_device_and_client_type(self):
+        """Test a token cannot be replayed for another device or client type"""
+        token = self.service.issue('dev1', client_type='iot')
+
+        assert self.service.verify('dev2', 'iot', token['salt'], token['key']) == 'invalid key'
+        assert self.service.verify('dev1', 'frontend', token['salt'], token['key']) == 'invalid key'
+
+    def test_tampered_or_foreign_tokens_are_rejected(self):
+        """Test altered salts, malformed salts and other secrets are rejected"""
+        token = self.service.issue('dev1')
+        issued_at, _, nonce = token['salt'].split('.')
+        extended = f"{issued_at}.9999999999.{nonce}"
+        other = DeviceTokenService('other-secret', client=self.redis, clock=self.clock)
+
+        assert self.service.verify('dev1', 'iot', extended, token['key']) == 'invalid key'
+        assert self.service.verify('dev1', 'iot', 'dummysalt1', 'dummykey1') == 'malformed salt'
+        assert self.service.verify('dev1', 'iot', None, None) == 'missing credentials'
+        assert self.verify(token, service=other) == 'invalid key'
+
+    def test_expired_token_is_rejected(self):
+        """Test a token stops working at its expiry"""
+        token = self.service.issue('dev1', ttl=60)
+        self.clock.now += 60
+
+        assert self.verify(token) == 'expired'
+
+    def test_revoked_token_is_rejected(self):
+        """Test revoking one token leaves the device's other tokens valid"""
+        revoked = self.service.issue('dev1')
+        kept = self.service.issue('dev1')
+        self.service.revoke_token(revoked['salt'])
+
+        assert self.verify(revoked) == 'revoked'
+        assert self.verify(kept) is None
+
+    def test_revoking_device_rejects_earlier_tokens_only(self):
+        """Test a device revocation covers tokens issued up to then, not new ones"""
+        old = self.service.issue('dev1')
+        self.service.revoke_device('dev1')
+        self.clock.now += 1
+        new = self.service.issue('dev1')
+
+        assert self.verify(old) == 'revoked'
+        assert self.verify(new) is None
+
+    def test_other_workers_see_revocations_after_refresh(self):
+        """Test revocations reach another worker's cached list within the refresh interval"""
+        token = self.service.issue('dev1')
+        other = DeviceTokenService('secret', client=self.redis, refresh_interval=0.0, clock=self.clock)
+        assert self.verify(token, service=other) is None
+
+        self.service.revoke_token(token['salt'])
+
+        assert self.verify(token, service=other) == 'revoked'
+
+    def test_redis_outage_keeps_cached_revocations(self):
+        """Test a failed refresh keeps verifying against the last known list"""
+        token = self.service.issue('dev1')
+        self.service.revoke_token(token['salt'])
+        with patched(self.service, client=BrokenRedis(), refresh_interval=0.0):
+            assert self.verify(token) == 'revoked'
+            assert self.verify(self.service.issue('dev1')) is None
+
+    def test_issue_validates_input(self):
+        """Test invalid device IDs, client types and TTLs are refused"""
+        with pytest.raises(ValueError):
+            self.service.issue('')
+        with pytest.raises(ValueError):
+            self.service.issue('dev1', client_type='admin')
+        with pytest.raises(ValueError):
+            self.service.issue('dev1', ttl=0)
+
+
+@pytest.fixture
+def app_tokens(app):
+    """The application's device token service on an in-process Redis, with one provisioned device"""
+    with app.app_context():
+        from app.services.registry import get_service
+        service = get_service('device_tokens')
+    with patched(device_module, dbDevices=FakeCollection(), dbVersions=FakeCollection()), \
+            patched(service, client=FakeRedis()):
+        device_module.DeviceService().create_device({'device_id': 'dev1', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+        yield service
+
+
+class TestDeviceTokenRoutes:
+    """Test the device token admin endpoints"""
+
+    def test_issue_token(self, client, api_headers, app_tokens):
+        """Test a token is issued for a provisioned device and verifies"""
+        response = client.post('/api/v1/admin/device-tokens', headers=api_headers,
+                               json={'device_id': 'dev1', 'client_type': 'frontend', 'ttl_seconds': 600})
+
+        assert response.status_code == 201
+        token = response.get_json()['result']['data']
+        assert app_tokens.verify('dev1', 'frontend', token['salt'], token['key']) is None
+
+    def test_issue_token_for_unknown_device(self, client, api_headers, app_tokens):
+        """Test no token is issued for a device that is not provisioned"""
+        response = client.post('/api/v1/admin/device-tokens', headers=api_headers, json={'device_id': 'ghost'})
+
+        assert response.status_code == 404
+
+    def test_issue_token_with_invalid_ttl(self, client, api_headers, app_tokens):
+        """Test an invalid TTL is a bad request"""
+        response = client.post('/api/v1/admin/device-tokens', headers=api_headers,
+                               json={'device_id': 'dev1', 'ttl_seconds': -5})
+
+        assert response.status_code == 400
+
+    def test_revoke_token(self, client, api_headers, app_tokens):
+        """Test a revoked token no longer verifies"""
+        token = app_tokens.issue('dev1')
+
+        response = client.post('/api/v1/admin/device-tokens/revoke', headers=api_headers, json={'salt': token['salt']})
+
+        assert response.status_code == 200
+        assert app_tokens.verify('dev1', 'iot', token['salt'], token['key']) == 'revoked'
+
+    def test_revoke_requires_salt_or_device(self, client, api_headers, app_tokens):
+        """Test a revocation without a target is a bad request"""
+        response = client.post('/api/v1/admin/device-tokens/revoke', headers=api_headers, json={})
+
+        assert response.status_code == 400
+
+
+class TestDeviceTokenSecret:
+    """Test the signing secret is configured explicitly"""
+
+    def test_app_refuses_to_start_without_secret(self):
+        """Test device auth without DEVICE_TOKEN_SECRET fails at startup instead of using SECRET_KEY"""
+        class NoSecretConfig(TestingConfig):
+            DEVICE_TOKEN_SECRET = None
+
+        with pytest.raises(ValueError, match='DEVICE_TOKEN_SECRET'):
+            create_app(NoSecretConfig)
+
+    def test_token_endpoints_disabled_without_secret(self, api_headers):
+        """Test with device auth off and no secret the app starts but issues no tokens"""
+        class NoAuthConfig(TestingConfig):
+            DEVICE_TOKEN_SECRET = None
+            DEVICE_AUTH_REQUIRED = False
+
+        client = create_app(NoAuthConfig).test_client()
+        response = client.post('/api/v1/admin/device-tokens', headers=api_headers, json={'device_id': 'dev1'})
+
+        assert response.status_code == 503
@@ -0,0 +1,97 @@
+"""
+Test ETag and conditional GET support
+"""
+
+import pytest
+from app.services import device_service as device_module
+from app.services import sensor_service as sensor_module
+from app.services.anomaly_service import AnomalyService
+from app.storage.response_cache import response_cache
+from tests.fakes import FakeCollection, FakeRedis, patched
+
+
+@pytest.fixture
+def devices():
+    """Replace the devices and version collections with in-process fakes"""
+    devices = FakeCollection()
+    with patched(device_module, dbDevices=devices, dbVersions=FakeCollection()):
+        yield devices
+
+
+class TestConditionalGet:
+    """Test conditional GET on device endpoints"""
+
+    def test_device_not_modified(self, client, api_headers, devices):
+        """Test an unchanged device is answered with 304 from its version"""
+        device_module.DeviceService().create_device({'device_id': 'dev1', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+
+        first = client.get('/api/v1/device/dev1', headers=api_headers)
+        etag = first.headers['ETag']
+        second = client.get('/api/v1/device/dev1', headers={**api_headers, 'If-None-Match': etag})
+
+        assert first.status_code == 200
+        assert etag.startswith('W/')
+        assert second.status_code == 304
+        assert second.data == b''
+
+    def test_device_modified_after_update(self, client, api_headers, devices):
+        """Test a write changes the device ETag"""
+        device_module.DeviceService().create_device({'device_id': 'dev2', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+        etag = client.get('/api/v1/device/dev2', headers=api_headers).headers['ETag']
+
+        device_module.DeviceService().update_device('dev2', {'name': 'Renamed'})
+        response = client.get('/api/v1/device/dev2', headers={**api_headers, 'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_cached_body_follows_version(self, client, api_headers, devices):
+        """Test a read between a write's version bump and its invalidation is not served the old body"""
+        device_module.DeviceService().create_device({'device_id': 'dev4', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+        with patched(response_cache, client=FakeRedis(), enabled=True, _lock=None, _store=None):
+            client.get('/api/v1/device/dev4', headers=api_headers)
+            client.get('/api/v1/devices', headers=api_headers)
+            # The invalidation has not run yet
+            with patched(response_cache, invalidate=lambda *tags: None):
+                device_module.DeviceService().update_device('dev4', {'name': 'Renamed'})
+                device = client.get('/api/v1/device/dev4', headers=api_headers).get_json()['result']['data']
+                listed = client.get('/api/v1/devices', headers=api_headers).get_json()['result']['data']
+
+        assert device['device']['name'] == 'Renamed'
+        assert 'Renamed' in str(listed)
+
+    def test_device_list_not_modified(self, client, api_headers, devices):
+        """Test the device list ETag follows the collection version"""
+        etag = client.get('/api/v1/devices', headers=api_headers).headers['ETag']
+        unchanged = client.get('/api/v1/devices', headers={**api_headers, 'If-None-Match': etag})
+
+        device_module.DeviceService().create_device({'device_id': 'dev3', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+        changed = client.get('/api/v1/devices', headers={**api_headers, 'If-None-Match': etag})
+
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+
+
+class TestSensorWriteOrder:
+    """Test sensor writes become visible before the version moves"""
+
+    def test_reading_stored_before_version_bump(self):
+        """Test a read seeing the bumped device version also sees the new reading"""
+        sensors = FakeCollection()
+        readings_at_bump = []
+
+        class RecordingDevices(FakeCollection):
+            def update_one(self, query, update, upsert=False):
+                if '$inc' in update:
+                    readings_at_bump.append(len(sensors.find({'device_id': 'dev1'})))
+                return super().update_one(query, update, upsert)
+
+        devices = RecordingDevices()
+        with patched(device_module, dbDevices=devices, dbVersions=FakeCollection()), \
+                patched(sensor_module, dbDevices=devices, dbSensors=sensors):
+            device_module.DeviceService().create_device({'device_id': 'dev1', 'name': 'Kiosk', 'sensors': {}, 'tools': []})
+            service = sensor_module.SensorService()
+            service.anomaly_service = AnomalyService(client=FakeRedis())
+            service.create_sensor({'sensor_type': 'ph', 'value': 2048}, 'dev1')
+
+        assert readings_at_bump == [1]
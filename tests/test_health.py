@@ -0,0 +1,162 @@
+"""
+Test liveness and readiness probes
+"""
+
+import time
+import pytest
+from flask import Flask
+from app.services.health_service import HealthChecker, health_checker
+
+
+class TestHealthChecker:
+    """Test HealthChecker"""
+
+    def setup_method(self):
+        """Set up a checker with in-process checks"""
+        self.calls = 0
+        self.database_up = True
+
+        def database():
+            self.calls += 1
+            if not self.database_up:
+                raise ConnectionError("connection refused")
+            return True
+
+        self.checker = HealthChecker(checks={'mongodb': database, 'redis': lambda: True}, interval=0.01)
+
+    def test_unknown_before_first_check(self):
+        """Test the checker is not ready before any check ran"""
+        status = self.checker.snapshot()
+
+        assert status['ready'] is False
+        assert status['checks']['mongodb'] == {'status': 'unknown'}
+
+    def test_ready_when_all_dependencies_up(self):
+        """Test readiness and recorded latency after a check round"""
+        self.checker.run_checks()
+        status = self.checker.snapshot()
+
+        assert status['ready'] is True
+        assert status['checks']['redis']['status'] == 'up'
+        assert status['checks']['mongodb']['latency_ms'] >= 0
+
+    def test_failing_dependency_reports_error(self):
+        """Test a raising check marks its dependency down"""
+        self.database_up = False
+        self.checker.run_checks()
+        status = self.checker.snapshot()
+
+        assert status['ready'] is False
+        assert status['checks']['mongodb']['status'] == 'down'
+        assert 'connection refused' in status['checks']['mongodb']['error']
+
+    def test_stale_results_are_not_ready(self):
+        """Test old results stop counting as up"""
+        self.checker.stale_after = 0.01
+        self.checker.run_checks()
+        time.sleep(0.02)
+
+        status = self.checker.snapshot()
+
+        assert status['ready'] is False
+        assert status['checks']['mongodb']['status'] == 'stale'
+
+    def test_snapshot_does_not_run_checks(self):
+        """Test reading the status never touches the dependencies"""
+        self.checker.run_checks()
+        for _ in range(100):
+            self.checker.snapshot()
+
+        assert self.calls == 1
+
+    def test_background_thread_refreshes(self):
+        """Test the background thread runs checks on its interval"""
+        self.checker.ensure_started()
+        try:
+            deadline = time.time() + 2
+            while self.calls < 3 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            self.checker.stop()
+
+        assert self.calls >= 3
+
+    def test_first_probe_waits_for_first_round(self):
+        """Test a probe right after the thread starts sees results instead of 'unknown'"""
+        def slow_database():
+            time.sleep(0.05)
+            return True
+
+        checker = HealthChecker(checks={'mongodb': slow_database}, interval=0.01)
+        checker.ensure_started()
+        try:
+            finished = checker.wait_for_first_round()
+            status = checker.snapshot()
+        finally:
+            checker.stop()
+
+        assert finished is True
+        assert status['ready'] is True
+
+    def test_first_round_wait_is_bounded(self):
+        """Test a hanging dependency delays the first probe by startup_wait at most"""
+        checker = HealthChecker(checks={'mongodb': lambda: time.sleep(1)}, interval=0.01, startup_wait=0.05)
+        checker.ensure_started()
+        try:
+            started = time.time()
+            finished = checker.wait_for_first_round()
+            waited = time.time() - started
+        finally:
+            checker.stop()
+
+        assert finished is False
+        assert waited < 0.5
+        assert checker.snapshot()['checks']['mongodb'] == {'status': 'unknown'}
+
+    def test_init_app_starts_checker(self):
+        """Test the checker runs from app creation rather than from the first probe"""
+        app = Flask(__name__)
+        app.config.update(HEALTH_CHECK_ENABLED=True, HEALTH_CHECK_INTERVAL=0.01)
+        self.checker.init_app(app)
+        try:
+            self.checker.wait_for_first_round()
+        finally:
+            self.checker.stop()
+
+        assert self.calls >= 1
+        assert self.checker.snapshot()['ready'] is True
+
+
+@pytest.fixture
+def checks():
+    """Swap the shared checker's dependencies for in-process checks"""
+    original = health_checker.checks
+    state = {'up': True}
+    health_checker.checks = {'mongodb': lambda: state['up']}
+    health_checker._results = {}
+    yield state
+    health_checker.checks = original
+    health_checker._results = {}
+
+
+class TestHealthRoutes:
+    """Test the probe endpoints"""
+
+    def test_liveness(self, client):
+        """Test liveness does not depend on dependencies"""
+        assert client.get('/health/live').status_code == 200
+        assert client.get('/health').get_json()['status'] == 'healthy'
+
+    def test_readiness_follows_checks(self, client, checks):
+        """Test readiness is 503 until dependencies are up"""
+        starting = client.get('/health/ready')
+        health_checker.run_checks()
+        ready = client.get('/health/ready')
+        checks['up'] = False
+        health_checker.run_checks()
+        down = client.get('/health/ready')
+
+        assert starting.status_code == 503
+        assert ready.status_code == 200
+        assert ready.get_json()['checks']['mongodb']['status'] == 'up'
+        assert down.status_code == 503
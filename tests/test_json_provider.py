@@ -0,0 +1,45 @@
+"""
+Test Fast JSON Provider
+"""
+
+import json
+from datetime import datetime
+from bson import ObjectId
+from app.utils import json_provider
+from app.utils.helpers import success_response
+
+
+class TestFastJSONProvider:
+    """Test fast JSON provider"""
+
+    def test_provider_installed(self, app):
+        """Test the app serializes with the fast provider"""
+        assert isinstance(app.json, json_provider.FastJSONProvider)
+
+    def test_objectid_and_datetime(self, app):
+        """Test ObjectId and datetime values are serialized natively"""
+        oid = ObjectId()
+        with app.test_request_context():
+            response, status = success_response({'id': oid, 'at': datetime(2025, 8, 17, 10, 0, 0)})
+
+        data = json.loads(response.get_data())
+        assert status == 200
+        assert data['result']['data'] == {'id': str(oid), 'at': '2025-08-17T10:00:00'}
+
+    def test_compact_unsorted_output(self, app):
+        """Test responses are compact and keep insertion order by default"""
+        with app.test_request_context():
+            body = app.json.response({'b': 1, 'a': [1, 2]}).get_data()
+
+        assert body == b'{"b":1,"a":[1,2]}\n'
+
+    def test_stdlib_fallback(self, app, monkeypatch):
+        """Test the provider produces the same output without orjson"""
+        payload = {'id': ObjectId('64b7f0c2a1b2c3d4e5f60718'), 'value': 7.25, 'name': 'pH'}
+        with app.test_request_context():
+            fast = app.json.response(payload).get_data()
+            monkeypatch.setattr(json_provider, 'orjson', None)
+            fallback = app.json.response(payload).get_data()
+
+        assert json.loads(fast) == json.loads(fallback)
+        assert fallback == b'{"id":"64b7f0c2a1b2c3d4e5f60718","value":7.25,"name":"pH"}\n'
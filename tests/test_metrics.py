@@ -0,0 +1,104 @@
+"""
+Test Prometheus metrics
+"""
+
+import pytest
+from flask import Flask
+from flask_socketio import ConnectionRefusedError
+from app.utils import metrics as metrics_module
+from app.utils.metrics import Metrics
+
+
+class TestMetricsDisabled:
+    """Test metrics without prometheus_client or with METRICS_ENABLED off"""
+
+    def test_metrics_endpoint_reports_disabled(self, client, monkeypatch):
+        """Test /metrics answers 503 instead of failing when metrics are off"""
+        monkeypatch.setattr(metrics_module.metrics, 'enabled', False)
+
+        response = client.get('/metrics')
+
+        assert response.status_code == 503
+
+    def test_disabled_metrics_do_nothing(self, monkeypatch):
+        """Test handlers and gauges work unchanged without prometheus_client"""
+        monkeypatch.setattr(metrics_module, 'prometheus_client', None)
+        metrics = Metrics()
+        metrics.init_app(Flask(__name__))
+
+        handler = metrics.timed_event('connect')(lambda auth: auth)
+        metrics.set_sockets({'iot': 1})
+        metrics.set_rooms({'device': 1})
+
+        assert not metrics.enabled
+        assert handler('auth') == 'auth'
+
+
+@pytest.fixture
+def enabled_metrics():
+    """Metrics on a private registry, with a small app timed by them"""
+    prometheus_client = pytest.importorskip('prometheus_client')
+    metrics = Metrics(registry=prometheus_client.CollectorRegistry())
+    app = Flask(__name__)
+
+    @app.route('/things/<thing_id>')
+    def thing(thing_id):
+        return {'id': thing_id}
+
+    metrics.init_app(app)
+    return metrics, app
+
+
+class TestMetricsEnabled:
+    """Test metrics with prometheus_client installed"""
+
+    def sample(self, metrics, name, **labels):
+        return metrics.registry.get_sample_value(name, labels)
+
+    def test_requests_are_timed_per_route_and_status(self, enabled_metrics):
+        """Test request durations are labelled with the route template, not the URL"""
+        metrics, app = enabled_metrics
+        client = app.test_client()
+        client.get('/things/1')
+        client.get('/things/2')
+        client.get('/missing')
+
+        assert self.sample(metrics, 'http_request_duration_seconds_count',
+                           route='/things/<thing_id>', method='GET', status='200') == 2
+        assert self.sample(metrics, 'http_request_duration_seconds_count',
+                           route='<unmatched>', method='GET', status='404') == 1
+
+    def test_events_are_timed_with_outcome(self, enabled_metrics):
+        """Test handler durations are counted as ok, rejected or error"""
+        metrics, _ = enabled_metrics
+
+        @metrics.timed_event('connect')
+        def connect(result):
+            if result == 'refuse':
+                raise ConnectionRefusedError('busy')
+            if result == 'fail':
+                raise RuntimeError('boom')
+            return result
+
+        connect(None)
+        connect(False)
+        for result in ('refuse', 'fail'):
+            with pytest.raises(Exception):
+                connect(result)
+
+        count = 'socketio_event_duration_seconds_count'
+        assert self.sample(metrics, count, event='connect', outcome='ok') == 1
+        assert self.sample(metrics, count, event='connect', outcome='rejected') == 2
+        assert self.sample(metrics, count, event='connect', outcome='error') == 1
+
+    def test_gauges_and_render(self, enabled_metrics):
+        """Test socket and room gauges are exposed in the text format"""
+        metrics, _ = enabled_metrics
+        metrics.set_sockets({'iot': 2, 'frontend': 5})
+        metrics.set_rooms({'device': 2, 'updates': 3})
+
+        body, content_type = metrics.render()
+
+        assert content_type.startswith('text/plain')
+        assert b'socketio_active_sockets{client_type="frontend"} 5.0' in body
+        assert b'socketio_rooms{kind="updates"} 3.0' in body
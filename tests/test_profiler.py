@@ -0,0 +1,136 @@
+"""
+Test the on-demand sampling profiler
+"""
+
+import json
+import threading
+from collections import Counter
+import pytest
+from app.utils.profiler import SamplingProfiler, to_collapsed, to_speedscope
+
+
+def busy_loop(stop):
+    """CPU-bound work the profiler should find"""
+    total = 0
+    while not stop.is_set():
+        total += sum(range(1000))
+    return total
+
+
+@pytest.fixture
+def busy_thread():
+    """A thread spinning in busy_loop while the test runs"""
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name='busy')
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+class TestSamplingProfiler:
+    """Test SamplingProfiler"""
+
+    def setup_method(self):
+        """Set up a profiler allowing short profiles"""
+        self.profiler = SamplingProfiler(max_seconds=5)
+
+    def test_hot_function_is_sampled(self, busy_thread):
+        """Test the frames of a busy thread show up, named after the thread and function"""
+        result = self.profiler.profile(0.2, interval=0.002)
+
+        busy = {stack: count for (thread, stack), count in result['samples'].items() if thread == 'busy'}
+        assert sum(busy.values()) >= 10
+        assert all(any(frame[0] == 'busy_loop' for frame in stack) for stack in busy)
+        assert ('busy_loop', 'tests/test_profiler.py', busy_loop.__code__.co_firstlineno) in next(iter(busy))
+
+    def test_waiting_request_is_left_out(self, busy_thread):
+        """Test the caller waiting for the profile is not part of it"""
+        result = self.profiler.profile(0.1, interval=0.002)
+
+        assert not any(frame[0] == 'test_waiting_request_is_left_out'
+                       for _, stack in result['samples'] for frame in stack)
+
+    def test_only_one_profile_at_a_time(self):
+        """Test a second profile is refused while one runs"""
+        first = threading.Thread(target=self.profiler.profile, args=(0.3,))
+        first.start()
+        try:
+            while not self.profiler._running.locked():
+                pass
+            assert self.profiler.profile(0.1) is None
+        finally:
+            first.join()
+        assert self.profiler.profile(0.05) is not None
+
+    @pytest.mark.parametrize('seconds, interval', [(0, 0.005), (6, 0.005), (1, 0.0001), (1, 2.0)])
+    def test_limits(self, seconds, interval):
+        """Test out-of-range durations and intervals are refused"""
+        with pytest.raises(ValueError):
+            self.profiler.profile(seconds, interval=interval)
+
+
+class TestProfileFormats:
+    """Test profile rendering"""
+
+    def setup_method(self):
+        """Set up a small profile"""
+        outer = ('handle_iot_data', 'app/event/sensor_event.py', 10)
+        inner = ('_load_all', 'app/storage/redis_storage.py', 20)
+        self.result = {
+            'samples': Counter({('MainThread', (outer, inner)): 3, ('MainThread', (outer,)): 1}),
+            'interval': 0.005,
+            'duration': 0.02
+        }
+
+    def test_collapsed(self):
+        """Test one line per stack, root first, most sampled first"""
+        assert to_collapsed(self.result).splitlines() == [
+            'MainThread;handle_iot_data (app/event/sensor_event.py:10);_load_all (app/storage/redis_storage.py:20) 3',
+            'MainThread;handle_iot_data (app/event/sensor_event.py:10) 1'
+        ]
+
+    def test_speedscope(self):
+        """Test a sampled speedscope profile with shared frames and weights in seconds"""
+        document = json.loads(to_speedscope(self.result, name='worker 1'))
+
+        assert document['$schema'] == 'https://www.speedscope.app/file-format-schema.json'
+        assert [frame['name'] for frame in document['shared']['frames']] == ['handle_iot_data', '_load_all']
+        [profile] = document['profiles']
+        assert profile['type'] == 'sampled'
+        assert profile['samples'] == [[0, 1], [0]]
+        assert profile['weights'] == pytest.approx([0.015, 0.005])
+        assert profile['endValue'] == pytest.approx(0.02)
+
+
+class TestProfileRoute:
+    """Test POST /api/v1/admin/profile"""
+
+    def test_collapsed_profile(self, client, api_headers):
+        """Test the endpoint returns collapsed stacks of this worker"""
+        response = client.post('/api/v1/admin/profile', headers=api_headers, json={'seconds': 0.1, 'interval_ms': 2})
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert int(response.headers['X-Profile-Samples']) >= 0
+
+    def test_speedscope_profile(self, client, api_headers):
+        """Test the endpoint returns a speedscope download"""
+        response = client.post('/api/v1/admin/profile', headers=api_headers,
+                               json={'seconds': 0.05, 'format': 'speedscope'})
+
+        assert response.status_code == 200
+        assert 'speedscope.json' in response.headers['Content-Disposition']
+        assert 'profiles' in json.loads(response.data)
+
+    def test_invalid_request(self, client, api_headers):
+        """Test bad formats and durations are refused"""
+        bad_format = client.post('/api/v1/admin/profile', headers=api_headers, json={'format': 'pprof'})
+        too_long = client.post('/api/v1/admin/profile', headers=api_headers, json={'seconds': 3600})
+
+        assert bad_format.status_code == 400
+        assert too_long.status_code == 400
+
+    def test_requires_api_key(self, client):
+        """Test the profiler is not reachable without a key"""
+        assert client.post('/api/v1/admin/profile', json={'seconds': 0.05}).status_code == 403
@@ -0,0 +1,122 @@
+"""
+Test the Redis read-through response cache
+"""
+
+import redis
+from app.storage.response_cache import ResponseCache
+from tests.fakes import FakeRedis
+
+
+class UnavailableRedis:
+    """Redis client whose every command fails"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("Redis is down")
+        return fail
+
+
+class TestResponseCache:
+    """Test ResponseCache"""
+
+    def setup_method(self):
+        """Set up a cache over an in-process Redis"""
+        self.client = FakeRedis()
+        self.cache = ResponseCache(client=self.client)
+        self.loads = 0
+
+    def loader(self):
+        self.loads += 1
+        return {"device_id": "dev1", "loads": self.loads}
+
+    def test_key_ignores_parameter_order(self):
+        """Test the same parameters map to the same key"""
+        assert self.cache.key('devices', {'page': 1, 'per_page': 5}) == self.cache.key('devices', {'per_page': 5, 'page': 1})
+        assert self.cache.key('devices', {'page': 1}) != self.cache.key('devices', {'page': 2})
+
+    def test_key_includes_version(self):
+        """Test a new version never maps to a body cached under the previous one"""
+        assert self.cache.key('devices', {'page': 1}, version=3) != self.cache.key('devices', {'page': 1}, version=4)
+        assert self.cache.key('device:dev1', version=('abc', 1)) != self.cache.key('device:dev1', version=('def', 1))
+
+    def test_miss_then_hit(self):
+        """Test the loader runs once and later reads are served from Redis"""
+        key = self.cache.key('device:dev1')
+
+        first = self.cache.get_or_set(key, self.loader, tags=['device:dev1'])
+        second = self.cache.get_or_set(key, self.loader, tags=['device:dev1'])
+
+        assert first == second == {"device_id": "dev1", "loads": 1}
+        assert self.loads == 1
+        stats = self.cache.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1 and stats['stores'] == 1
+        assert stats['hit_ratio'] == 0.5
+
+    def test_invalidate_drops_tagged_keys_only(self):
+        """Test invalidating a tag reloads its keys and keeps the others"""
+        device_key = self.cache.key('device:dev1')
+        other_key = self.cache.key('device:dev2')
+        self.cache.get_or_set(device_key, self.loader, tags=['devices', 'device:dev1'])
+        self.cache.get_or_set(other_key, self.loader, tags=['devices', 'device:dev2'])
+
+        self.cache.invalidate('device:dev1')
+
+        assert self.client.get(device_key) is None
+        assert self.client.get(other_key) is not None
+        assert self.cache.get_or_set(device_key, self.loader, tags=['device:dev1'])['loads'] == 3
+
+    def test_invalidation_during_load_discards_value(self):
+        """Test a value loaded before a concurrent write is not cached"""
+        key = self.cache.key('device:dev1')
+
+        def racing_loader():
+            self.cache.invalidate('device:dev1')
+            return self.loader()
+
+        value = self.cache.get_or_set(key, racing_loader, tags=['device:dev1'])
+
+        assert value['loads'] == 1
+        assert self.client.get(key) is None
+        assert self.cache.stats()['discarded'] == 1
+
+    def test_none_is_not_cached(self):
+        """Test missing resources are not cached and the lock is released"""
+        key = self.cache.key('device:missing')
+
+        assert self.cache.get_or_set(key, lambda: None, tags=['device:missing']) is None
+        assert self.client.get(key) is None
+        assert self.client.get(f"{key}:lock") is None
+
+    def test_tag_sets_expire_when_nothing_is_stored(self):
+        """Test a load that caches nothing does not leave a tag set without a TTL"""
+        key = self.cache.key('device:missing')
+
+        self.cache.get_or_set(key, lambda: None, tags=['devices', 'device:missing'], ttl=30)
+
+        assert self.client.ttl('cache:tag:devices') == 30
+        assert self.client.ttl('cache:tag:device:missing') == 30
+
+    def test_tag_set_ttl_is_never_shortened(self):
+        """Test a tag set keeps outliving the longest-lived key it references"""
+        self.cache.get_or_set(self.cache.key('devices', {'page': 1}), self.loader, tags=['devices'], ttl=300)
+        self.cache.get_or_set(self.cache.key('devices', {'page': 2}), self.loader, tags=['devices'], ttl=30)
+
+        assert self.client.ttl('cache:tag:devices') == 300
+
+    def test_disabled_cache_always_loads(self):
+        """Test a disabled cache calls the loader every time"""
+        self.cache.enabled = False
+        key = self.cache.key('devices')
+
+        self.cache.get_or_set(key, self.loader, tags=['devices'])
+        self.cache.get_or_set(key, self.loader, tags=['devices'])
+
+        assert self.loads == 2
+
+    def test_unavailable_redis_falls_back_to_loader(self):
+        """Test Redis errors degrade to uncached reads"""
+        cache = ResponseCache(client=UnavailableRedis())
+
+        assert cache.get_or_set(cache.key('devices'), self.loader, tags=['devices'])['loads'] == 1
+        cache.invalidate('devices')
+        assert cache.stats()['errors'] == 2
@@ -0,0 +1,104 @@
+"""
+Test per-frontend send queues and slow-consumer eviction
+"""
+
+from app.event.send_queue import SendQueues
+from tests.fakes import FakeClock
+
+
+class TestSendQueues:
+    """Test SendQueues"""
+
+    def setup_method(self):
+        """Set up queues with a controllable transport backlog per sid"""
+        self.clock = FakeClock()
+        self.backlogs = {}
+        self.sent = []
+        self.disconnected = []
+        self.queues = SendQueues(
+            queue_size=3, max_backlog=10, slow_timeout=30.0,
+            emit=lambda to, message, skip_sid: self.sent.append((to, message, skip_sid)),
+            backlog=lambda sid: self.backlogs.get(sid, 0),
+            disconnect=self.disconnected.append,
+            clock=self.clock
+        )
+
+    def test_healthy_frontends_share_one_room_emit(self):
+        """Test a room message is emitted once when every frontend keeps up"""
+        held = self.queues.send('room', ('a', 'b', 'c'), {'seq': 1})
+
+        assert held == 0
+        assert self.sent == [('room', {'seq': 1}, [])]
+
+    def test_slow_frontend_is_skipped_and_queued(self):
+        """Test a frontend with a full transport is skipped and its queue keeps the newest messages"""
+        self.backlogs['slow'] = 10
+        for seq in range(5):
+            self.queues.send('room', ('fast', 'slow'), {'seq': seq})
+
+        assert all(skip == ['slow'] for _, _, skip in self.sent)
+        lag = self.queues.lag()['slow_consumers']['slow']
+        assert lag['queued'] == 3
+        assert lag['dropped'] == 2
+        assert lag['backlog'] == 10
+
+    def test_room_emit_is_skipped_when_everyone_is_behind(self):
+        """Test no room emit happens when every frontend is queued"""
+        self.backlogs['a'] = 10
+
+        assert self.queues.send('room', ('a',), {'seq': 1}) == 1
+        assert self.sent == []
+
+    def test_drain_sends_queued_messages_in_order_when_transport_catches_up(self):
+        """Test queued messages are handed over oldest first as the transport drains"""
+        self.backlogs['slow'] = 10
+        for seq in range(3):
+            self.queues.send('room', ('slow',), {'seq': seq})
+
+        assert self.queues.drain() == 0
+        self.backlogs['slow'] = 8
+        assert self.queues.drain() == 2
+        self.backlogs['slow'] = 0
+        assert self.queues.drain() == 1
+
+        assert [(to, message['seq']) for to, message, _ in self.sent] == [('slow', 0), ('slow', 1), ('slow', 2)]
+        assert self.queues.lag()['slow_consumers'] == {}
+
+    def test_queued_frontend_keeps_order(self):
+        """Test a frontend with queued messages gets new ones queued too, even if its transport has room"""
+        self.backlogs['slow'] = 10
+        self.queues.send('room', ('slow',), {'seq': 1})
+        self.backlogs['slow'] = 0
+        self.queues.send('room', ('slow',), {'seq': 2})
+        self.queues.drain()
+
+        assert [message['seq'] for _, message, _ in self.sent] == [1, 2]
+
+    def test_frontend_slow_past_timeout_is_disconnected(self):
+        """Test a frontend that stays behind is evicted and forgotten"""
+        self.backlogs['slow'] = 10
+        self.queues.send('room', ('slow', 'fast'), {'seq': 1})
+        self.clock.now += 10
+        self.queues.drain()
+        assert self.disconnected == []
+
+        self.clock.now += 25
+        self.queues.drain()
+
+        assert self.disconnected == ['slow']
+        assert self.queues.lag() == {'slow_consumers': {}, 'evicted': 1}
+
+    def test_remove_forgets_queue(self):
+        """Test a disconnected frontend's queue is released"""
+        self.backlogs['slow'] = 10
+        self.queues.send('room', ('slow',), {'seq': 1})
+        self.queues.remove('slow')
+
+        assert self.queues.lag()['slow_consumers'] == {}
+
+    def test_admin_endpoint_reports_lag(self, client, api_headers):
+        """Test the admin endpoint returns the shared queues' lag report"""
+        response = client.get('/api/v1/admin/realtime/lag', headers=api_headers)
+
+        assert response.status_code == 200
+        assert set(response.get_json()['result']['data']) == {'slow_consumers', 'evicted'}
@@ -0,0 +1,117 @@
+"""
+Test the application service registry
+"""
+
+import threading
+import pytest
+from tests.fakes import patched
+from app.services import registry as registry_module
+from app.services.registry import ServiceRegistry, get_service
+
+
+class TestServiceRegistry:
+    """Test ServiceRegistry"""
+
+    def setup_method(self):
+        """Set up an empty registry"""
+        self.registry = ServiceRegistry()
+        self.events = []
+
+    def test_get_returns_singleton(self):
+        """Test a service is built once and then shared"""
+        self.registry.register('thing', lambda services: object())
+
+        assert self.registry.get('thing') is self.registry.get('thing')
+
+    def test_get_is_thread_safe(self):
+        """Test concurrent first use builds a single instance"""
+        builds = []
+        started = threading.Event()
+
+        def factory(services):
+            started.wait(0.05)
+            builds.append(1)
+            return object()
+
+        self.registry.register('slow', factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.registry.get('slow'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(builds) == 1
+        assert len({id(result) for result in results}) == 1
+
+    def test_dependencies_are_shared(self):
+        """Test a factory can depend on another registered service"""
+        self.registry.register('base', lambda services: object())
+        self.registry.register('user', lambda services: {'base': services.get('base')})
+
+        assert self.registry.get('user')['base'] is self.registry.get('base')
+
+    def test_duplicate_registration_rejected(self):
+        """Test a name can only be registered once"""
+        self.registry.register('thing', lambda services: object())
+
+        with pytest.raises(ValueError):
+            self.registry.register('thing', lambda services: object())
+
+    def test_warmup_and_shutdown_hooks(self):
+        """Test hooks run once, shutdown in reverse creation order"""
+        self.registry.register('first', lambda services: 'first',
+                               warmup=self.events.append,
+                               shutdown=lambda name: self.events.append(f'stop {name}'))
+        self.registry.register('second', lambda services: 'second',
+                               shutdown=lambda name: self.events.append(f'stop {name}'))
+
+        self.registry.warmup()
+        self.registry.shutdown()
+        self.registry.shutdown()
+
+        assert self.events == ['first', 'stop second', 'stop first']
+
+    def test_failing_shutdown_does_not_stop_others(self):
+        """Test one failing shutdown hook does not skip the rest"""
+        def fail(instance):
+            raise RuntimeError("boom")
+
+        self.registry.register('ok', lambda services: 'ok', shutdown=self.events.append)
+        self.registry.register('broken', lambda services: 'broken', shutdown=fail)
+        self.registry.warmup()
+
+        self.registry.shutdown()
+
+        assert self.events == ['ok']
+
+    def test_exit_hook_shuts_down_shared_instances_once(self):
+        """Test shutdown at exit runs once per instance, however many apps were created"""
+        shared = object()
+        registries = [ServiceRegistry() for _ in range(3)]
+        for registry in registries:
+            registry.register('shared', lambda services: shared, shutdown=self.events.append)
+            registry.get('shared')
+
+        with patched(registry_module, _registries=set(registries)):
+            registry_module._shutdown_registries()
+
+        assert self.events == [shared]
+
+    def test_init_app_does_not_add_exit_hooks(self, app):
+        """Test creating applications tracks their registries instead of piling up atexit hooks"""
+        with patched(registry_module.atexit, register=lambda func: self.events.append(func)):
+            ServiceRegistry().init_app(app)
+
+        assert self.events == []
+        assert app.extensions['services'] in registry_module._registries
+
+    def test_app_services_are_shared_across_requests(self, app):
+        """Test the application serves the same instances to every request"""
+        with app.test_request_context():
+            sensor_service = get_service('sensor')
+        with app.test_request_context():
+            assert get_service('sensor') is sensor_service
+            assert sensor_service.calibration_service is get_service('calibration')
+            assert get_service('recalibration').calibration_service is get_service('calibration')
@@ -0,0 +1,63 @@
+"""
+Test the binary telemetry codec
+"""
+
+import json
+import struct
+import pytest
+from app.utils.telemetry_codec import (
+    FORMAT_VERSION, HEADER, RECORD, Reading, decode_payload, decode_readings, encode_readings
+)
+
+
+class TestTelemetryCodec:
+    """Test encoding and decoding telemetry frames"""
+
+    def setup_method(self):
+        """Set up a typical three-sensor payload"""
+        self.payload = {'ph': 7.02, 'tds': 412.5, 'turbidity': 3.1}
+
+    def test_round_trip(self):
+        """Test a payload survives encoding and decoding"""
+        frame = encode_readings(self.payload)
+
+        assert decode_payload(frame) == pytest.approx(self.payload, rel=1e-6)
+        assert [r.sensor_type for r in decode_readings(frame)] == ['ph', 'tds', 'turbidity']
+        assert all(isinstance(r, Reading) and isinstance(r.value, float) for r in decode_readings(frame))
+
+    def test_frame_is_smaller_than_json(self):
+        """Test the binary frame is much smaller than the JSON text"""
+        frame = encode_readings(self.payload)
+
+        assert len(frame) == HEADER.size + 3 * RECORD.size == 17
+        assert len(frame) * 2 < len(json.dumps(self.payload, separators=(',', ':')))
+
+    def test_decodes_views_and_bytearrays(self):
+        """Test buffers are accepted without converting them to bytes first"""
+        frame = bytearray(b'\xff' + encode_readings(self.payload))
+
+        assert decode_payload(memoryview(frame)[1:]) == decode_payload(bytes(frame[1:]))
+        assert decode_payload(frame[1:]) == pytest.approx(self.payload, rel=1e-6)
+
+    def test_skips_unknown_sensors_and_missing_values(self):
+        """Test unknown sensor IDs and NaN values are skipped"""
+        frame = HEADER.pack(FORMAT_VERSION, 3) + RECORD.pack(1, 7.0) + RECORD.pack(200, 1.0) + RECORD.pack(2, float('nan'))
+
+        assert decode_payload(frame) == {'ph': 7.0}
+
+    @pytest.mark.parametrize('frame', [
+        b'',
+        b'\x01',
+        struct.pack('<BB', 2, 0),
+        HEADER.pack(FORMAT_VERSION, 2) + RECORD.pack(1, 7.0),
+        HEADER.pack(FORMAT_VERSION, 1) + RECORD.pack(1, 7.0) + b'\x00'
+    ])
+    def test_rejects_malformed_frames(self, frame):
+        """Test truncated frames, trailing bytes and unknown versions are rejected"""
+        with pytest.raises(ValueError):
+            decode_readings(frame)
+
+    def test_rejects_unknown_sensor_type_when_encoding(self):
+        """Test encoding a sensor type without a wire ID fails"""
+        with pytest.raises(ValueError):
+            encode_readings({'humidity': 40.0})
@@ -0,0 +1,216 @@
+"""
+Test iot_update coalescing and rate capping
+"""
+
+import pytest
+from app.event.update_coalescer import MIN_RATE, UpdateCoalescer, parse_subscription
+from tests.fakes import FakeClock
+
+
+class TestUpdateCoalescer:
+    """Test UpdateCoalescer"""
+
+    def setup_method(self):
+        """Set up a coalescer capped at 5 Hz that records what it sends"""
+        self.clock = FakeClock()
+        self.sent = []
+        self.coalescer = UpdateCoalescer(max_rate=5.0, emit=lambda room, message, sids: self.sent.append((room, message)),
+                                         clock=self.clock)
+
+    def test_first_update_is_sent_immediately(self):
+        """Test an idle room gets the update without waiting for a flush"""
+        room = self.coalescer.add('dev1', 'sid1')
+
+        assert self.coalescer.publish('dev1', {'seq': 1}) == 1
+        assert self.sent == [(room, {'seq': 1})]
+
+    def test_latest_payload_wins_within_interval(self):
+        """Test a burst is coalesced into one trailing message with the latest payload"""
+        room = self.coalescer.add('dev1', 'sid1')
+        for seq in range(50):  # 50 Hz for one second
+            self.coalescer.publish('dev1', {'seq': seq})
+            self.clock.now += 0.02
+            self.coalescer.flush()
+
+        assert 5 <= len(self.sent) <= 6
+        assert all(sent_room == room for sent_room, _ in self.sent)
+        self.clock.now += 1
+        self.coalescer.flush()
+        assert self.sent[-1][1] == {'seq': 49}
+
+    def test_flush_waits_for_interval(self):
+        """Test a pending message is not sent before its room's interval is up"""
+        self.coalescer.add('dev1', 'sid1')
+        self.coalescer.publish('dev1', {'seq': 1})
+        self.coalescer.publish('dev1', {'seq': 2})
+
+        self.clock.now += 0.1
+        assert self.coalescer.flush() == 0
+        self.clock.now += 0.1
+        assert self.coalescer.flush() == 1
+        assert self.sent[-1][1] == {'seq': 2}
+        assert self.coalescer.flush() == 0
+
+    def test_frontend_rate_override(self):
+        """Test frontends asking for a lower rate share a slower room"""
+        fast = self.coalescer.add('dev1', 'sid1')
+        slow = self.coalescer.add('dev1', 'sid2', rate=1)
+        also_slow = self.coalescer.add('dev1', 'sid3', rate='1.0')
+
+        for _ in range(10):  # 10 Hz for one second
+            self.coalescer.publish('dev1', {})
+            self.clock.now += 0.1
+            self.coalescer.flush()
+
+        counts = {room: sum(1 for sent_room, _ in self.sent if sent_room == room) for room in (fast, slow)}
+        assert slow == also_slow != fast
+        assert counts[fast] in (5, 6)  # one per 200ms, including both ends of the second
+        assert counts[slow] in (1, 2)
+
+    def test_rate_is_clamped(self):
+        """Test requested rates stay between MIN_RATE and the configured maximum"""
+        assert self.coalescer.rate_for(None) == 5.0
+        assert self.coalescer.rate_for(50) == 5.0
+        assert self.coalescer.rate_for(0) == MIN_RATE
+        assert self.coalescer.rate_for('fast') == 5.0
+
+    def test_remove_drops_empty_rooms(self):
+        """Test updates stop once the last frontend of a device leaves"""
+        room = self.coalescer.add('dev1', 'sid1')
+
+        assert self.coalescer.remove('sid1') == room
+        assert self.coalescer.remove('sid1') is None
+        assert self.coalescer.publish('dev1', {}) == 0
+        assert self.sent == []
+
+    def test_other_devices_are_independent(self):
+        """Test one device's burst does not delay another device's updates"""
+        self.coalescer.add('dev1', 'sid1')
+        other = self.coalescer.add('dev2', 'sid2')
+        self.coalescer.publish('dev1', {})
+        self.coalescer.publish('dev1', {})
+
+        assert self.coalescer.publish('dev2', {'device': 2}) == 1
+        assert self.sent[-1] == (other, {'device': 2})
+
+    def test_subscribers_get_only_their_sensors(self):
+        """Test each room receives only its subscribed readings and scores"""
+        everything = self.coalescer.add('dev1', 'sid1')
+        ph_only = self.coalescer.add('dev1', 'sid2', sensors=['ph'])
+        message = {'device_id': 'dev1', 'payload': {'ph': 7.0, 'tds': 400.0}, 'anomaly_scores': {'ph': 0.5, 'tds': 0.1}}
+
+        self.coalescer.publish('dev1', message)
+
+        sent = dict(self.sent)
+        assert sent[everything] is message
+        assert sent[ph_only] == {'device_id': 'dev1', 'payload': {'ph': 7.0}, 'anomaly_scores': {'ph': 0.5}}
+
+    def test_one_message_per_distinct_subscription(self):
+        """Test frontends with the same subscription share a room and one filtered message"""
+        rooms = {self.coalescer.add('dev1', f'sid{i}', sensors='tds, ph') for i in range(10)}
+        rooms.add(self.coalescer.add('dev1', 'sid-other', sensors=['ph', 'tds']))
+
+        self.coalescer.publish('dev1', {'payload': {'ph': 7.0, 'tds': 400.0, 'turbidity': 3.0}})
+
+        assert len(rooms) == 1
+        assert len(self.sent) == 1
+        assert self.sent[0][1]['payload'] == {'ph': 7.0, 'tds': 400.0}
+
+    def test_unrelated_updates_are_not_sent(self):
+        """Test a room is skipped when the update has none of its sensors"""
+        self.coalescer.add('dev1', 'sid1', sensors='flow_*')
+
+        assert self.coalescer.publish('dev1', {'payload': {'ph': 7.0}}) == 0
+        assert self.coalescer.publish('dev1', {'payload': {'flow_in': 1.5, 'ph': 7.0}}) == 1
+        assert self.sent[0][1]['payload'] == {'flow_in': 1.5}
+
+    def test_resubscribe_keeps_other_settings(self):
+        """Test changing the subscription keeps the rate and vice versa"""
+        first = self.coalescer.add('dev1', 'sid1', rate=1, sensors=['ph'])
+
+        left, joined = self.coalescer.resubscribe('sid1', sensors=['tds'])
+        assert left == first
+        assert joined == self.coalescer.add('dev1', 'sid2', rate=1, sensors=['tds'])
+        _, rejoined = self.coalescer.resubscribe('sid1', rate=5)
+        assert rejoined == self.coalescer.add('dev1', 'sid3', sensors=['tds'])
+        assert self.coalescer.resubscribe('unknown', sensors=['ph']) == (None, None)
+
+    def test_parse_subscription(self):
+        """Test subscriptions are normalized and validated"""
+        assert parse_subscription(None) is None
+        assert parse_subscription('*') is None
+        assert parse_subscription([]) is None
+        assert parse_subscription(' tds,ph ,') == ('ph', 'tds')
+        with pytest.raises(ValueError):
+            parse_subscription(42)
+        with pytest.raises(ValueError):
+            self.coalescer.add('dev1', 'sid1', sensors=[1, 2])
+
+
+class TestDeltaUpdates:
+    """Test delta-encoded iot_update messages"""
+
+    def setup_method(self):
+        """Set up a coalescer with one delta frontend that records what it sends"""
+        self.clock = FakeClock()
+        self.sent = []
+        self.coalescer = UpdateCoalescer(max_rate=5.0, emit=lambda room, message, sids: self.sent.append((room, message)),
+                                         clock=self.clock)
+        self.room = self.coalescer.add('dev1', 'sid1', delta=True)
+
+    def publish(self, payload, scores=None):
+        self.clock.now += 1
+        self.coalescer.publish('dev1', {'device_id': 'dev1', 'payload': payload, 'anomaly_scores': scores or {}})
+
+    def test_only_changed_readings_are_sent(self):
+        """Test unchanged readings are left out and sequence numbers increase"""
+        self.publish({'ph': 7.0, 'tds': 400.0})
+        self.publish({'ph': 7.0, 'tds': 410.0})
+
+        assert [m['seq'] for _, m in self.sent] == [1, 2]
+        assert self.sent[0][1]['payload'] == {'ph': 7.0, 'tds': 400.0}
+        assert self.sent[1][1] == {'device_id': 'dev1', 'seq': 2, 'delta': True,
+                                   'payload': {'tds': 410.0}, 'anomaly_scores': {}}
+
+    def test_unchanged_update_is_not_sent(self):
+        """Test an update identical to the room's state is skipped without using a sequence number"""
+        self.publish({'ph': 7.0})
+        self.publish({'ph': 7.0})
+        self.publish({'ph': 7.1})
+
+        assert [m['seq'] for _, m in self.sent] == [1, 2]
+
+    def test_coalesced_readings_are_merged(self):
+        """Test a reading only present in a superseded message is still sent"""
+        self.publish({'ph': 7.0, 'tds': 400.0})
+        self.coalescer.publish('dev1', {'payload': {'tds': 410.0}})
+        self.coalescer.publish('dev1', {'payload': {'ph': 7.2}})
+        self.clock.now += 1
+        self.coalescer.flush()
+
+        assert self.sent[-1][1]['payload'] == {'tds': 410.0, 'ph': 7.2}
+
+    def test_snapshot_on_join_and_resync(self):
+        """Test snapshots carry the full state and the current sequence number"""
+        first = self.coalescer.snapshot('sid1', seed={'ph': 6.9, 'tds': 390.0})
+        self.publish({'ph': 7.0})
+        self.coalescer.add('dev1', 'sid2', delta=True)
+        joined = self.coalescer.snapshot('sid2', seed={'ph': 0.0})
+
+        assert first == {'device_id': 'dev1', 'seq': 0, 'snapshot': True,
+                         'payload': {'ph': 6.9, 'tds': 390.0}, 'anomaly_scores': {}}
+        assert self.sent[-1][1]['payload'] == {'ph': 7.0}
+        assert joined['seq'] == 1
+        assert joined['payload'] == {'ph': 7.0, 'tds': 390.0}
+
+    def test_full_and_delta_frontends_use_separate_rooms(self):
+        """Test frontends without delta mode keep receiving full payloads"""
+        full = self.coalescer.add('dev1', 'sid2')
+        self.publish({'ph': 7.0, 'tds': 400.0})
+        self.publish({'ph': 7.0, 'tds': 410.0})
+
+        full_messages = [m for room, m in self.sent if room == full]
+        assert full != self.room
+        assert full_messages[-1]['payload'] == {'ph': 7.0, 'tds': 410.0}
+        assert self.coalescer.snapshot('sid2') is None
+        assert self.coalescer.member('sid2') == ('dev1', 5.0, None, False)